@@ -1,5 +1,12 @@
 # backend/app/agents/llm_agent.py
-import requests
+import asyncio
+import json
+import os
+
+import httpx
+
+from app.agents.plan_cache import plan_cache
+from app.agents.plan_compiler import parse_plan, parse_step
 
 PLANNER_PROMPT = """
 You are a browser automation assistant. Break the user's instruction into numbered browser actions:
@@ -8,8 +15,9 @@ You are a browser automation assistant. Break the user's instruction into number
 2. type: <CSS selector>-><text>
 3. press: <key>
 4. click: <CSS selector>
-5. extract_text: <CSS selector>-><count>
-6. screenshot: <filename>
+5. wait_for: <CSS selector>
+6. extract_text: <CSS selector>-><count>  (optionally ->title=<selector>, price=<selector>, link=<selector>@href for one record per match)
+7. screenshot: <filename>
 
 Instruction:
 {instruction}
@@ -17,18 +25,84 @@ Instruction:
 Output ONLY the numbered list.
 """
 
+
+class StepParser:
+    """Incremental parser: feed streamed tokens, get back each step as soon as its line is complete"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, token):
+        self._buffer += token
+        *lines, self._buffer = self._buffer.split("\n")
+        return [step for step in map(parse_step, lines) if step]
+
+    def finish(self):
+        line, self._buffer = self._buffer, ""
+        step = parse_step(line)
+        return [step] if step else []
+
+
 class LLMAgent:
-    def __init__(self, ollama_url="http://localhost:11434/api/generate", model="llama3"):
-        self.ollama_url = ollama_url
-        self.model = model
+    def __init__(self, ollama_url=None, model=None, cache=plan_cache, stream=None):
+        self.ollama_url = ollama_url or os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+        self.model = model or os.getenv("OLLAMA_MODEL", "llama3")
+        self.cache = cache
+        self.stream = stream if stream is not None else os.getenv("LLM_STREAM", "true").lower() == "true"
+        self._async_client = None
+        self._async_client_loop = None
+
+    def _get_async_client(self):
+        """Keep-alive client for the running loop; httpx async clients cannot be shared across loops"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=5.0))
+            self._async_client_loop = loop
+        return self._async_client
 
-    def plan(self, instruction: str) -> str:
+    def cached_plan(self, instruction: str):
+        """Steps of a previously generated plan for this instruction, or None"""
+        if self.cache is None:
+            return None
+        return self.cache.get(instruction, self.model)
+
+    async def aiter_plan(self, instruction: str):
+        """Generate a plan, yielding steps while the model is still generating, and cache it.
+
+        Callers look up cached_plan() first; this always asks the model.
+        """
+        steps = []
         prompt = PLANNER_PROMPT.format(instruction=instruction)
-        response = requests.post(
-            self.ollama_url,
-            json={"model": self.model, "prompt": prompt, "stream": False},
-            timeout=120
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data.get("response") or data.get("message") or ""
+        client = self._get_async_client()
+        if self.stream:
+            parser = StepParser()
+            async with client.stream(
+                "POST", self.ollama_url,
+                json={"model": self.model, "prompt": prompt, "stream": True}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    for step in parser.feed(chunk.get("response", "")):
+                        steps.append(step)
+                        yield step
+                    if chunk.get("done"):
+                        break
+            for step in parser.finish():
+                steps.append(step)
+                yield step
+        else:
+            response = await client.post(
+                self.ollama_url,
+                json={"model": self.model, "prompt": prompt, "stream": False}
+            )
+            response.raise_for_status()
+            data = response.json()
+            for step in parse_plan(data.get("response") or data.get("message") or ""):
+                steps.append(step)
+                yield step
+
+        if self.cache is not None:
+            self.cache.set(instruction, self.model, steps)
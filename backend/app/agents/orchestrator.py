@@ -1,19 +1,96 @@
 # backend/app/agents/orchestrator.py
 import asyncio
+from contextlib import AsyncExitStack
 from app.agents.llm_agent import LLMAgent
+from app.agents.plan_compiler import PAGE_VERBS, PlanError, compile_plan, compile_step
+from app.agents.session import AgentSession, RunLimiter, iterate
 from app.agents.web_agent import WebAgent
+from app.browser_pool import get_pool
 
 class Orchestrator:
     def __init__(self):
-        self.llm = LLMAgent()  # synchronous
-        self.web = WebAgent()  # async
+        self.llm = LLMAgent()  # async streaming planner
+        self.web = WebAgent()  # stateless, one AgentSession per run
+        self.limiter = RunLimiter()
 
     async def execute_command(self, command: str, timeout: int = 120):
-        # 1. Generate plan from LLM
-        plan = self.llm.plan(command)
+        """Run one command in its own session; raises QueueFull when the agent is saturated
+        and PlanError when the plan can't run"""
+        # A cached plan is known in full, so it is validated before we queue or touch a browser
+        cached = self.llm.cached_plan(command)
+        actions = compile_plan("\n".join(cached)) if cached is not None else None
 
-        # 2. Execute plan using WebAgent (async)
-        result = await asyncio.wait_for(self.web.run_plan(plan, timeout=timeout), timeout=timeout)
+        async with self.limiter.admit() as position:
+            session = AgentSession(command)
+            # The LLM stream and Playwright both run on the browser pool's loop,
+            # so this handler's loop is never blocked while the plan is produced.
+            # Cancelling this coroutine (e.g. client disconnect) cancels the run on the pool loop too.
+            result = await asyncio.wait_for(get_pool().call(self._pipeline, session, timeout, actions), timeout=timeout)
+            result["queue_position"] = position
+            return result
+
+    async def _streamed_actions(self, command):
+        """Compile plan steps as the LLM streams them; the first invalid step stops the stream"""
+        has_page = False
+        async for step in self.llm.aiter_plan(command):
+            action = compile_step(step)
+            if action is None:
+                continue
+            if action.verb in PAGE_VERBS and not has_page:
+                raise PlanError([f"{action.verb} needs a page; open a URL first"])
+            has_page = has_page or action.verb == "open"
+            yield action
+
+    async def _prefetch(self, session, stack, url, timeout):
+        """Take a pooled context and start loading the plan's first URL while the LLM streams the rest"""
+        context = await stack.enter_async_context(get_pool().context())
+        with session.timings.stage("browser_setup"):
+            await self.web.open_session(session, context)
+        session.prefetched[url] = asyncio.create_task(self.web.navigate(session, url, timeout))
+
+    async def _pipeline(self, session, timeout, actions=None):
+        timings = session.timings
+
+        # The context is entered speculatively by _prefetch, or below once the plan is known;
+        # either way it is closed when this block exits, including on PlanError
+        async with AsyncExitStack() as stack:
+            prefetch = None
+            try:
+                # 1. Plan: the cached plan, or steps checked one by one as the LLM streams them.
+                #    The first open: starts loading at once; a bad step stops the stream and the
+                #    speculative page is thrown away with its context.
+                if actions is None:
+                    lines = []
+                    with timings.stage("plan"):
+                        async for action in self._streamed_actions(session.command):
+                            timings.mark("first_step")
+                            lines.append(action.line)
+                            if action.verb == "open" and prefetch is None:
+                                prefetch = asyncio.create_task(self._prefetch(session, stack, action.args[0], timeout))
+                    # Whole-plan checks and extract_text merging, as for a cached plan
+                    actions = compile_plan("\n".join(lines))
+
+                # 2. Execute the validated plan; its first page is usually loaded by now
+                if prefetch is not None:
+                    await prefetch
+                else:
+                    context = await stack.enter_async_context(get_pool().context())
+                    with timings.stage("browser_setup"):
+                        await self.web.open_session(session, context)
+                result = await self.web.execute(session, iterate(actions), timeout)
+            except BaseException:
+                await self._discard(session, prefetch)
+                raise
 
         # 3. Return structured output
-        return {"plan": plan, "execution": result}
+        return {"plan": "\n".join(action.line for action in actions), "execution": result, "timings": timings.to_dict()}
+
+    @staticmethod
+    async def _discard(session, prefetch):
+        """Stop a speculative navigation before its context is closed"""
+        if prefetch is None:
+            return
+        tasks = [prefetch, *session.prefetched.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
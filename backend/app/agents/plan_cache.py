@@ -0,0 +1,84 @@
+# backend/app/agents/plan_cache.py
+import hashlib
+import json
+import os
+import time
+
+from app.ttl_cache import TTLCache
+
+
+def normalize_instruction(instruction):
+    """Whitespace-insensitive form of an instruction; case is kept because typed text may depend on it"""
+    return " ".join(instruction.split())
+
+
+class PlanCache:
+    """LLM plan cache keyed on instruction + model: in-memory LRU with TTL and an optional on-disk layer"""
+
+    def __init__(self, ttl=None, max_entries=None, disk_dir=None):
+        self.ttl = ttl or float(os.getenv("PLAN_CACHE_TTL", "86400"))
+        self.memory = TTLCache(
+            max_entries=max_entries or int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "256")),
+            ttl=self.ttl
+        )
+        self.disk_dir = disk_dir if disk_dir is not None else os.getenv("PLAN_CACHE_DIR", "cache/plans")
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, instruction, model):
+        return f"{model}\x00{normalize_instruction(instruction)}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, instruction, model):
+        """Return the cached list of steps, or None"""
+        key = self._key(instruction, model)
+        steps = self.memory.get(key)
+        if steps is not None:
+            self.hits += 1
+            return steps
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                if time.time() - os.path.getmtime(path) <= self.ttl:
+                    with open(path, encoding="utf-8") as f:
+                        steps = json.load(f)
+                    self.disk_hits += 1
+                    self.memory.set(key, steps)
+                    return steps
+                os.remove(path)
+            except (OSError, ValueError):
+                pass
+        self.misses += 1
+        return None
+
+    def set(self, instruction, model, steps):
+        # An empty plan means the model answered with something we could not parse; retry next time
+        if not steps:
+            return
+        key = self._key(instruction, model)
+        self.memory.set(key, list(steps))
+        if not self.disk_dir:
+            return
+        try:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(steps), f)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"Plan cache write error: {e}")
+
+    def stats(self):
+        return {
+            "entries": len(self.memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,205 @@
+# backend/app/agents/plan_compiler.py
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlparse
+
+# One validated browser action. `args` is a tuple whose shape depends on the verb:
+#   open (url,) | type (selector, text) | press (key,) | click (selector,)
+#   wait_for (selector, timeout_ms | None) | screenshot (filename,)
+#   extract_text ((selector, count, fields | None), ...) where fields is ((name, field), ...)
+Action = namedtuple("Action", "verb args line")
+
+VERBS = ("open", "type", "press", "click", "wait_for", "extract_text", "screenshot")
+# Verbs that act on the current page and so need an open: before them
+PAGE_VERBS = frozenset(("type", "press", "click", "wait_for", "extract_text", "screenshot"))
+
+# "3. click: #submit", "- open: https://..." or a bare "press: Enter", optionally wrapped in backticks
+STEP_RE = re.compile(
+    r"^\s*(?:\d+\s*[.):]\s*|[-*]\s+)?`?(" + "|".join(VERBS) + r")\s*:\s*(.*?)`?\s*$",
+    re.IGNORECASE
+)
+# A numbered line with a verb we don't know, e.g. "4. scroll: down"
+UNKNOWN_STEP_RE = re.compile(r"^\s*\d+\s*[.):]\s*`?([a-z_]+)\s*:", re.IGNORECASE)
+
+TYPE_RE = re.compile(r"^(.+?)\s*->\s*\"?(.*?)\"?$")
+# "<selector>-><count>" with optional record fields: "->title=.name, price=.price, link=a@href"
+COUNT_RE = re.compile(r"^(.+?)\s*->\s*(\d+)(?:\s*->\s*(.+))?$")
+FIELD_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*=\s*(.+?)\s*$")
+TIMEOUT_RE = re.compile(r"^(.+?)\s*->\s*(\d+)\s*(?:ms)?$")
+KEY_RE = re.compile(r"^[A-Za-z0-9+_ ]+$|^.$")
+
+MAX_EXTRACT_COUNT = 100
+DEFAULT_EXTRACT_COUNT = 10
+
+
+class PlanError(ValueError):
+    """A plan that would fail at run time; carries every problem found, one string per step"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def parse_step(line):
+    """Normalize one plan line to "verb: argument", or None if it is not an action.
+
+    Numbered lines with an unknown verb are kept as they are, so compile_step rejects them.
+    """
+    match = STEP_RE.match(line)
+    if not match:
+        return line.strip() if UNKNOWN_STEP_RE.match(line) else None
+    verb, argument = match.groups()
+    return f"{verb.lower()}: {argument.strip()}"
+
+
+def parse_plan(text):
+    """All actions in a complete plan, in order, as normalized step strings"""
+    return [step for step in map(parse_step, text.splitlines()) if step]
+
+
+def _check_selector(selector):
+    if not selector:
+        raise ValueError("missing CSS selector")
+    if selector.count("[") != selector.count("]") or selector.count("(") != selector.count(")"):
+        raise ValueError(f"unbalanced brackets in selector {selector!r}")
+    if selector.count('"') % 2 or selector.count("'") % 2:
+        raise ValueError(f"unbalanced quotes in selector {selector!r}")
+    return selector
+
+
+# --- Per-verb argument compilers ---
+def _open(arg):
+    parsed = urlparse(arg)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"not an http(s) URL: {arg!r}")
+    return (arg,)
+
+
+def _type(arg):
+    match = TYPE_RE.match(arg)
+    if not match:
+        raise ValueError("expected <selector>-><text>")
+    selector, text = match.groups()
+    return (_check_selector(selector.strip()), text.strip())
+
+
+def _press(arg):
+    if not arg or not KEY_RE.match(arg):
+        raise ValueError(f"not a key name: {arg!r}")
+    return (arg,)
+
+
+def _click(arg):
+    return (_check_selector(arg),)
+
+
+def _wait_for(arg):
+    match = TIMEOUT_RE.match(arg)
+    if match:
+        selector, timeout_ms = match.groups()
+        return (_check_selector(selector.strip()), int(timeout_ms))
+    return (_check_selector(arg), None)
+
+
+def _fields(arg):
+    fields = []
+    for part in arg.split(","):
+        match = FIELD_RE.match(part)
+        if not match:
+            raise ValueError(f"expected name=<selector>[@attr], got {part.strip()!r}")
+        name, field = match.groups()
+        if not field.startswith("@"):
+            _check_selector(field.partition("@")[0])
+        fields.append((name, field))
+    return tuple(fields)
+
+
+def _extract_text(arg):
+    match = COUNT_RE.match(arg)
+    if match:
+        selector, count, fields = match.group(1).strip(), int(match.group(2)), match.group(3)
+    else:
+        selector, count, fields = arg, DEFAULT_EXTRACT_COUNT, None
+    if not 0 < count <= MAX_EXTRACT_COUNT:
+        raise ValueError(f"count must be between 1 and {MAX_EXTRACT_COUNT}")
+    return ((_check_selector(selector), count, _fields(fields) if fields else None),)
+
+
+def _screenshot(arg):
+    filename = os.path.basename(arg)
+    if not filename or filename.startswith("."):
+        raise ValueError(f"bad screenshot filename: {arg!r}")
+    if not filename.endswith(".png"):
+        filename += ".png"
+    return (filename,)
+
+
+COMPILERS = {
+    "open": _open,
+    "type": _type,
+    "press": _press,
+    "click": _click,
+    "wait_for": _wait_for,
+    "extract_text": _extract_text,
+    "screenshot": _screenshot,
+}
+
+
+def compile_step(line):
+    """Compile one plan line to an Action; None for non-action chatter, PlanError if it is a bad action"""
+    match = STEP_RE.match(line)
+    if not match:
+        unknown = UNKNOWN_STEP_RE.match(line)
+        if unknown:
+            raise PlanError([f"unknown action {unknown.group(1)!r} in {line.strip()!r}"])
+        return None
+    verb, argument = match.groups()
+    verb = verb.lower()
+    try:
+        args = COMPILERS[verb](argument.strip())
+    except ValueError as e:
+        raise PlanError([f"{verb}: {e}"])
+    return Action(verb, args, f"{verb}: {argument.strip()}")
+
+
+def merge_extractions(actions):
+    """Fold consecutive extract_text actions into one, so they run as a single batch in the page"""
+    merged = []
+    for action in actions:
+        if merged and action.verb == "extract_text" and merged[-1].verb == "extract_text":
+            previous = merged[-1]
+            merged[-1] = Action("extract_text", previous.args + action.args, f"{previous.line}; {action.line}")
+        else:
+            merged.append(action)
+    return merged
+
+
+@lru_cache(maxsize=512)
+def compile_plan(text):
+    """Compile and validate a whole plan once; the result is an immutable, reusable tuple of Actions.
+
+    Raises PlanError listing every bad step, so broken plans never reach the browser.
+    """
+    actions = []
+    errors = []
+    has_page = False
+    for number, line in enumerate(text.splitlines(), 1):
+        try:
+            action = compile_step(line)
+        except PlanError as e:
+            errors.extend(f"line {number}: {error}" for error in e.errors)
+            continue
+        if action is None:
+            continue
+        if action.verb in PAGE_VERBS and not has_page:
+            errors.append(f"line {number}: {action.verb} needs a page; open a URL first")
+        has_page = has_page or action.verb == "open"
+        actions.append(action)
+
+    if not actions and not errors:
+        errors.append("plan has no actions")
+    if errors:
+        raise PlanError(errors)
+    return tuple(merge_extractions(actions))
@@ -0,0 +1,104 @@
+# backend/app/agents/session.py
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from app.timing import StageTimings
+
+
+async def iterate(actions):
+    """Async iterator over an already compiled plan, for code that consumes streamed actions"""
+    for action in actions:
+        yield action
+
+
+class AgentSession:
+    """State of one agent run: its page, logs and extracted items; never shared between runs"""
+
+    def __init__(self, command=""):
+        self.id = uuid.uuid4().hex[:12]
+        self.command = command
+        self.created_at = time.time()
+        self.page = None
+        self.metrics = None
+        self.logs = []
+        self.extracted = []
+        self.timings = StageTimings()
+        # URL -> navigation task started ahead of its open: step
+        self.prefetched = {}
+        # URLs navigated to, in order; their sites' browser storage is saved when the run ends
+        self.visited = []
+        # Sites whose saved profile was already restored into this run's context
+        self.profile_sites = set()
+
+    def log(self, message):
+        self.logs.append(message)
+
+    def result(self):
+        return {
+            "session": self.id,
+            "logs": self.logs,
+            "extracted": self.extracted,
+            "metrics": self.metrics.to_dict() if self.metrics else {}
+        }
+
+
+class QueueFull(Exception):
+    """Every run slot is busy and the wait queue is full"""
+
+    def __init__(self, running, queued):
+        super().__init__(f"Agent is busy: {running} running, {queued} queued")
+        self.running = running
+        self.queued = queued
+
+
+class RunLimiter:
+    """Caps concurrent agent runs; extra runs wait in a bounded FIFO queue and the rest are rejected.
+
+    All bookkeeping happens on the serving event loop, so plain counters are safe.
+    """
+
+    def __init__(self, max_running=None, max_queued=None):
+        self.max_running = max_running or int(os.getenv("AGENT_MAX_CONCURRENCY", "4"))
+        self.max_queued = max_queued if max_queued is not None else int(os.getenv("AGENT_MAX_QUEUE", "16"))
+        self._semaphore = asyncio.Semaphore(self.max_running)
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def admit(self):
+        """Wait for a run slot; yields the queue position the run started at (0 = ran immediately)"""
+        position = 0
+        if self.running >= self.max_running or self.queued:
+            if self.queued >= self.max_queued:
+                self.rejected += 1
+                raise QueueFull(self.running, self.queued)
+            position = self.queued + 1
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        try:
+            yield position
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
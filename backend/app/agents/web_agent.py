@@ -1,76 +1,131 @@
 # backend/app/agents/web_agent.py
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
-import asyncio
-import re
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 import os
 
+from app.browser_pool import get_pool
+from app.browser_storage import asset_cache, browser_profiles, site_of
+from app.agents.plan_compiler import compile_plan
+from app.agents.session import AgentSession, iterate
+from app.extraction import extract_batch, record_spec, text_spec
+from app.render_policy import prepare_page, render_policy, wait_until_ready
+
+SCREENSHOT_DIR = os.getenv("SCREENSHOT_DIR", "screenshots")
+# Agent runs act for whoever sent the command, so they only share browser profiles when this is on
+AGENT_PROFILES = os.getenv("AGENT_PROFILES", "false").lower() == "true"
+
 class WebAgent:
+    """Stateless executor: everything a run produces lives on its AgentSession, so runs can overlap"""
+
     def __init__(self):
-        self.extracted_results = []
-        self.logs = []
+        # Dispatch table from compiled verb to handler
+        self.handlers = {
+            "open": self._open,
+            "type": self._type,
+            "press": self._press,
+            "click": self._click,
+            "wait_for": self._wait_for,
+            "extract_text": self._extract_text,
+            "screenshot": self._screenshot,
+        }
 
     async def run_plan(self, plan: str, timeout=120):
-        self.extracted_results = []
-        self.logs = []
-
-        steps = [line.strip() for line in plan.splitlines() if line.strip()]
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            for step in steps:
-                try:
-                    if step.startswith("open:"):
-                        url = step[len("open:"):].strip()
-                        self.logs.append(f"Opening URL: {url}")
-                        await page.goto(url, timeout=timeout * 1000)
-
-                    elif step.startswith("type:"):
-                        match = re.match(r"type:\s*(.+?)->\"?(.*)\"?", step)
-                        if match:
-                            selector, text = match.groups()
-                            self.logs.append(f"Typing '{text}' into {selector}")
-                            await page.fill(selector.strip(), text.strip())
-
-                    elif step.startswith("press:"):
-                        key = step[len("press:"):].strip()
-                        self.logs.append(f"Pressing key: {key}")
-                        await page.keyboard.press(key)
-
-                    elif step.startswith("click:"):
-                        selector = step[len("click:"):].strip()
-                        self.logs.append(f"Clicking on {selector}")
-                        await page.click(selector, timeout=timeout * 1000)
-
-                    elif step.startswith("extract_text:"):
-                        match = re.match(r"extract_text:\s*(.+?)->(\d+)", step)
-                        if match:
-                            selector, count = match.groups()
-                            count = int(count)
-                            elements = await page.query_selector_all(selector.strip())
-                            for el in elements[:count]:
-                                text = await el.inner_text()
-                                self.extracted_results.append(text.strip())
-                            self.logs.append(f"Extracted {len(self.extracted_results)} items from {selector}")
-
-                    elif step.startswith("screenshot:"):
-                        filename = step[len("screenshot:"):].strip()
-                        if not filename.endswith(".png"):
-                            filename += ".png"
-                        os.makedirs("screenshots", exist_ok=True)
-                        path = os.path.join("screenshots", filename)
-                        await page.screenshot(path=path)
-                        self.logs.append(f"Screenshot saved to {path}")
-
-                    else:
-                        self.logs.append(f"Unknown action: {step}")
-
-                except PlaywrightTimeout:
-                    self.logs.append(f"Timeout on step: {step}")
-                except Exception as e:
-                    self.logs.append(f"Error on step '{step}': {e}")
-
-            await browser.close()
-
-        return {"logs": self.logs, "extracted": self.extracted_results}
+        # Compiled (and validated) before any browser work; raises PlanError for a broken plan
+        actions = compile_plan(plan)
+        # Playwright objects live on the pool's loop, so the plan runs there too
+        return await get_pool().call(self._run_plan, actions, timeout)
+
+    async def _run_plan(self, actions, timeout=120):
+        session = AgentSession()
+        async with get_pool().context() as context:
+            await self.open_session(session, context)
+            return await self.execute(session, iterate(actions), timeout)
+
+    async def open_session(self, session, context):
+        """Give the session a fresh page in its own isolated context, with the render policy installed"""
+        session.page = await context.new_page()
+        session.metrics = await prepare_page(session.page, render_policy, assets=asset_cache)
+        return session
+
+    async def navigate(self, session, url, timeout=120):
+        # Saved cookies/localStorage for the site, so logins and consent choices carry over;
+        # once per site, as the context keeps them (and its init scripts) for the rest of the run
+        site = site_of(url)
+        if AGENT_PROFILES and site not in session.profile_sites:
+            session.profile_sites.add(site)
+            await browser_profiles.restore(session.page.context, url)
+        session.visited.append(url)
+        session.metrics.mark_navigation()
+        await session.page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+        await wait_until_ready(session.page, render_policy, session.metrics)
+
+    async def execute(self, session, actions, timeout=120):
+        """Run compiled Actions from an async iterator on the pool loop, each as soon as it arrives.
+
+        session.prefetched maps URLs to navigations the caller already started; the matching
+        open waits for that instead of navigating again.
+        """
+        async for action in actions:
+            try:
+                await self.handlers[action.verb](session, *action.args, timeout=timeout)
+            except PlaywrightTimeout:
+                session.log(f"Timeout on step: {action.line}")
+            except Exception as e:
+                session.log(f"Error on step '{action.line}': {e}")
+
+        for task in session.prefetched.values():
+            # The plan never reached this URL; don't leave the navigation running
+            task.cancel()
+
+        # Keep whatever the run left in the visited sites' storage (e.g. a login) for the next run
+        if AGENT_PROFILES:
+            for url in {site_of(url): url for url in session.visited}.values():
+                await browser_profiles.save(session.page.context, url, force=True)
+
+        return session.result()
+
+    # --- Action handlers ---
+    async def _open(self, session, url, timeout):
+        session.log(f"Opening URL: {url}")
+        with session.timings.stage("navigation"):
+            task = session.prefetched.pop(url, None)
+            if task is not None:
+                await task
+            else:
+                await self.navigate(session, url, timeout)
+        session.log(f"Page ready in {session.metrics.load_ms} ms ({session.metrics.ready})")
+
+    async def _type(self, session, selector, text, timeout):
+        session.log(f"Typing '{text}' into {selector}")
+        await session.page.fill(selector, text, timeout=timeout * 1000)
+
+    async def _press(self, session, key, timeout):
+        session.log(f"Pressing key: {key}")
+        await session.page.keyboard.press(key)
+
+    async def _click(self, session, selector, timeout):
+        session.log(f"Clicking on {selector}")
+        await session.page.click(selector, timeout=timeout * 1000)
+
+    async def _wait_for(self, session, selector, timeout_ms, timeout):
+        session.log(f"Waiting for {selector}")
+        await session.page.wait_for_selector(selector, timeout=timeout_ms or timeout * 1000)
+
+    async def _extract_text(self, session, *targets, timeout):
+        specs = [
+            record_spec(selector, dict(fields), count) if fields else text_spec(selector, count)
+            for selector, count, fields in targets
+        ]
+        # Every selector of a merged batch is read in one in-page script
+        with session.timings.stage("extraction"):
+            batches = await extract_batch(session.page, specs)
+        for (selector, _, _), items in zip(targets, batches):
+            items = [item for item in items if item]
+            session.extracted.extend(items)
+            session.log(f"Extracted {len(items)} items from {selector}")
+
+    async def _screenshot(self, session, filename, timeout):
+        # Prefixed with the session id so concurrent runs never overwrite each other
+        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+        path = os.path.join(SCREENSHOT_DIR, f"{session.id}_{filename}")
+        await session.page.screenshot(path=path)
+        session.log(f"Screenshot saved to {path}")
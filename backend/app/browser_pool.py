@@ -0,0 +1,294 @@
+# backend/app/browser_pool.py
+import asyncio
+import atexit
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import psutil
+from playwright.async_api import async_playwright
+
+from app.timing import timed
+
+BROWSER_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']
+
+
+class BrowserSlot:
+    """One warm Chromium instance plus the bookkeeping used to recycle it"""
+
+    def __init__(self, index):
+        self.index = index
+        self.browser = None
+        self.pids = set()
+        self.launched_at = 0.0
+        self.pages_served = 0
+        self.active = 0
+        self.retiring = False
+        self.lock = asyncio.Lock()
+
+    def healthy(self):
+        return self.browser is not None and self.browser.is_connected()
+
+    def rss_mb(self):
+        """Resident memory of the browser process tree in MB"""
+        total = 0
+        for pid in list(self.pids):
+            try:
+                proc = psutil.Process(pid)
+                total += proc.memory_info().rss
+                for child in proc.children(recursive=True):
+                    total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """Long-lived pool of warm Chromium browsers handing out fresh contexts.
+
+    Playwright objects are bound to the event loop that created them, so the
+    pool owns a dedicated loop thread. Async code running on that loop uses
+    `context()` directly; everything else goes through `run()` (blocking) or
+    `call()` (awaitable from any other loop).
+    """
+
+    def __init__(self, size=None, max_pages=None, max_rss_mb=None,
+                 contexts_per_browser=None, health_interval=30):
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", "2"))
+        self.max_pages = max_pages or int(os.getenv("BROWSER_MAX_PAGES", "100"))
+        self.max_rss_mb = max_rss_mb or int(os.getenv("BROWSER_MAX_RSS_MB", "1024"))
+        self.contexts_per_browser = contexts_per_browser or int(os.getenv("BROWSER_CONTEXTS_PER_BROWSER", "4"))
+        self.health_interval = health_interval
+        # _acquire would wait forever on a pool with no browser contexts
+        if self.size < 1 or self.contexts_per_browser < 1:
+            raise ValueError("BROWSER_POOL_SIZE and BROWSER_CONTEXTS_PER_BROWSER must be at least 1")
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._slots = []
+        self._available = None
+        self._launch_lock = None
+        self._health_task = None
+        self._launches = 0
+        self._recycles = 0
+
+    # --- Loop thread management ---
+    def start(self):
+        """Start the pool loop and Playwright driver; browsers warm up in the background"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="browser-pool", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        self._available = asyncio.Condition()
+        self._launch_lock = asyncio.Lock()
+        self._slots = [BrowserSlot(i) for i in range(self.size)]
+        for slot in self._slots:
+            asyncio.create_task(self._warm(slot))
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    def submit(self, coro_fn, *args, **kwargs):
+        """Schedule coro_fn on the pool loop and return a concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro_fn(*args, **kwargs), self._loop)
+
+    def run(self, coro_fn, *args, timeout=None, **kwargs):
+        """Run coro_fn on the pool loop and block until it finishes"""
+        return self.submit(coro_fn, *args, **kwargs).result(timeout)
+
+    async def call(self, coro_fn, *args, **kwargs):
+        """Await coro_fn on the pool loop from any event loop"""
+        self.start()
+        if asyncio.get_running_loop() is self._loop:
+            return await coro_fn(*args, **kwargs)
+        return await asyncio.wrap_future(self.submit(coro_fn, *args, **kwargs))
+
+    # --- Browser lifecycle ---
+    async def _warm(self, slot):
+        try:
+            async with slot.lock:
+                await self._ensure_browser(slot)
+        except Exception as e:
+            print(f"Browser warm-up failed for slot {slot.index}: {e}")
+
+    async def _ensure_browser(self, slot):
+        """Launch (or relaunch) the slot's browser; caller holds slot.lock"""
+        if slot.healthy():
+            return
+        await self._close_browser(slot)
+        async with self._launch_lock:
+            # Launches are serialised so new child processes can be attributed to this slot
+            me = psutil.Process()
+            before = {p.pid for p in me.children(recursive=True)}
+            with timed("browser_launch"):
+                browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            spawned = {p.pid: p for p in me.children(recursive=True) if p.pid not in before}
+        slot.pids = set()
+        for pid, proc in spawned.items():
+            try:
+                if proc.ppid() not in spawned:
+                    slot.pids.add(pid)
+            except psutil.Error:
+                continue
+        slot.browser = browser
+        slot.launched_at = time.time()
+        slot.pages_served = 0
+        slot.retiring = False
+        self._launches += 1
+
+    async def _close_browser(self, slot):
+        browser, slot.browser = slot.browser, None
+        slot.pids = set()
+        if browser is None:
+            return
+        try:
+            await browser.close()
+        except Exception as e:
+            print(f"Browser close error for slot {slot.index}: {e}")
+
+    async def _recycle(self, slot):
+        async with slot.lock:
+            if slot.active:
+                return
+            print(f"Recycling browser slot {slot.index} after {slot.pages_served} pages")
+            await self._close_browser(slot)
+            self._recycles += 1
+            try:
+                await self._ensure_browser(slot)
+            except Exception as e:
+                print(f"Browser relaunch failed for slot {slot.index}: {e}")
+                slot.retiring = False
+
+    def _worn_out(self, slot):
+        return slot.pages_served >= self.max_pages
+
+    def _needs_recycle(self, slot):
+        # rss_mb walks the browser's process tree, so only the health loop checks it
+        return self._worn_out(slot) or slot.rss_mb() > self.max_rss_mb
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for slot in self._slots:
+                try:
+                    if slot.browser is not None and not slot.browser.is_connected():
+                        print(f"Browser slot {slot.index} disconnected")
+                        slot.retiring = True
+                    elif slot.browser is not None and self._needs_recycle(slot):
+                        slot.retiring = True
+                    if slot.retiring and not slot.active:
+                        await self._recycle(slot)
+                except Exception as e:
+                    print(f"Browser health check error for slot {slot.index}: {e}")
+            async with self._available:
+                self._available.notify_all()
+
+    # --- Context checkout ---
+    async def _acquire(self):
+        async with self._available:
+            while True:
+                candidates = [
+                    s for s in self._slots
+                    if not s.retiring and s.active < self.contexts_per_browser
+                ]
+                if candidates:
+                    slot = min(candidates, key=lambda s: s.active)
+                    slot.active += 1
+                    return slot
+                await self._available.wait()
+
+    async def _release(self, slot):
+        async with self._available:
+            slot.active -= 1
+            if not slot.retiring and self._worn_out(slot):
+                slot.retiring = True
+        if slot.retiring and not slot.active:
+            await self._recycle(slot)
+        async with self._available:
+            self._available.notify_all()
+
+    @asynccontextmanager
+    async def context(self, **kwargs):
+        """Borrow a fresh BrowserContext from a warm browser; must run on the pool loop"""
+        slot = await self._acquire()
+        context = None
+        try:
+            async with slot.lock:
+                await self._ensure_browser(slot)
+            slot.pages_served += 1
+            context = await slot.browser.new_context(**kwargs)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._release(slot)
+
+    # --- Shutdown & stats ---
+    def shutdown(self, timeout=15):
+        """Close all browsers and stop the pool loop"""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+            except Exception as e:
+                print(f"Browser pool shutdown error: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def _shutdown(self):
+        if self._health_task:
+            self._health_task.cancel()
+        for slot in self._slots:
+            await self._close_browser(slot)
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "launches": self._launches,
+            "recycles": self._recycles,
+            "slots": [
+                {
+                    "index": s.index,
+                    "connected": s.healthy(),
+                    "active_contexts": s.active,
+                    "pages_served": s.pages_served,
+                    "rss_mb": round(s.rss_mb(), 1),
+                    "uptime": round(time.time() - s.launched_at, 1) if s.browser else 0,
+                }
+                for s in self._slots
+            ],
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide browser pool, created lazily and closed at interpreter exit"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
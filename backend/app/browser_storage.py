@@ -0,0 +1,453 @@
+# backend/app/browser_storage.py
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# Response headers that describe the transfer, not the content; bodies are stored decoded
+DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "set-cookie", "date", "age"}
+MAX_AGE_RE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)")
+SITE_RE = re.compile(r"^[a-z0-9.-]+$")
+# Hits re-stamp a metadata file's mtime (the last access other processes see) at most this often
+ACCESS_RESOLUTION = 60
+
+
+def _atomic_write(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with open(tmp, mode) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class AssetCache:
+    """Shared on-disk HTTP cache for static subresources (scripts, stylesheets, images, fonts).
+
+    Browser contexts from the pool are incognito-style and start with an empty
+    cache, so the page route handler serves cacheable GETs from here and stores
+    fresh responses for every later context, browser and process. Freshness
+    follows the response's max-age (capped at max_age), with `ttl` as the
+    default when there is none; no-store, no-cache, private and Set-Cookie
+    responses are never stored.
+
+    The in-memory index is this process's view of the directory: keys it lacks
+    are looked up on disk, where other web workers and render shards may have
+    stored them, and sweep() rescans the directory so the LRU size bound holds
+    for everything on disk, not just this process's writes. A metadata file's
+    mtime is its entry's last access.
+    """
+
+    def __init__(self, cache_dir=None, max_mb=None, max_item_kb=None, ttl=None, max_age=None, resource_types=None):
+        self.cache_dir = cache_dir or os.getenv("ASSET_CACHE_DIR", "cache/assets")
+        self.max_bytes = (max_mb if max_mb is not None else float(os.getenv("ASSET_CACHE_MAX_MB", "256"))) * 1024 * 1024
+        self.max_item_bytes = (max_item_kb or int(os.getenv("ASSET_CACHE_MAX_ITEM_KB", "2048"))) * 1024
+        self.ttl = ttl or float(os.getenv("ASSET_CACHE_TTL", "86400"))
+        self.max_age = max_age or float(os.getenv("ASSET_CACHE_MAX_AGE", str(7 * 86400)))
+        self.resource_types = set(resource_types or os.getenv("ASSET_CACHE_TYPES", "script,stylesheet,image,font").split(","))
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    # --- Paths & index ---
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.body"
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+    def _read_entry(self, key):
+        """Entry from its metadata file, last access from the file's mtime; None if missing or unreadable"""
+        meta_path = self._paths(key)[0]
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["last_access"] = os.path.getmtime(meta_path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def _add(self, entry):
+        """Index an entry as the most recently used; caller holds the lock"""
+        previous = self._index.pop(entry["key"], None)
+        if previous is not None:
+            self._bytes -= previous["size"]
+        self._index[entry["key"]] = entry
+        self._bytes += entry["size"]
+
+    def _load_index(self):
+        """(Re)build the index from the directory, oldest access first; known entries only get a stat"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".json"):
+                continue
+            key = filename[:-5]
+            entry = self._index.get(key)
+            if entry is not None:
+                try:
+                    entry["last_access"] = os.path.getmtime(self._paths(key)[0])
+                except OSError:
+                    continue
+            else:
+                entry = self._read_entry(key)
+                if entry is None:
+                    continue
+            entries.append(entry)
+        self._index = OrderedDict()
+        self._bytes = 0
+        for entry in sorted(entries, key=lambda e: e["last_access"]):
+            self._add(entry)
+
+    def _drop(self, key):
+        """Remove an entry and its files; caller holds the lock"""
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+            _remove(*self._paths(key))
+
+    # --- Storage ---
+    def get(self, url):
+        """(status, headers, body) of a fresh cached response, or None"""
+        key = self.key(url)
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                # Possibly stored by another process since the index was built
+                entry = self._read_entry(key)
+                if entry is not None:
+                    self._add(entry)
+            if entry is None or entry["url"] != url:
+                self.misses += 1
+                return None
+            if now > entry["expires"]:
+                self._drop(key)
+                self.misses += 1
+                return None
+            if now - entry["last_access"] > ACCESS_RESOLUTION:
+                entry["last_access"] = now
+                try:
+                    os.utime(self._paths(key)[0], (now, now))
+                except OSError:
+                    pass
+            self._index.move_to_end(key)
+        try:
+            with open(self._paths(key)[1], "rb") as f:
+                body = f.read()
+        except OSError:
+            # Evicted by another process sharing the directory
+            with self._lock:
+                entry = self._index.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry["size"]
+                self.misses += 1
+            return None
+        self.hits += 1
+        return entry["status"], entry["headers"], body
+
+    def freshness(self, headers):
+        """Seconds a response may be reused, or 0 when it must not be stored"""
+        cache_control = headers.get("cache-control", "").lower()
+        if any(d in cache_control for d in ("no-store", "no-cache", "private")) or "set-cookie" in headers:
+            return 0
+        match = MAX_AGE_RE.search(cache_control)
+        lifetime = int(match.group(1)) if match else self.ttl
+        return min(lifetime, self.max_age)
+
+    def put(self, url, status, headers, body):
+        headers = {k.lower(): v for k, v in headers.items()}
+        lifetime = self.freshness(headers)
+        if status != 200 or lifetime <= 0 or len(body) > self.max_item_bytes:
+            return False
+        key = self.key(url)
+        now = time.time()
+        entry = {
+            "key": key,
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k not in DROP_HEADERS},
+            "size": len(body),
+            "expires": now + lifetime,
+            "last_access": now
+        }
+        meta_path, body_path = self._paths(key)
+        try:
+            _atomic_write(body_path, body)
+            _atomic_write(meta_path, json.dumps(entry))
+        except OSError as e:
+            print(f"Asset cache write error for {url}: {e}")
+            return False
+        with self._lock:
+            self._add(entry)
+            self._evict()
+        self.stored += 1
+        return True
+
+    def _evict(self):
+        """Drop least recently used entries until under the size bound; caller holds the lock"""
+        removed = 0
+        while self._bytes > self.max_bytes and self._index:
+            self._drop(next(iter(self._index)))
+            removed += 1
+        return removed
+
+    def sweep(self):
+        """Rescan the shared directory, then drop expired entries and enforce the size bound on all of it"""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        with self._lock:
+            self._load_index()
+            expired = [key for key, entry in self._index.items() if now > entry["expires"]]
+            for key in expired:
+                self._drop(key)
+            return len(expired) + self._evict()
+
+    # --- Route integration ---
+    def cacheable(self, request):
+        return (
+            self.enabled
+            and request.method == "GET"
+            and request.resource_type in self.resource_types
+            and request.url.startswith(("http://", "https://"))
+            and "range" not in request.headers
+        )
+
+    async def handle(self, route):
+        """Serve a cacheable request from disk, or fetch it once and keep the response for later contexts"""
+        url = route.request.url
+        cached = await asyncio.to_thread(self.get, url)
+        if cached is not None:
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.continue_()
+            return
+        if response.status == 200:
+            await asyncio.to_thread(self.put, url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stored": self.stored
+            }
+
+
+# Restores a profile's localStorage for the matching origin, without overwriting what the page set itself
+RESTORE_LOCAL_STORAGE_SCRIPT = """
+(origins => {
+    try {
+        const saved = origins.find(o => o.origin === location.origin);
+        if (!saved) return;
+        for (const { name, value } of saved.localStorage) {
+            if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+        }
+    } catch (e) {}
+})(%s)
+"""
+
+
+def site_of(url):
+    """Profile key of a URL: its host without a leading www."""
+    return (urlparse(url).hostname or "").lower().removeprefix("www.")
+
+
+def _on_site(host, site):
+    host = (host or "").lower().lstrip(".").removeprefix("www.")
+    return host == site or host.endswith("." + site) or site.endswith("." + host)
+
+
+class ProfileStore:
+    """Per-site browser storage (cookies and localStorage) persisted between visits.
+
+    After a successful load the context's storage_state, filtered to the
+    site's own cookies and origins, is saved as <site>.json; the next context
+    that visits the site gets it back before navigating, so consent choices
+    and logins carry over. Profiles older than max_age are ignored and
+    deleted, oversized ones are not saved, and at most max_profiles are kept
+    (least recently used go first). Sites missing from the in-memory index are
+    looked up on disk, where other processes may have saved them, and sweep()
+    rescans the directory so the count bound covers every process's profiles.
+    Profiles hold session cookies, so keep PROFILE_DIR private. The store is shared by everyone using the server:
+    /execute renders are anonymous, and agent runs only use it when
+    AGENT_PROFILES is on.
+    """
+
+    def __init__(self, profile_dir=None, max_profiles=None, max_kb=None, max_age=None, refresh=None):
+        self.profile_dir = profile_dir or os.getenv("PROFILE_DIR", "cache/profiles")
+        self.max_profiles = max_profiles if max_profiles is not None else int(os.getenv("PROFILE_MAX_COUNT", "500"))
+        self.max_bytes = (max_kb or int(os.getenv("PROFILE_MAX_KB", "256"))) * 1024
+        self.max_age = max_age or float(os.getenv("PROFILE_MAX_AGE", str(7 * 86400)))
+        # A profile younger than this is not rewritten after every visit
+        self.refresh = refresh if refresh is not None else float(os.getenv("PROFILE_REFRESH", "600"))
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self.restored = 0
+        self.saved = 0
+        if self.enabled:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self):
+        return self.max_profiles > 0
+
+    def _path(self, site):
+        return os.path.join(self.profile_dir, f"{site}.json")
+
+    def _load_index(self):
+        """(Re)build the index from the directory, oldest save first"""
+        profiles = []
+        for filename in os.listdir(self.profile_dir):
+            if filename.endswith(".json"):
+                try:
+                    profiles.append((os.path.getmtime(os.path.join(self.profile_dir, filename)), filename[:-5]))
+                except OSError:
+                    continue
+        self._index = OrderedDict((site, saved_at) for saved_at, site in sorted(profiles))
+
+    def _drop(self, site):
+        """Forget a profile and delete its file; caller holds the lock"""
+        self._index.pop(site, None)
+        _remove(self._path(site))
+
+    def load(self, site):
+        """Saved storage state for a site, or None if missing or expired"""
+        with self._lock:
+            saved_at = self._index.get(site)
+            if saved_at is None:
+                # Possibly saved by another process since the index was built
+                try:
+                    saved_at = self._index[site] = os.path.getmtime(self._path(site))
+                except OSError:
+                    return None
+            if time.time() - saved_at > self.max_age:
+                self._drop(site)
+                return None
+            self._index.move_to_end(site)
+        try:
+            with open(self._path(site), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, site, state):
+        data = json.dumps(state)
+        if len(data) > self.max_bytes:
+            return False
+        try:
+            _atomic_write(self._path(site), data)
+        except OSError as e:
+            print(f"Profile write error for {site}: {e}")
+            return False
+        with self._lock:
+            self._index[site] = time.time()
+            self._index.move_to_end(site)
+            self._evict()
+        self.saved += 1
+        return True
+
+    def _evict(self):
+        """Drop least recently used profiles beyond max_profiles; caller holds the lock"""
+        removed = 0
+        while len(self._index) > self.max_profiles:
+            self._drop(next(iter(self._index)))
+            removed += 1
+        return removed
+
+    def sweep(self):
+        """Rescan the shared directory, then delete expired profiles and any beyond max_profiles"""
+        if not self.enabled:
+            return 0
+        now = time.time()
+        with self._lock:
+            self._load_index()
+            expired = [site for site, saved_at in self._index.items() if now - saved_at > self.max_age]
+            for site in expired:
+                self._drop(site)
+            return len(expired) + self._evict()
+
+    # --- Browser context integration ---
+    async def restore(self, context, url):
+        """Load the site's saved cookies and localStorage into a context before it navigates there"""
+        site = site_of(url)
+        if not self.enabled or not SITE_RE.match(site):
+            return False
+        state = await asyncio.to_thread(self.load, site)
+        if not state:
+            return False
+        try:
+            if state.get("cookies"):
+                await context.add_cookies(state["cookies"])
+            if state.get("origins"):
+                await context.add_init_script(script=RESTORE_LOCAL_STORAGE_SCRIPT % json.dumps(state["origins"]))
+        except Exception as e:
+            print(f"Profile restore error for {site}: {e}")
+            return False
+        self.restored += 1
+        return True
+
+    async def save(self, context, url, force=False):
+        """Snapshot the site's part of the context's storage_state, unless a recent snapshot exists"""
+        site = site_of(url)
+        if not self.enabled or not SITE_RE.match(site):
+            return False
+        with self._lock:
+            saved_at = self._index.get(site)
+        if not force and saved_at is not None and time.time() - saved_at < self.refresh:
+            return False
+        try:
+            state = await context.storage_state()
+        except Exception as e:
+            print(f"Profile snapshot error for {site}: {e}")
+            return False
+        now = time.time()
+        cookies = [
+            c for c in state.get("cookies", [])
+            if _on_site(c.get("domain"), site) and (c.get("expires", -1) == -1 or c["expires"] > now)
+        ]
+        origins = [o for o in state.get("origins", []) if _on_site(urlparse(o["origin"]).hostname, site)]
+        if not cookies and not origins:
+            return False
+        return await asyncio.to_thread(self.store, site, {"cookies": cookies, "origins": origins})
+
+    def stats(self):
+        with self._lock:
+            return {"profiles": len(self._index), "restored": self.restored, "saved": self.saved}
+
+
+asset_cache = AssetCache()
+browser_profiles = ProfileStore()
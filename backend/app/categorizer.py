@@ -0,0 +1,213 @@
+# backend/app/categorizer.py
+import bisect
+import json
+import os
+import re
+from urllib.parse import urlparse
+
+# Categories in priority order (ties go to the earlier one). Each maps terms to weights per field:
+#   title  - words or phrases in the result title
+#   url    - words in the URL path and query
+#   host   - text anywhere in the host name, so "news" matches news.example.com and foonews.com
+#   domain - the host or any parent domain of it
+DEFAULT_TAXONOMY = {
+    "gaming": {
+        "title": {
+            "game": 2, "games": 2, "gaming": 2, "gamer": 2, "esports": 2, "steam": 2, "xbox": 2,
+            "playstation": 2, "ps5": 2, "nintendo": 2, "walkthrough": 1, "speedrun": 1
+        },
+        "url": {"games": 1, "gaming": 1},
+        "domain": {
+            "steampowered.com": 3, "ign.com": 3, "gamespot.com": 3, "kotaku.com": 3, "pcgamer.com": 3,
+            "polygon.com": 2, "eurogamer.net": 3, "nintendo.com": 3, "xbox.com": 3, "playstation.com": 3
+        }
+    },
+    "tech": {
+        "title": {
+            "tech": 2, "technology": 2, "software": 2, "hardware": 2, "computer": 2, "computers": 2,
+            "laptop": 2, "laptops": 2, "mobile": 1, "smartphone": 2, "ai": 2, "artificial intelligence": 2,
+            "machine learning": 2, "programming": 2, "developer": 1, "python": 2, "javascript": 2,
+            "tutorial": 1, "gpu": 2, "cpu": 2, "cloud": 1
+        },
+        "url": {"tech": 1, "technology": 1, "docs": 1},
+        "domain": {
+            "github.com": 3, "stackoverflow.com": 3, "techcrunch.com": 3, "theverge.com": 3,
+            "arstechnica.com": 3, "wired.com": 2, "python.org": 3, "developer.mozilla.org": 3, "realpython.com": 3
+        }
+    },
+    "business": {
+        "title": {
+            "business": 2, "finance": 2, "financial": 2, "market": 2, "markets": 2, "company": 1,
+            "corporate": 2, "startup": 2, "investment": 2, "investing": 2, "stocks": 2, "economy": 2
+        },
+        "url": {"business": 1, "finance": 1, "markets": 1},
+        "domain": {
+            "bloomberg.com": 3, "wsj.com": 3, "forbes.com": 3, "ft.com": 3, "cnbc.com": 3,
+            "economist.com": 3, "investopedia.com": 3
+        }
+    },
+    "news": {
+        "title": {"breaking news": 2, "live updates": 2},
+        "url": {"news": 2},
+        "host": {"news": 2, "bbc": 2, "cnn": 2, "reuters": 2, "times": 2},
+        "domain": {
+            "bbc.com": 3, "bbc.co.uk": 3, "cnn.com": 3, "reuters.com": 3, "nytimes.com": 3,
+            "theguardian.com": 3, "apnews.com": 3, "indiatimes.com": 3, "hindustantimes.com": 3
+        }
+    }
+}
+
+FIELDS = ("title", "url", "host")
+MIN_SCORE = float(os.getenv("CATEGORY_MIN_SCORE", "1"))
+
+
+def _normalize_term(term):
+    return " ".join(term.lower().split())
+
+
+def trie_pattern(terms):
+    """Regex alternation of terms factored into a prefix trie, so matching cost grows with term length, not count"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node):
+        alternatives = [
+            (r"\s+" if ch == " " else re.escape(ch)) + emit(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and "" not in node:
+            return alternatives[0]
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if "" in node else group
+
+    return emit(trie)
+
+
+def _url_text(parsed):
+    """Lowercase path and query words of a URL; '_' splits words too"""
+    return f"{parsed.path} {parsed.query}".lower().replace("_", " ")
+
+
+def _host(parsed):
+    return (parsed.hostname or "").lower().removeprefix("www.")
+
+
+def _domains(host):
+    """The host and each of its parent domains: a.b.com, b.com, com"""
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels)) if labels[i]]
+
+
+class Categorizer:
+    """Weighted, whole-word categorization of search results from a taxonomy.
+
+    Title and URL terms are each compiled into one trie-factored word-boundary
+    regex that runs once over that field of every result in a batch; host terms
+    the same way but matching inside words, and domains by host suffix lookups. A term scores once per field. The category with the
+    highest total wins, ties go to the earlier category, and results scoring
+    below MIN_SCORE are "general".
+    """
+
+    def __init__(self, taxonomy=None, min_score=MIN_SCORE, default="general"):
+        self.taxonomy = taxonomy or DEFAULT_TAXONOMY
+        self.categories = list(self.taxonomy)
+        self.min_score = min_score
+        self.default = default
+        # (field, term) -> [(category index, weight)]
+        self._terms = {}
+        self._domains = {}
+        for index, category in enumerate(self.categories):
+            rules = self.taxonomy[category]
+            for field in FIELDS:
+                for term, weight in rules.get(field, {}).items():
+                    self._terms.setdefault((field, _normalize_term(term)), []).append((index, weight))
+            for domain, weight in rules.get("domain", {}).items():
+                self._domains.setdefault(domain.lower().removeprefix("www."), []).append((index, weight))
+        self._patterns = {}
+        for field in FIELDS:
+            terms = {term for f, term in self._terms if f == field}
+            if terms:
+                boundary = "" if field == "host" else r"\b"
+                self._patterns[field] = re.compile(boundary + trie_pattern(terms) + boundary)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def _texts(self, item):
+        parsed = urlparse(item.get("link") or "")
+        host = _host(parsed)
+        return (item.get("title") or "").lower(), _url_text(parsed), host, _domains(host)
+
+    def _scores(self, field_terms, domains):
+        scores = [0] * len(self.categories)
+        for field, terms in zip(FIELDS, field_terms):
+            for term in terms:
+                for index, weight in self._terms.get((field, term), ()):
+                    scores[index] += weight
+        for domain in domains:
+            for index, weight in self._domains.get(domain, ()):
+                scores[index] += weight
+        return scores
+
+    def _field_terms(self, field, values):
+        """Matched terms per value, from one regex pass over all values joined into a single document"""
+        matched = [set() for _ in values]
+        pattern = self._patterns.get(field)
+        if pattern is None:
+            return matched
+        starts, offset = [], 0
+        for value in values:
+            starts.append(offset)
+            offset += len(value) + 1
+        # NUL is a word boundary that multi-word terms (\s+) cannot span
+        for match in pattern.finditer("\0".join(values)):
+            i = bisect.bisect_right(starts, match.start()) - 1
+            matched[i].add(" ".join(match.group().split()))
+        return matched
+
+    def _match(self, texts):
+        """Scores for each (title, url_text, host, domains): one regex pass per field over all results"""
+        matched = zip(*(
+            self._field_terms(field, [text[i] for text in texts]) for i, field in enumerate(FIELDS)
+        ))
+        return [self._scores(field_terms, text[-1]) for field_terms, text in zip(matched, texts)]
+
+    def _pick(self, scores):
+        best = max(range(len(scores)), key=lambda i: (scores[i], -i), default=None)
+        if best is None or scores[best] < self.min_score:
+            return self.default
+        return self.categories[best]
+
+    def scores(self, title, url):
+        """Score per category for one result"""
+        scores, = self._match([self._texts({"title": title, "link": url})])
+        return dict(zip(self.categories, scores))
+
+    def categorize(self, title, url):
+        return self.categorize_many([{"title": title, "link": url}])[0]
+
+    def categorize_many(self, items):
+        """Categories for a list of {"title", "link"} results, matched in one pass over all of them"""
+        return [self._pick(scores) for scores in self._match([self._texts(item) for item in items])]
+
+
+def load_categorizer():
+    """Categorizer for CATEGORY_TAXONOMY (a JSON file in the DEFAULT_TAXONOMY shape), or the built-in taxonomy"""
+    path = os.getenv("CATEGORY_TAXONOMY")
+    if path:
+        try:
+            return Categorizer.from_file(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not load taxonomy {path}, using the default: {e}")
+    return Categorizer()
+
+
+categorizer = load_categorizer()
@@ -0,0 +1,94 @@
+# backend/app/extraction.py
+
+# Main-content containers, most specific first; body is the fallback
+CONTENT_SELECTORS = [
+    "main", "article", ".main-content", ".content",
+    "#main", "#content", ".post-content", ".entry-content"
+]
+
+MAX_CONTENT_LINES = 15
+MAX_CONTENT_CHARS = 500
+# Full text kept per page for the page index
+MAX_TEXT_CHARS = 20000
+
+
+def clean_content_text(content_text):
+    """Keep the first meaningful lines of extracted text, truncated for the result card"""
+    lines = [line.strip() for line in content_text.split('\n') if line.strip()]
+    clean_lines = [line for line in lines if len(line) > 10]  # Remove very short lines
+    content_text = ' '.join(clean_lines[:MAX_CONTENT_LINES])
+
+    if len(content_text) > MAX_CONTENT_CHARS:
+        content_text = content_text[:MAX_CONTENT_CHARS] + "..."
+    return content_text
+
+
+def full_text(content_text):
+    """All of the extracted text, whitespace-collapsed and capped, for search over the page"""
+    return " ".join(content_text.split())[:MAX_TEXT_CHARS]
+
+
+# --- Batched in-page extraction ---
+# Evaluates every spec in one round-trip. Spec kinds:
+#   {"selectors": [...], "first": true}       text of the first selector with non-empty text
+#   {"selector": s, "count": n, "attr": a}    text (or attribute) of up to n matches
+#   {"selector": s, "count": n, "fields": {}} one record per match; fields map name -> [sub-selector, attr]
+BATCH_EXTRACT_SCRIPT = """
+({ strip, specs }) => {
+    if (strip) document.querySelectorAll(strip).forEach(el => el.remove());
+    const read = (el, attr) => !el ? null : attr ? el.getAttribute(attr) : (el.innerText || '').trim();
+    const limit = (els, count) => count ? els.slice(0, count) : els;
+    return specs.map(spec => {
+        if (spec.first) {
+            for (const selector of spec.selectors) {
+                const text = read(document.querySelector(selector), spec.attr);
+                if (text) return text;
+            }
+            return null;
+        }
+        const els = limit(Array.from(document.querySelectorAll(spec.selector)), spec.count);
+        if (!spec.fields) return els.map(el => read(el, spec.attr));
+        return els.map(el => Object.fromEntries(Object.entries(spec.fields).map(
+            ([name, [selector, attr]]) => [name, read(selector ? el.querySelector(selector) : el, attr)]
+        )));
+    });
+}
+"""
+
+
+def parse_field(field):
+    """'a@href' -> ('a', 'href'); '.price' -> ('.price', None); '@href' reads the matched element itself"""
+    selector, _, attr = field.strip().partition("@")
+    return selector.strip(), attr.strip() or None
+
+
+def first_spec(selectors, attr=None):
+    return {"selectors": list(selectors), "first": True, "attr": attr}
+
+
+def text_spec(selector, count=None, attr=None):
+    return {"selector": selector, "count": count, "attr": attr}
+
+
+def record_spec(selector, fields, count=None):
+    """fields: {"title": ".name", "price": ".price", "link": "a@href"}"""
+    return {
+        "selector": selector,
+        "count": count,
+        "fields": {name: list(parse_field(field)) for name, field in fields.items()}
+    }
+
+
+async def extract_batch(page, specs, strip=None):
+    """Run all extraction specs in a single page.evaluate; returns one result per spec, in order"""
+    return await page.evaluate(BATCH_EXTRACT_SCRIPT, {"strip": strip, "specs": list(specs)})
+
+
+async def extract_main_content(page):
+    """innerText of the first main-content container (body as fallback), scripts and styles stripped"""
+    content, = await extract_batch(
+        page,
+        [first_spec(CONTENT_SELECTORS + ["body"])],
+        strip="script, style, noscript"
+    )
+    return content or ""
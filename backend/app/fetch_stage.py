@@ -0,0 +1,168 @@
+# backend/app/fetch_stage.py
+import asyncio
+import os
+import time
+
+from app.host_health import HostHealth, host_of
+
+# Cancellation message for loads still running at the request deadline (vs. surplus hedges)
+DEADLINE = "deadline"
+
+
+def timeout_result(deadline):
+    """Placeholder result for a page that did not finish inside the request deadline"""
+    return {
+        "content": f"Timed out after {deadline:.0f}s",
+        "screenshot": None,
+        "thumbnail": None,
+        "status": "timeout"
+    }
+
+
+def error_result(error):
+    return {
+        "content": f"Failed to process: {error}",
+        "screenshot": None,
+        "thumbnail": None,
+        "status": "error"
+    }
+
+
+class FetchStage:
+    """Concurrent fan-out of page fetches with per-process and per-host caps.
+
+    Semaphores are process-wide, so concurrent /execute requests share the
+    same budget. Every load feeds the per-host health stats, which decide
+    which search hits are worth fetching: callers ask for `want` pages,
+    start `want + hedge` of them and keep the first `want` that load.
+    Everything here runs on the browser pool loop.
+    """
+
+    def __init__(self, max_concurrency=None, per_host=None, deadline=None, hedge=None, health=None):
+        self.max_concurrency = max_concurrency or int(os.getenv("FETCH_MAX_CONCURRENCY", "8"))
+        self.per_host = per_host or int(os.getenv("FETCH_PER_HOST", "2"))
+        self.deadline = deadline or float(os.getenv("FETCH_DEADLINE", "45"))
+        self.hedge = hedge if hedge is not None else int(os.getenv("FETCH_HEDGE", "2"))
+        self.health = health or HostHealth()
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts = {}
+        self.hedges_cancelled = 0
+
+    def _host_semaphore(self, host):
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.per_host), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release_host(self, host):
+        entry = self._hosts.get(host)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._hosts[host]
+
+    def select(self, urls, want):
+        """Indices of the urls to fetch for `want` pages: up to want + hedge, in rank order.
+
+        Hosts with an open circuit are skipped unless there are too few others,
+        and slow or flaky hosts are only used after the healthy ones.
+        """
+        allowed, demoted, blocked = [], [], []
+        for idx, url in enumerate(urls):
+            host = host_of(url)
+            if not self.health.available(host):
+                blocked.append(idx)
+            elif self.health.demoted(host):
+                demoted.append(idx)
+            else:
+                allowed.append(idx)
+        chosen = []
+        for idx in allowed + demoted:
+            if len(chosen) >= want + self.hedge:
+                break
+            # Claims a half-open host's single probe, so only for urls that are fetched
+            if self.health.allow(host_of(urls[idx])):
+                chosen.append(idx)
+            else:
+                blocked.append(idx)
+        if len(chosen) < want:
+            chosen += sorted(blocked)[:want - len(chosen)]
+        return sorted(chosen)
+
+    async def _fetch_one(self, fetch_fn, url, idx):
+        host = host_of(url)
+        host_sem = self._host_semaphore(host)
+        started = None
+        try:
+            # Host slot first: loads queued behind a busy host must not hold global slots other hosts could use
+            async with host_sem, self._global:
+                started = time.monotonic()
+                result = await fetch_fn(url)
+        except asyncio.CancelledError as e:
+            # A load cut off by the deadline failed; a cancelled hedge took at least this long,
+            # a latency sample only. Loads still queued say nothing about the host.
+            if started is not None:
+                self.health.record(host, time.monotonic() - started, False if e.args == (DEADLINE,) else None)
+            raise
+        except Exception as e:
+            print(f"Error processing result {idx}: {e}")
+            result = error_result(e)
+        finally:
+            self._release_host(host)
+        # Cache hits say nothing about the host
+        if result.get("tier") != "cache" and started is not None:
+            self.health.record(host, time.monotonic() - started, result.get("status") == "success")
+        return result
+
+    async def iter_fetches(self, urls, fetch_fn, deadline=None, want=None):
+        """Yield (idx, result) as each page finishes; pages still running at the deadline yield a timeout.
+
+        With `want`, stop once that many pages loaded successfully: the hedged
+        loads still running are cancelled and yield nothing.
+        """
+        deadline = deadline or self.deadline
+        end = time.monotonic() + deadline
+        tasks = {
+            asyncio.create_task(self._fetch_one(fetch_fn, url, idx)): idx
+            for idx, url in enumerate(urls)
+        }
+        pending = set(tasks)
+        loaded = 0
+        try:
+            while pending and (want is None or loaded < want):
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.get("status") == "success":
+                        loaded += 1
+                    yield tasks[task], result
+            if want is not None and loaded >= want:
+                for task in pending:
+                    task.cancel()
+                self.hedges_cancelled += len(pending)
+                return
+            # Health is recorded by each cancelled load itself
+            for task in pending:
+                task.cancel(DEADLINE)
+            for idx in sorted(tasks[task] for task in pending):
+                yield idx, timeout_result(deadline)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_all(self, urls, fetch_fn, deadline=None, want=None):
+        """Fetch all urls concurrently and return results in input order (None for cancelled hedges)"""
+        results = [None] * len(urls)
+        async for idx, result in self.iter_fetches(urls, fetch_fn, deadline, want):
+            results[idx] = result
+        return results
+
+    def stats(self):
+        return {"hedge": self.hedge, "hedges_cancelled": self.hedges_cancelled, **self.health.stats()}
+
+
+fetch_stage = FetchStage()
@@ -0,0 +1,109 @@
+# backend/app/host_health.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+def host_of(url):
+    return (urlparse(url).hostname or "").lower()
+
+
+class HostHealth:
+    """Per-host latency and error EWMAs with a circuit breaker, kept across requests.
+
+    After `failures` consecutive failed loads a host's circuit opens for `cooldown`
+    seconds and it is skipped. Once the cooldown has passed the circuit is half-open:
+    one probe load is let through and its outcome closes or re-opens the circuit.
+    Hosts that are healthy but slow or flaky are only deprioritized.
+    """
+
+    def __init__(self, alpha=None, failures=None, cooldown=None, slow_seconds=None, max_hosts=None):
+        self.alpha = alpha or float(os.getenv("HOST_EWMA_ALPHA", "0.3"))
+        self.failures = failures or int(os.getenv("HOST_BREAKER_FAILURES", "3"))
+        self.cooldown = cooldown or float(os.getenv("HOST_BREAKER_COOLDOWN", "60"))
+        self.slow_seconds = slow_seconds or float(os.getenv("HOST_SLOW_SECONDS", "10"))
+        self.max_hosts = max_hosts or int(os.getenv("HOST_HEALTH_MAX_HOSTS", "5000"))
+        self._hosts = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _entry(self, host):
+        """Stats for a host, created on first use; caller holds the lock"""
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = {
+                "latency": None, "error_rate": 0.0, "consecutive_failures": 0,
+                "open_until": 0.0, "probe_started": 0.0, "loads": 0
+            }
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        self._hosts.move_to_end(host)
+        return entry
+
+    def record(self, host, seconds, ok):
+        """Fold one page load into the host's EWMAs and breaker state; ok=None is a latency-only sample"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(host)
+            entry["latency"] = seconds if entry["latency"] is None else (
+                self.alpha * seconds + (1 - self.alpha) * entry["latency"]
+            )
+            if ok is None:
+                return
+            entry["loads"] += 1
+            entry["error_rate"] = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * entry["error_rate"]
+            entry["probe_started"] = 0.0
+            if ok:
+                entry["consecutive_failures"] = 0
+                entry["open_until"] = 0.0
+            else:
+                entry["consecutive_failures"] += 1
+                if entry["consecutive_failures"] >= self.failures:
+                    if entry["open_until"] <= now:
+                        self.opened += 1
+                    entry["open_until"] = now + self.cooldown
+
+    def _state(self, entry, now):
+        if entry is None or not entry["open_until"]:
+            return "closed"
+        return "open" if now < entry["open_until"] else "half_open"
+
+    def _passes(self, entry, now):
+        """Closed, or half-open with no probe in flight; caller holds the lock"""
+        state = self._state(entry, now)
+        return state == "closed" or (state == "half_open" and now - entry["probe_started"] >= self.cooldown)
+
+    def available(self, host):
+        """What allow() would answer, without claiming the half-open probe"""
+        with self._lock:
+            return self._passes(self._hosts.get(host), time.monotonic())
+
+    def allow(self, host):
+        """False while the host's circuit is open; in half-open state only one probe at a time passes"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._hosts.get(host)
+            if not self._passes(entry, now):
+                return False
+            if self._state(entry, now) == "half_open":
+                entry["probe_started"] = now
+            return True
+
+    def demoted(self, host):
+        """Healthy enough to try, but slow or erroring often"""
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                return False
+            return (entry["latency"] or 0) > self.slow_seconds or entry["error_rate"] > 0.5
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "hosts": len(self._hosts),
+                "open": sorted(h for h, e in self._hosts.items() if self._state(e, now) == "open"),
+                "opened": self.opened
+            }
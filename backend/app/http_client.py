@@ -0,0 +1,34 @@
+# backend/app/http_client.py
+import atexit
+import os
+import threading
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx when installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Process-wide keep-alive HTTP client; thread-safe and reused across requests"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "50")),
+                    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+                    keepalive_expiry=60.0
+                )
+            )
+            atexit.register(_client.close)
+        return _client
@@ -0,0 +1,153 @@
+# backend/app/imaging.py
+import asyncio
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from app.timing import timed
+
+# PIL file formats and extensions for the output formats we support
+IMAGE_FORMATS = {
+    "png": ("PNG", "png"),
+    "jpeg": ("JPEG", "jpg"),
+    "webp": ("WEBP", "webp"),
+}
+
+
+def capture_settings():
+    """Screenshot and thumbnail options from the environment; part of the page cache key"""
+    return {
+        "format": os.getenv("SCREENSHOT_FORMAT", "jpeg"),
+        "quality": int(os.getenv("SCREENSHOT_QUALITY", "80")),
+        "max_height": int(os.getenv("SCREENSHOT_MAX_HEIGHT", "4000")),
+        "thumbnail_width": int(os.getenv("THUMBNAIL_WIDTH", "300")),
+        "thumbnail_format": os.getenv("THUMBNAIL_FORMAT", "webp"),
+        "thumbnail_quality": int(os.getenv("THUMBNAIL_QUALITY", "70")),
+        # "screenshot" downsizes the saved capture; "viewport" uses a second, viewport-sized capture
+        "thumbnail_source": os.getenv("THUMBNAIL_SOURCE", "screenshot"),
+    }
+
+
+def extension(fmt):
+    return IMAGE_FORMATS.get(fmt, IMAGE_FORMATS["png"])[1]
+
+
+async def capture_screenshot(page, path, settings, viewport):
+    """Screenshot the page, clipped to max_height when capturing the full page"""
+    # Playwright only encodes PNG and JPEG; WebP captures are taken as PNG and re-encoded by PIL
+    capture_type = "jpeg" if settings["format"] == "jpeg" else "png"
+    options = {"path": path, "type": capture_type}
+    if capture_type == "jpeg":
+        options["quality"] = settings["quality"]
+    if settings["full_page"]:
+        height = await page.evaluate(
+            "() => Math.max(document.documentElement.scrollHeight, document.body ? document.body.scrollHeight : 0)"
+        )
+        options["full_page"] = True
+        options["clip"] = {
+            "x": 0,
+            "y": 0,
+            "width": viewport["width"],
+            "height": max(1, min(height or viewport["height"], settings["max_height"]))
+        }
+    if settings["format"] == "webp":
+        options.pop("path")
+        data = await page.screenshot(**options)
+        # Encoding is CPU-bound; keep it off the browser pool loop so other renders keep going
+        await asyncio.wrap_future(thumbnail_workers.run(save_webp, data, path, settings["quality"]))
+    else:
+        await page.screenshot(**options)
+
+
+def save_webp(data, path, quality):
+    """Re-encode captured PNG bytes as WebP"""
+    with Image.open(io.BytesIO(data)) as img:
+        img.save(path, "WEBP", quality=quality, method=0)
+
+
+def make_thumbnail(source, thumbnail_path, width=300, fmt="webp", quality=70):
+    """Fast thumbnail: JPEG draft decoding and integer reduce() before the final resample.
+
+    `source` is a file path or encoded image bytes.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elif not os.path.exists(source):
+        return None
+
+    with Image.open(source) as img:
+        height = max(1, round(img.height * width / img.width))
+        # For JPEG sources this decodes at 1/2, 1/4 or 1/8 scale straight from the DCT data
+        img.draft("RGB", (width, height))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        # reducing_gap makes PIL box-reduce by an integer factor first, then resample the remainder
+        thumb = img.resize((width, height), Image.Resampling.BICUBIC, reducing_gap=2.0)
+
+    pil_format = IMAGE_FORMATS.get(fmt, IMAGE_FORMATS["png"])[0]
+    if pil_format == "PNG":
+        thumb.save(thumbnail_path, pil_format)
+    elif pil_format == "WEBP":
+        thumb.save(thumbnail_path, pil_format, quality=quality, method=0)
+    else:
+        thumb.save(thumbnail_path, pil_format, quality=quality)
+    return thumbnail_path
+
+
+class ThumbnailWorkers:
+    """Background pool that renders thumbnails off the request path.
+
+    PIL releases the GIL while decoding and resampling, so threads scale
+    across cores. Pending jobs are tracked by output path so the thumbnail
+    route can wait for one that has not been written yet.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv("THUMBNAIL_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, source, thumbnail_path, width, fmt, quality):
+        future = self._executor.submit(self._run, source, thumbnail_path, width, fmt, quality)
+        with self._lock:
+            self._pending[thumbnail_path] = future
+        future.add_done_callback(lambda f: self._forget(thumbnail_path, f))
+        return future
+
+    def run(self, fn, *args):
+        """Run other image work (screenshot re-encoding) on the same threads; returns a future"""
+        return self._executor.submit(fn, *args)
+
+    def _run(self, source, thumbnail_path, width, fmt, quality):
+        try:
+            with timed("thumbnail"):
+                return make_thumbnail(source, thumbnail_path, width, fmt, quality)
+        except Exception as e:
+            print(f"Thumbnail creation error: {e}")
+            return None
+
+    def _forget(self, thumbnail_path, future):
+        with self._lock:
+            if self._pending.get(thumbnail_path) is future:
+                del self._pending[thumbnail_path]
+
+    def wait_for(self, thumbnail_path, timeout=10):
+        """Block until a pending thumbnail for this path is written; no-op if none is pending"""
+        with self._lock:
+            future = self._pending.get(thumbnail_path)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "pending": len(self._pending)}
+
+
+thumbnail_workers = ThumbnailWorkers()
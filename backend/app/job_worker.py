@@ -0,0 +1,41 @@
+# backend/app/job_worker.py
+"""Dedicated background job worker, scaled separately from the web tier.
+
+Run from the backend directory (web workers can then use JOB_WORKERS=0):
+    python -m app.job_worker [--workers 4]
+"""
+import argparse
+import signal
+import threading
+
+from app.browser_pool import get_pool
+from app.jobs import JobWorkers
+from app.main import cleanup_old_files, job_handlers, job_store, page_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=None, help="worker threads (default: JOB_WORKERS)")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    workers = JobWorkers(job_store, job_handlers, workers=args.workers)
+    cleanup_old_files()
+    get_pool().start()
+    workers.start()
+    page_index.start()
+    print(f"Job worker running with {workers.workers} threads on {job_store.path}")
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        workers.stop()
+        page_index.stop()
+        get_pool().shutdown()
+
+
+if __name__ == "__main__":
+    main()
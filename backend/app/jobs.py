@@ -0,0 +1,269 @@
+# backend/app/jobs.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedup_key TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+"""
+
+ACTIVE = ("queued", "running")
+
+
+def dedup_key(kind, payload):
+    """Jobs with the same kind and payload share one run"""
+    return hashlib.sha256(f"{kind}\x00{json.dumps(payload, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """SQLite-backed priority queue of jobs, safe across threads and processes.
+
+    Claims run inside BEGIN IMMEDIATE, so any number of worker threads or processes
+    can share one database file.
+    """
+
+    def __init__(self, path=JOB_DB_PATH, dedup_ttl=None, retention=None, stale_after=None):
+        self.path = path
+        self.dedup_ttl = dedup_ttl if dedup_ttl is not None else float(os.getenv("JOB_DEDUP_TTL", "300"))
+        self.retention = retention or float(os.getenv("JOB_RETENTION", "86400"))
+        # A running job whose worker hasn't written for this long is assumed dead and requeued
+        self.stale_after = stale_after or float(os.getenv("JOB_STALE_SECONDS", "600"))
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job.pop("dedup_key", None)
+        return job
+
+    def submit(self, kind, payload, priority=0):
+        """Queue a job, or return the matching active/recent one; returns (job_id, deduplicated)"""
+        key = dedup_key(kind, payload)
+        now = time.time()
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # A running job whose worker stopped heartbeating is not joined; requeue_stale restarts it
+            row = db.execute(
+                "SELECT id, status, priority FROM jobs WHERE dedup_key = ? AND "
+                "(status = 'queued' OR (status = 'running' AND updated_at >= ?) "
+                "OR (status = 'done' AND finished_at > ?)) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (key, now - self.stale_after, now - self.dedup_ttl)
+            ).fetchone()
+            if row is not None:
+                if row["status"] == "queued" and priority > row["priority"]:
+                    # A more urgent duplicate bumps the queued job instead of adding another
+                    db.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row["id"]))
+                db.execute("COMMIT")
+                return row["id"], True
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, kind, payload, dedup_key, priority, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), key, priority, now, now)
+            )
+            db.execute("COMMIT")
+            return job_id, False
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker):
+        """Atomically take the highest-priority, oldest queued job; None if the queue is empty"""
+        now = time.time()
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, updated_at = ? WHERE id = ?",
+                (worker, now, now, row["id"])
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        job = self._to_dict(row)
+        job.update(status="running", worker=worker, started_at=now)
+        return job
+
+    def update(self, job_id, result):
+        """Store a partial result; also serves as the worker's heartbeat"""
+        self._connect().execute(
+            "UPDATE jobs SET result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+    def finish(self, job_id, result=None, error=None):
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = COALESCE(?, result), error = ?, updated_at = ?, finished_at = ? "
+            "WHERE id = ?",
+            ("error" if error else "done", json.dumps(result) if result is not None else None, error, now, now, job_id)
+        )
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._to_dict(row)
+        if job["status"] == "queued":
+            job["position"] = self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                "(priority > ? OR (priority = ? AND created_at < ?))",
+                (job["priority"], job["priority"], job["created_at"])
+            ).fetchone()[0] + 1
+        return job
+
+    def requeue_stale(self):
+        """Put running jobs back in the queue when their worker stopped heartbeating"""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND updated_at < ?",
+            (time.time() - self.stale_after,)
+        )
+        return cursor.rowcount
+
+    def sweep(self):
+        """Delete finished jobs older than the retention period"""
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'error') AND finished_at < ?",
+            (time.time() - self.retention,)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class JobWorkers:
+    """Thread pool that pulls jobs from a JobStore and runs the handler registered for their kind.
+
+    Handlers are called as handler(payload, report) where report(partial_result) stores progress,
+    and return the final result. Run this in the web process (JOB_WORKERS > 0) or in dedicated
+    worker processes with `python -m app.job_worker` to scale it separately from the web tier.
+    """
+
+    def __init__(self, store, handlers, workers=None, poll_interval=None):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers if workers is not None else int(os.getenv("JOB_WORKERS", "2"))
+        self.poll_interval = poll_interval or float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+        # Other processes keep running when one dies, so its jobs are requeued from the claim loop
+        self.requeue_interval = max(1.0, self.store.stale_after / 4)
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+        self._name = f"{os.getpid()}"
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        if self._threads or not self.workers:
+            return
+        self.requeue_stale()
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(f"{self._name}-{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake idle workers in this process right away instead of at the next poll"""
+        self._wake.set()
+
+    def requeue_stale(self):
+        """Requeue jobs of dead workers in any process, at most once per requeue_interval here"""
+        with self._requeue_lock:
+            if time.monotonic() < self._next_requeue:
+                return 0
+            self._next_requeue = time.monotonic() + self.requeue_interval
+        requeued = self.store.requeue_stale()
+        if requeued:
+            print(f"Requeued {requeued} stale jobs")
+        return requeued
+
+    def _run(self, worker):
+        while not self._stop.is_set():
+            self.requeue_stale()
+            job = self.store.claim(worker)
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._execute(job)
+
+    def _execute(self, job):
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            self.store.finish(job["id"], error=f"Unknown job kind: {job['kind']}")
+            return
+        try:
+            result = handler(job["payload"], lambda partial: self.store.update(job["id"], partial))
+            self.store.finish(job["id"], result=result)
+            self.completed += 1
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            self.store.finish(job["id"], error=str(e))
+            self.failed += 1
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue": self.store.stats()
+        }
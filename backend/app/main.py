@@ -132,239 +132,294 @@
 # if __name__ == "__main__":
 #     app.run(host="127.0.0.1", port=5000, debug=True)
 
-from flask import Flask, request, jsonify, send_file
-from flask_cors import CORS
-import requests
-from bs4 import BeautifulSoup
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import Literal, Optional
+from starlette.concurrency import run_in_threadpool
 from urllib.parse import unquote, urlparse, parse_qs
-from playwright.sync_api import sync_playwright
-from PIL import Image
+import asyncio
+import json
 import os
 import time
-import hashlib
-
-app = Flask(__name__)
-CORS(app)
-
-SCREENSHOT_DIR = "screenshots"
-THUMBNAIL_DIR = "thumbnails"
+from collections import Counter
+from contextlib import aclosing, asynccontextmanager
+from functools import partial
+
+import uvicorn
+
+from app.browser_pool import get_pool
+from app.browser_storage import asset_cache, browser_profiles
+from app.categorizer import categorizer
+from app.extraction import clean_content_text, extract_main_content, full_text
+from app.fetch_stage import fetch_stage
+from app.host_health import host_of
+from app.http_client import get_http_client
+from app.imaging import capture_screenshot, capture_settings, extension, thumbnail_workers
+from app.page_cache import PageCache, cache_key
+from app.page_index import PageIndex
+from app.render_policy import prepare_page, render_policy, wait_until_ready
+from app.render_shards import RenderShards
+from app.jobs import JobStore, JobWorkers
+from app.search_cache import SearchCache, normalize_query
+from app.search_parsers import parse_result_links
+from app.static_images import ImageServer, versioned_url
+from app.storage import StorageJanitor
+from app.static_fetch import static_fetch
+from app.timing import StageTimings, render_samples, request_seconds, stage_seconds, timed
+from app.routes import orchestrator, router as agents_router
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm the browser pool before the first request and close it on shutdown"""
+    cleanup_old_files()
+    storage_janitor.start()
+    await run_in_threadpool(get_pool().start)
+    await run_in_threadpool(render_shards.start)
+    job_workers.start()
+    page_index.start()
+    yield
+    await run_in_threadpool(job_workers.stop)
+    await run_in_threadpool(page_index.stop)
+    await run_in_threadpool(storage_janitor.stop)
+    await run_in_threadpool(render_shards.shutdown)
+    await run_in_threadpool(get_pool().shutdown)
+
+app = FastAPI(title="Web Navigator API", lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"]
+)
+app.include_router(agents_router)
+
+@app.middleware("http")
+async def observe_latency(request: Request, call_next):
+    """Request latency histogram, labelled by route template rather than raw path"""
+    start = time.monotonic()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    request_seconds.observe(time.monotonic() - start, route=getattr(route, "path", "unmatched"))
+    return response
+
+SCREENSHOT_DIR = os.getenv("SCREENSHOT_DIR", "screenshots")
+THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", "thumbnails")
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 os.makedirs(THUMBNAIL_DIR, exist_ok=True)
 
+# Screenshot/thumbnail disk quota; cleanup_old_files is its periodic maintenance hook (defined below)
+storage_janitor = StorageJanitor([SCREENSHOT_DIR, THUMBNAIL_DIR], maintenance=lambda: cleanup_old_files())
+
+# Thumbnails are small and re-requested on every grid render, so they get an in-memory hot set
+screenshot_server = ImageServer(SCREENSHOT_DIR, "Screenshot", on_serve=storage_janitor.touch)
+thumbnail_server = ImageServer(
+    THUMBNAIL_DIR, "Thumbnail",
+    hot_max_mb=float(os.getenv("IMAGE_HOT_CACHE_MB", "32")),
+    on_serve=storage_janitor.touch
+)
+storage_janitor.on_evict.append(thumbnail_server.forget)
+
+SEARCH_URL = os.getenv("SEARCH_URL", "https://duckduckgo.com/html/")
+# Pages returned per query; extra hits are fetched as hedges or stand in for hosts with an open circuit
+RESULT_COUNT = 5
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "10"))
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Everything that changes the rendered output is part of the page cache key
+RENDER_SETTINGS = {
+    "viewport": {"width": 1920, "height": 1080},
+    "full_page": True,
+    **capture_settings()
+}
+# Browser render without a screenshot, and the plain HTTP tier
+TEXT_RENDER_SETTINGS = {"viewport": RENDER_SETTINGS["viewport"], "screenshot": False}
+STATIC_SETTINGS = {"tier": "static"}
+
+# Which tier served each page (cache, static, browser) since startup
+tier_counts = Counter()
+
+page_cache = PageCache(SCREENSHOT_DIR, THUMBNAIL_DIR)
+search_cache = SearchCache()
+job_store = JobStore()
+# Full-text index of extracted pages; answers repeat queries without searching or rendering
+page_index = PageIndex()
+# Optional multi-process rendering (RENDER_PROCESSES > 0); shards are started by the lifespan handler
+render_shards = RenderShards()
+
 # --- Enhanced DuckDuckGo search ---
 def search_duckduckgo(query, limit=5):
+    """Cached DuckDuckGo search; concurrent identical queries share one upstream request"""
+    return search_cache.get_or_fetch(query, limit, fetch_duckduckgo_results)
+
+def fetch_duckduckgo_results(query, limit=5):
     """Enhanced DuckDuckGo search with better error handling"""
     try:
-        url = f"https://duckduckgo.com/html/?q={query}"
         headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            "User-Agent": USER_AGENT
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, "html.parser")
-        results = []
-        
-        # Try multiple selectors for better compatibility
-        result_selectors = [".result__a", ".result .result__title a", "a[href*='uddg']"]
+        # Pooled keep-alive client: no new TCP+TLS handshake per search
+        with timed("search_request"):
+            response = get_http_client().get(SEARCH_URL, params={"q": query}, headers=headers)
+            response.raise_for_status()
         
-        for selector in result_selectors:
-            links = soup.select(selector)
-            if links:
-                break
-        
-        for i, a in enumerate(links[:limit]):
-            if not a:
-                continue
-                
-            title = a.get_text(strip=True)
-            if not title:
-                title = f"Result {i+1}"
-                
-            href = a.get("href", "")
-            if not href:
-                continue
-                
-            # Extract real URL from DuckDuckGo redirect
-            try:
-                parsed = urlparse(href)
-                qs = parse_qs(parsed.query)
-                real_url = unquote(qs.get("uddg", [href])[0])
-                
-                # Validate URL
-                if not real_url.startswith(("http://", "https://")):
-                    real_url = "https://" + real_url.lstrip("/")
-                    
-                results.append({
-                    "title": title,
-                    "link": real_url,
-                    "category": categorize_result(title, real_url)
-                })
-            except Exception as e:
-                print(f"Error processing URL {href}: {e}")
-                continue
-                
-        return results
+        with timed("html_parse"):
+            return parse_search_results(response.text, limit)
     except Exception as e:
         print(f"Search error: {e}")
         return []
 
-def categorize_result(title, url):
-    """Categorize search results based on title and URL"""
-    title_lower = title.lower()
-    url_lower = url.lower()
-    
-    # Gaming keywords
-    if any(word in title_lower for word in ['game', 'gaming', 'steam', 'xbox', 'playstation', 'nintendo']):
-        return 'gaming'
-    
-    # Tech keywords
-    if any(word in title_lower for word in ['tech', 'technology', 'software', 'hardware', 'computer', 'laptop', 'mobile', 'ai', 'artificial intelligence']):
-        return 'tech'
-    
-    # Business keywords
-    if any(word in title_lower for word in ['business', 'finance', 'market', 'company', 'corporate', 'startup', 'investment']):
-        return 'business'
-    
-    # News keywords
-    if any(word in url_lower for word in ['news', 'bbc', 'cnn', 'reuters', 'times']):
-        return 'news'
-    
-    return 'general'
-
-# --- Create thumbnail ---
-def create_thumbnail(screenshot_path, idx, width=300):
-    """Create thumbnail from screenshot with error handling"""
-    thumbnail_filename = f"thumb_{idx}_{int(time.time())}.png"
-    thumbnail_path = os.path.join(THUMBNAIL_DIR, thumbnail_filename)
+def parse_search_results(html, limit=5):
+    """Turn a DuckDuckGo HTML results page into result dicts with real URLs and categories"""
+    results = []
     
-    try:
-        if not os.path.exists(screenshot_path):
-            return None
+    for i, (title, href) in enumerate(parse_result_links(html, limit)):
+        if not title:
+            title = f"Result {i+1}"
             
-        with Image.open(screenshot_path) as img:
-            # Calculate height maintaining aspect ratio
-            aspect_ratio = img.height / img.width
-            height = int(width * aspect_ratio)
+        if not href:
+            continue
             
-            # Resize image
-            img_resized = img.resize((width, height), Image.Resampling.LANCZOS)
-            img_resized.save(thumbnail_path, "PNG", optimize=True)
+        # Extract real URL from DuckDuckGo redirect
+        try:
+            parsed = urlparse(href)
+            qs = parse_qs(parsed.query)
+            real_url = unquote(qs.get("uddg", [href])[0])
             
-        return thumbnail_path
-    except Exception as e:
-        print(f"Thumbnail creation error: {e}")
-        return None
+            # Validate URL
+            if not real_url.startswith(("http://", "https://")):
+                real_url = "https://" + real_url.lstrip("/")
+                
+            results.append({
+                "title": title,
+                "link": real_url
+            })
+        except Exception as e:
+            print(f"Error processing URL {href}: {e}")
+            continue
+    
+    # One matcher pass over the whole result list
+    for result, category in zip(results, categorizer.categorize_many(results)):
+        result["category"] = category
+    return results
+
+# --- Tiered page fetching: cache, then static HTTP, then the browser ---
+async def fetch_page(url, screenshots=True):
+    """Fetch one result page through the cheapest tier that can serve it"""
+    # Any cached render with text serves a text-only request
+    candidates = [RENDER_SETTINGS] if screenshots else [RENDER_SETTINGS, TEXT_RENDER_SETTINGS, STATIC_SETTINGS]
+    for settings in candidates:
+        cached = page_cache.get(url, settings)
+        if cached:
+            tier_counts["cache"] += 1
+            storage_janitor.touch(cached["screenshot"])
+            storage_janitor.touch(cached["thumbnail"])
+            return {**cached, "tier": "cache"}
+    
+    # Without a screenshot, a plain GET is enough unless the page needs JavaScript
+    if not screenshots:
+        loop = asyncio.get_running_loop()
+        timings = StageTimings()
+        with timings.stage("static_fetch"):
+            result = await loop.run_in_executor(None, static_fetch, url, USER_AGENT)
+        if result:
+            page_cache.put(url, STATIC_SETTINGS, result)
+            tier_counts["static"] += 1
+            return {**result, "tier": "static", "timings": timings.to_dict()}
+        tier_counts["static_fallback"] += 1
+    
+    result = await render_page(url, screenshots)
+    tier_counts["browser"] += 1
+    return {**result, "tier": "browser"}
 
-# --- Enhanced page content and screenshot fetching ---
-def fetch_page_content_and_screenshot(url, idx):
-    """Enhanced page fetching with better error handling and content extraction"""
+async def render_page(url, screenshots=True):
+    """Load one page in a pooled browser context, optionally screenshot it, and extract its main content"""
     result = {
         "content": "Failed to load page.",
         "screenshot": None,
         "thumbnail": None,
         "status": "error"
     }
+    settings = RENDER_SETTINGS if screenshots else TEXT_RENDER_SETTINGS
+    thumbnail_job = None
+    timings = StageTimings()
     
     try:
-        # Create unique filenames
-        timestamp = int(time.time())
-        screenshot_filename = f"screenshot_{idx}_{timestamp}.png"
-        screenshot_path = os.path.join(SCREENSHOT_DIR, screenshot_filename)
+        # Content-addressed filenames so identical renders can be reused
+        key = cache_key(url, settings)
+        screenshot_path = page_cache.screenshot_path(key, extension(RENDER_SETTINGS["format"]))
+        thumbnail_path = page_cache.thumbnail_path(key, extension(RENDER_SETTINGS["thumbnail_format"]))
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-dev-shm-usage']
-            )
+        checkout_started = time.monotonic()
+        async with get_pool().context(
+            user_agent=USER_AGENT,
+            viewport=RENDER_SETTINGS["viewport"]
+        ) as context:
+            # Includes a browser launch when the pool slot is cold
+            timings.record("browser_context", time.monotonic() - checkout_started)
+            # Cookies/localStorage saved on an earlier visit (consent choices, sessions)
+            await browser_profiles.restore(context, url)
+            page = await context.new_page()
             
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080}
-            )
-            
-            page = context.new_page()
+            # Block ads, trackers, fonts and media; serve static assets from the shared disk cache
+            metrics = await prepare_page(page, render_policy, assets=asset_cache)
             
             # Set timeouts
             page.set_default_timeout(30000)
             
             # Navigate to page
-            response = page.goto(url, wait_until="domcontentloaded", timeout=20000)
+            with timings.stage("navigation"):
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=20000)
             
             if not response or response.status >= 400:
                 result["content"] = f"Page returned status {response.status if response else 'unknown'}"
-                browser.close()
+                result["metrics"] = metrics.to_dict()
+                result["timings"] = timings.to_dict()
                 return result
             
-            # Wait for page to load
-            try:
-                page.wait_for_load_state("networkidle", timeout=10000)
-            except:
-                # If networkidle fails, just wait a bit
-                page.wait_for_timeout(3000)
+            # Screenshot once main content is present and the DOM settles, not on network idle
+            with timings.stage("render_wait"):
+                await wait_until_ready(page, render_policy, metrics)
             
-            # Take screenshot
-            try:
-                page.screenshot(
-                    path=screenshot_path,
-                    full_page=True,
-                    type="png"
-                )
-                result["screenshot"] = screenshot_path
-                
-                # Create thumbnail
-                thumbnail_path = create_thumbnail(screenshot_path, idx)
-                if thumbnail_path:
+            # Take screenshot (skipped for text-only requests)
+            if screenshots:
+                try:
+                    # Height-capped capture, JPEG by default, instead of an unbounded full-page PNG
+                    with timings.stage("screenshot"):
+                        await capture_screenshot(page, screenshot_path, RENDER_SETTINGS, RENDER_SETTINGS["viewport"])
+                    result["screenshot"] = screenshot_path
+                    storage_janitor.record(screenshot_path)
+                    
+                    # The thumbnail is rendered by background workers; its path is known up front
+                    source = screenshot_path
+                    if RENDER_SETTINGS["thumbnail_source"] == "viewport":
+                        source = await page.screenshot(type="jpeg", quality=RENDER_SETTINGS["quality"])
+                    thumbnail_job = thumbnail_workers.submit(
+                        source,
+                        thumbnail_path,
+                        RENDER_SETTINGS["thumbnail_width"],
+                        RENDER_SETTINGS["thumbnail_format"],
+                        RENDER_SETTINGS["thumbnail_quality"]
+                    )
                     result["thumbnail"] = thumbnail_path
                     
-            except Exception as e:
-                print(f"Screenshot error for {url}: {e}")
+                except Exception as e:
+                    print(f"Screenshot error for {url}: {e}")
             
-            # Extract content
+            # Extract content: one in-page script tries every content selector, then body
             try:
-                # Remove script and style elements
-                page.evaluate("""
-                    () => {
-                        const scripts = document.querySelectorAll('script, style, noscript');
-                        scripts.forEach(el => el.remove());
-                    }
-                """)
-                
-                # Get main content
-                content_selectors = [
-                    "main", "article", ".main-content", ".content", 
-                    "#main", "#content", ".post-content", ".entry-content"
-                ]
-                
-                content_text = ""
-                for selector in content_selectors:
-                    try:
-                        element = page.query_selector(selector)
-                        if element:
-                            content_text = element.inner_text()
-                            break
-                    except:
-                        continue
-                
-                # Fallback to body if no main content found
-                if not content_text:
-                    try:
-                        content_text = page.query_selector("body").inner_text()
-                    except:
-                        content_text = ""
+                with timings.stage("extraction"):
+                    content_text = await extract_main_content(page)
                 
                 # Clean and truncate content
                 if content_text:
-                    lines = [line.strip() for line in content_text.split('\n') if line.strip()]
-                    clean_lines = [line for line in lines if len(line) > 10]  # Remove very short lines
-                    content_text = ' '.join(clean_lines[:15])  # First 15 meaningful lines
-                    
-                    if len(content_text) > 500:
-                        content_text = content_text[:500] + "..."
-                    
+                    result["text"] = full_text(content_text)
+                    content_text = clean_content_text(content_text)
                     result["content"] = content_text if content_text else "No content extracted."
                     result["status"] = "success"
+                    await browser_profiles.save(context, url)
                 else:
                     result["content"] = "No readable content found."
                     
@@ -372,154 +427,542 @@ def fetch_page_content_and_screenshot(url, idx):
                 result["content"] = f"Content extraction failed: {str(e)}"
                 print(f"Content extraction error for {url}: {e}")
             
-            browser.close()
+            result["metrics"] = metrics.to_dict()
             
     except Exception as e:
         result["content"] = f"Failed to load page: {str(e)}"
         print(f"Page fetch error for {url}: {e}")
     
+    result["timings"] = timings.to_dict()
+    if thumbnail_job is not None:
+        # Cache the render once its thumbnail exists so cache hits never point at a missing file
+        cached_result = dict(result)
+        def cache_when_ready(job):
+            cached_result["thumbnail"] = job.result()
+            storage_janitor.record(cached_result["thumbnail"])
+            page_cache.put(url, settings, cached_result)
+        thumbnail_job.add_done_callback(cache_when_ready)
+    else:
+        page_cache.put(url, settings, result)
     return result
 
+async def fetch_pages(urls, screenshots=True, want=None):
+    """Fetch result pages concurrently under the fetch stage's caps and deadline, in input order.
+
+    With `want`, hedged loads beyond that many successes are cancelled (their slots stay None).
+    """
+    if render_shards.enabled:
+        results = [None] * len(urls)
+        async with aclosing(iter_sharded_pages(urls, screenshots, want)) as pages:
+            async for idx, page_data in pages:
+                results[idx] = page_data
+        return results
+    return await get_pool().call(fetch_stage.fetch_all, urls, partial(fetch_page, screenshots=screenshots), want=want)
+
+async def iter_sharded_pages(urls, screenshots=True, want=None):
+    """iter_pages_as_completed over the render shard processes"""
+    futures = render_shards.submit(urls, screenshots, want)
+    
+    async def indexed(idx, future):
+        return idx, await asyncio.wrap_future(future)
+    
+    tasks = [asyncio.ensure_future(indexed(idx, future)) for idx, future in enumerate(futures)]
+    loaded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            idx, page_data = await next_done
+            if page_data is None:
+                # A hedge the shard cancelled once it had `want` pages
+                continue
+            # Shards track their own hosts; this copy feeds candidate selection in this process.
+            # The shard times the load itself, so queueing there doesn't count against the host.
+            if page_data.get("tier") != "cache" and "load_seconds" in page_data:
+                fetch_stage.health.record(host_of(urls[idx]), page_data["load_seconds"], page_data.get("status") == "success")
+            yield idx, page_data
+            if page_data.get("status") == "success":
+                loaded += 1
+            if want is not None and loaded >= want:
+                break
+    finally:
+        # Cancelling the unanswered shard futures stops their loads in the shards
+        for task, future in zip(tasks, futures):
+            task.cancel()
+            future.cancel()
+
+async def iter_pages_as_completed(urls, screenshots=True, want=None):
+    """Async generator of (idx, page_data) in completion order, bridged from the pool loop"""
+    if render_shards.enabled:
+        async with aclosing(iter_sharded_pages(urls, screenshots, want)) as pages:
+            async for item in pages:
+                yield item
+        return
+    
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    done = object()
+
+    async def produce():
+        try:
+            fetch_fn = partial(fetch_page, screenshots=screenshots)
+            async with aclosing(fetch_stage.iter_fetches(urls, fetch_fn, want=want)) as fetches:
+                async for item in fetches:
+                    loop.call_soon_threadsafe(events.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, done)
+
+    future = get_pool().submit(produce)
+    try:
+        while True:
+            item = await events.get()
+            if item is done:
+                break
+            yield item
+        await asyncio.wrap_future(future)
+    finally:
+        # Client went away or we finished: stop any fetches still running
+        future.cancel()
+
+def hedged_candidates(search_results):
+    """Search hits worth fetching for RESULT_COUNT pages: healthy hosts first, plus FETCH_HEDGE spares"""
+    picked = fetch_stage.select([r["link"] for r in search_results], RESULT_COUNT)
+    return [search_results[i] for i in picked]
+
+def pick_results(page_results, count=RESULT_COUNT):
+    """Indices of the pages to return: up to `count` that loaded, topped up with failures, in rank order"""
+    finished = [i for i, page_data in enumerate(page_results) if page_data is not None]
+    loaded = [i for i in finished if page_results[i].get("status") == "success"]
+    failed = [i for i in finished if page_results[i].get("status") != "success"]
+    return sorted((loaded + failed)[:count])
+
+def build_result(result, page_data):
+    """Merge a search hit with its fetched page data into the API result shape"""
+    return {
+        "title": result["title"],
+        "link": result["link"],
+        "content": page_data["content"],
+        "screenshot": page_data["screenshot"],
+        "thumbnail": page_data["thumbnail"],
+        "screenshot_url": versioned_url("screenshot", page_data["screenshot"]),
+        "thumbnail_url": versioned_url("thumbnail", page_data["thumbnail"]),
+        "category": result.get("category", "general"),
+        "status": page_data.get("status", "error"),
+        "tier": page_data.get("tier"),
+        "metrics": page_data.get("metrics"),
+        "timings": page_data.get("timings")
+    }
+
+def indexed_result(hit):
+    """API result for a page answered from the page index"""
+    return {**build_result(hit, {**hit, "status": "success", "tier": "index"}), "fetched_at": hit["fetched_at"]}
+
+def index_pages(command, results, pages):
+    """Queue returned results for the page index under their query, with each page's full text"""
+    page_index.add(command, [{**result, "text": page.get("text")} for result, page in zip(results, pages)])
+
+def answer_from_index(command, mode, max_age=None, screenshots=True):
+    """Indexed results for mode "index" (whatever fresh pages match) or "auto" (None unless the index can stand in)"""
+    if mode == "index":
+        hits = page_index.recall(command, max_age, screenshots) or page_index.search(command, RESULT_COUNT, max_age, screenshots)
+    else:
+        hits = page_index.answer(command, RESULT_COUNT, max_age, screenshots)
+        if hits is None:
+            return None
+    return [indexed_result(hit) for hit in hits]
+
 # --- Main API endpoint ---
-@app.route("/execute", methods=["POST"])
-def execute():
+class ExecuteRequest(BaseModel):
+    command: str = ""
+    screenshots: bool = True
+    # live: search and fetch; auto: answer from the page index when it has enough fresh pages; index: index only
+    mode: Literal["live", "auto", "index"] = "live"
+    # Freshness cutoff in seconds for indexed pages (default PAGE_INDEX_MAX_AGE)
+    max_age: Optional[float] = None
+
+@app.post("/execute")
+async def execute(req: ExecuteRequest):
     """Enhanced API endpoint with better error handling"""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"results": [], "error": "No JSON data provided"})
-        
-        command = data.get("command", "").strip()
+        command = req.command.strip()
         if not command:
-            return jsonify({"results": [], "error": "No search query provided"})
+            return {"results": [], "error": "No search query provided"}
         
         print(f"Processing search query: {command}")
+        timings = StageTimings()
         
-        # Search DuckDuckGo
-        search_results = search_duckduckgo(command, limit=6)  # Get a few extra in case some fail
+        if req.mode != "live":
+            with timings.stage("index"):
+                indexed = await run_in_threadpool(answer_from_index, command, req.mode, req.max_age, req.screenshots)
+            if indexed:
+                return {
+                    "results": indexed,
+                    "query": command,
+                    "total_found": len(indexed),
+                    "source": "index",
+                    "timings": timings.to_dict()
+                }
+            if req.mode == "index":
+                return {"results": [], "query": command, "error": "No fresh indexed pages match this query."}
+        
+        # Search DuckDuckGo (blocking HTTP + parsing, so off the event loop)
+        with timings.stage("search"):
+            search_results = await run_in_threadpool(search_duckduckgo, command, SEARCH_LIMIT)
         
         if not search_results:
-            return jsonify({
+            return {
                 "results": [],
                 "error": "No search results found. Please try a different query."
-            })
+            }
         
         print(f"Found {len(search_results)} search results")
         
-        # Process each result
-        enhanced_results = []
-        for idx, result in enumerate(search_results[:5]):  # Limit to 5 final results
-            print(f"Processing result {idx+1}: {result['title'][:50]}...")
-            
-            try:
-                # Fetch page content and screenshot
-                page_data = fetch_page_content_and_screenshot(result["link"], idx)
-                
-                enhanced_result = {
-                    "title": result["title"],
-                    "link": result["link"],
-                    "content": page_data["content"],
-                    "screenshot": page_data["screenshot"],
-                    "thumbnail": page_data["thumbnail"],
-                    "category": result.get("category", "general"),
-                    "status": page_data.get("status", "error")
-                }
-                
-                enhanced_results.append(enhanced_result)
-                
-            except Exception as e:
-                print(f"Error processing result {idx}: {e}")
-                # Add result even if processing failed
-                enhanced_results.append({
-                    "title": result["title"],
-                    "link": result["link"],
-                    "content": f"Failed to process: {str(e)}",
-                    "screenshot": None,
-                    "thumbnail": None,
-                    "category": result.get("category", "general"),
-                    "status": "error"
-                })
+        # Hedged fetch: start a few more pages than needed and keep the first RESULT_COUNT that load
+        candidates = hedged_candidates(search_results)
+        with timings.stage("fetch_pages"):
+            page_results = await fetch_pages(
+                [r["link"] for r in candidates], screenshots=req.screenshots, want=RESULT_COUNT
+            )
+        
+        selected = pick_results(page_results)
+        enhanced_results = [build_result(candidates[idx], page_results[idx]) for idx in selected]
+        index_pages(command, enhanced_results, [page_results[idx] for idx in selected])
         
         print(f"Returning {len(enhanced_results)} processed results")
         
-        return jsonify({
+        return {
             "results": enhanced_results,
             "query": command,
-            "total_found": len(enhanced_results)
-        })
+            "total_found": len(enhanced_results),
+            "source": "live",
+            "timings": timings.to_dict()
+        }
         
     except Exception as e:
         print(f"API error: {e}")
-        return jsonify({
+        return JSONResponse({
             "results": [],
             "error": f"Server error: {str(e)}"
-        }), 500
+        }, status_code=500)
+
+# --- Streaming API endpoint ---
+@app.post("/execute/stream")
+async def execute_stream(req: ExecuteRequest):
+    """NDJSON variant of /execute: search hits first, then one event per page as it finishes"""
+    command = req.command.strip()
+    
+    def event(payload):
+        return json.dumps(payload) + "\n"
+    
+    async def generate():
+        if not command:
+            yield event({"type": "error", "error": "No search query provided"})
+            return
+        
+        print(f"Streaming search query: {command}")
+        timings = StageTimings()
+        if req.mode != "live":
+            with timings.stage("index"):
+                indexed = await run_in_threadpool(answer_from_index, command, req.mode, req.max_age, req.screenshots)
+            if indexed:
+                yield event({
+                    "type": "search",
+                    "query": command,
+                    "results": [
+                        {"title": r["title"], "link": r["link"], "category": r["category"], "index": idx, "status": "loading"}
+                        for idx, r in enumerate(indexed)
+                    ]
+                })
+                for idx, result in enumerate(indexed):
+                    yield event({"type": "result", "index": idx, "result": result})
+                yield event({
+                    "type": "done",
+                    "query": command,
+                    "total_found": len(indexed),
+                    "selected": list(range(len(indexed))),
+                    "source": "index",
+                    "timings": timings.to_dict()
+                })
+                return
+            if req.mode == "index":
+                yield event({"type": "error", "error": "No fresh indexed pages match this query."})
+                return
+        
+        with timings.stage("search"):
+            search_results = await run_in_threadpool(search_duckduckgo, command, SEARCH_LIMIT)
+        if not search_results:
+            yield event({"type": "error", "error": "No search results found. Please try a different query."})
+            return
+        
+        candidates = hedged_candidates(search_results)
+        yield event({
+            "type": "search",
+            "query": command,
+            "results": [
+                {**result, "index": idx, "status": "loading"}
+                for idx, result in enumerate(candidates)
+            ]
+        })
+        
+        page_results = [None] * len(candidates)
+        results = [None] * len(candidates)
+        try:
+            urls = [r["link"] for r in candidates]
+            with timings.stage("fetch_pages"):
+                async with aclosing(iter_pages_as_completed(urls, screenshots=req.screenshots, want=RESULT_COUNT)) as pages:
+                    async for idx, page_data in pages:
+                        page_results[idx] = page_data
+                        results[idx] = build_result(candidates[idx], page_data)
+                        yield event({"type": "result", "index": idx, "result": results[idx]})
+        except Exception as e:
+            print(f"Streaming error: {e}")
+            yield event({"type": "error", "error": f"Server error: {str(e)}"})
+            return
+        
+        # The hits to keep; cancelled hedges and surplus failures are dropped by the client
+        selected = pick_results(page_results)
+        index_pages(command, [results[idx] for idx in selected], [page_results[idx] for idx in selected])
+        yield event({
+            "type": "done",
+            "query": command,
+            "total_found": len(selected),
+            "selected": selected,
+            "source": "live",
+            "timings": timings.to_dict()
+        })
+    
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# --- Background jobs: submit now, poll or subscribe for results ---
+def run_search_job(payload, report):
+    """Job-mode /execute, run by a job worker thread; reports partial results as pages complete"""
+    command = payload["command"]
+    mode = payload.get("mode", "live")
+    timings = StageTimings()
+    if mode != "live":
+        with timings.stage("index"):
+            indexed = answer_from_index(command, mode, payload.get("max_age"), payload["screenshots"])
+        if indexed:
+            return {"results": indexed, "query": command, "total_found": len(indexed), "source": "index",
+                    "timings": timings.to_dict()}
+        if mode == "index":
+            return {"results": [], "query": command, "error": "No fresh indexed pages match this query."}
+    with timings.stage("search"):
+        search_results = search_duckduckgo(command, SEARCH_LIMIT)
+    if not search_results:
+        return {"results": [], "query": command, "error": "No search results found. Please try a different query."}
+    
+    candidates = hedged_candidates(search_results)
+    results = [{**result, "status": "loading"} for result in candidates]
+    page_results = [None] * len(candidates)
+    report({"query": command, "results": results, "completed": 0})
+    
+    async def collect():
+        completed = 0
+        urls = [r["link"] for r in candidates]
+        async with aclosing(iter_pages_as_completed(urls, screenshots=payload["screenshots"], want=RESULT_COUNT)) as pages:
+            async for idx, page_data in pages:
+                page_results[idx] = page_data
+                results[idx] = build_result(candidates[idx], page_data)
+                completed += 1
+                report({"query": command, "results": results, "completed": completed})
+    
+    with timings.stage("fetch_pages"):
+        asyncio.run(collect())
+    selected = pick_results(page_results)
+    final = [results[idx] for idx in selected]
+    index_pages(command, final, [page_results[idx] for idx in selected])
+    return {"results": final, "query": command, "total_found": len(final), "source": "live", "timings": timings.to_dict()}
+
+job_handlers = {"search": run_search_job}
+job_workers = JobWorkers(job_store, job_handlers)
+
+class JobRequest(ExecuteRequest):
+    priority: int = 0
+
+@app.post("/jobs", status_code=202)
+async def submit_job(req: JobRequest):
+    """Queue a search and return its job id at once; identical queued/recent searches share one job"""
+    command = req.command.strip()
+    if not command:
+        return JSONResponse({"error": "No search query provided"}, status_code=400)
+    payload = {
+        "command": normalize_query(command),
+        "screenshots": req.screenshots,
+        "mode": req.mode,
+        "max_age": req.max_age
+    }
+    job_id, deduplicated = await run_in_threadpool(job_store.submit, "search", payload, req.priority)
+    job_workers.notify()
+    return {"job_id": job_id, "deduplicated": deduplicated, "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Job status with partial results while running and the final result when done"""
+    job = job_store.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """NDJSON stream of job snapshots, one per change, ending when the job finishes"""
+    poll_interval = job_workers.poll_interval
+    
+    async def generate():
+        last_update = None
+        while True:
+            job = await run_in_threadpool(job_store.get, job_id)
+            if job is None:
+                yield json.dumps({"error": "Job not found"}) + "\n"
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                yield json.dumps(job) + "\n"
+            if job["status"] in ("done", "error"):
+                return
+            await asyncio.sleep(poll_interval)
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
 
 # --- Serve screenshots ---
-@app.route("/screenshot/<filename>")
-def get_screenshot(filename):
+@app.get("/screenshot/{filename}")
+def get_screenshot(filename: str, request: Request):
     """Serve screenshot files"""
     try:
-        path = os.path.join(SCREENSHOT_DIR, filename)
-        if os.path.exists(path):
-            return send_file(path, mimetype="image/png")
-        return "Screenshot not found", 404
+        return screenshot_server.serve(request, filename)
     except Exception as e:
         print(f"Screenshot serve error: {e}")
-        return "Error serving screenshot", 500
+        return PlainTextResponse("Error serving screenshot", status_code=500)
 
 # --- Serve thumbnails ---
-@app.route("/thumbnail/<filename>")
-def get_thumbnail(filename):
+THUMBNAIL_WAIT = float(os.getenv("THUMBNAIL_WAIT", "5"))
+
+def wait_for_thumbnail(path):
+    """Block until a thumbnail that is still being rendered is on disk.
+
+    Renders in this process are waited on directly. With several web workers the
+    page may have been rendered by another one, so the disk is polled while the
+    page's screenshot (always written before its thumbnail) exists and the
+    thumbnail does not; a thumbnail of an evicted page 404s straight away.
+    Render shards only return pages whose thumbnail is already written.
+    """
+    thumbnail_workers.wait_for(path, THUMBNAIL_WAIT)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    screenshot = os.path.join(SCREENSHOT_DIR, f"{stem}.{extension(RENDER_SETTINGS['format'])}")
+    deadline = time.monotonic() + THUMBNAIL_WAIT
+    while not os.path.exists(path) and os.path.exists(screenshot) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+@app.get("/thumbnail/{filename}")
+def get_thumbnail(filename: str, request: Request):
     """Serve thumbnail files"""
     try:
-        path = os.path.join(THUMBNAIL_DIR, filename)
-        if os.path.exists(path):
-            return send_file(path, mimetype="image/png")
-        return "Thumbnail not found", 404
+        # Thumbnails are written in the background, after the result that links them is returned
+        return thumbnail_server.serve(request, filename, wait=wait_for_thumbnail)
     except Exception as e:
         print(f"Thumbnail serve error: {e}")
-        return "Error serving thumbnail", 500
+        return PlainTextResponse("Error serving thumbnail", status_code=500)
 
 # --- Health check endpoint ---
-@app.route("/health", methods=["GET"])
+@app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return {
         "status": "healthy",
         "message": "Web Navigator API is running",
-        "timestamp": time.time()
-    })
+        "timestamp": time.time(),
+        "browser_pool": get_pool().stats(),
+        "page_cache": page_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "fetch_tiers": dict(tier_counts),
+        "thumbnails": thumbnail_workers.stats(),
+        "images": {"screenshots": screenshot_server.stats(), "thumbnails": thumbnail_server.stats()},
+        "storage": storage_janitor.stats(),
+        "asset_cache": asset_cache.stats(),
+        "profiles": browser_profiles.stats(),
+        "agents": orchestrator.limiter.stats(),
+        "jobs": job_workers.stats(),
+        "page_index": page_index.stats(),
+        "render_shards": render_shards.stats(),
+        "fetch": fetch_stage.stats()
+    }
+
+# --- Prometheus metrics ---
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of stage/request histograms and pool/cache counters (this worker only)"""
+    pool = get_pool().stats()
+    lines = stage_seconds.render() + request_seconds.render()
+    lines += render_samples("webnav_fetch_tier_total", "Pages served per fetch tier", "counter",
+                            [({"tier": tier}, count) for tier, count in sorted(tier_counts.items())])
+    lines += render_samples("webnav_browser_launches_total", "Browser launches", "counter", [({}, pool["launches"])])
+    lines += render_samples("webnav_browser_recycles_total", "Browser recycles", "counter", [({}, pool["recycles"])])
+    lines += render_samples("webnav_browser_active_contexts", "Open browser contexts", "gauge",
+                            [({"slot": s["index"]}, s["active_contexts"]) for s in pool["slots"]])
+    lines += render_samples("webnav_cache_hits_total", "Cache hits", "counter", [
+        ({"cache": "page"}, page_cache.stats()["hits"]),
+        ({"cache": "asset"}, asset_cache.stats()["hits"]),
+        ({"cache": "search"}, search_cache.stats()["hits"]),
+        ({"cache": "page_index"}, page_index.hits),
+        ({"cache": "plan"}, orchestrator.llm.cache.stats()["hits"] if orchestrator.llm.cache else 0)
+    ])
+    lines += render_samples("webnav_agent_runs", "Agent runs by state", "gauge", [
+        ({"state": "running"}, orchestrator.limiter.running),
+        ({"state": "queued"}, orchestrator.limiter.queued)
+    ])
+    storage = storage_janitor.stats()
+    lines += render_samples("webnav_storage_bytes", "Bytes of screenshots and thumbnails on disk", "gauge",
+                            [({}, round(storage["size_mb"] * 1024 * 1024))])
+    lines += render_samples("webnav_storage_files", "Screenshot and thumbnail files on disk", "gauge", [({}, storage["files"])])
+    lines += render_samples("webnav_storage_removed_total", "Files removed by the storage janitor", "counter", [
+        ({"reason": "evicted"}, storage["evicted"]),
+        ({"reason": "expired"}, storage["expired"])
+    ])
+    fetch = fetch_stage.stats()
+    lines += render_samples("webnav_fetch_hedges_cancelled_total", "Hedged page loads cancelled after enough pages loaded",
+                            "counter", [({}, fetch["hedges_cancelled"])])
+    lines += render_samples("webnav_host_circuits_opened_total", "Host circuit breaker trips", "counter", [({}, fetch["opened"])])
+    lines += render_samples("webnav_host_circuits_open", "Hosts whose circuit is open", "gauge", [({}, len(fetch["open"]))])
+    lines += render_samples("webnav_render_shard_pages_total", "Pages rendered per shard process", "counter",
+                            [({"shard": s["index"]}, s["pages"]) for s in render_shards.stats()["shards"]])
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 # --- Clean up old files (optional) ---
 def cleanup_old_files():
-    """Clean up old screenshot and thumbnail files"""
+    """Drop expired page cache entries, finished jobs, cached assets, profiles and old indexed pages; images are the janitor's"""
     try:
-        current_time = time.time()
-        for directory in [SCREENSHOT_DIR, THUMBNAIL_DIR]:
-            for filename in os.listdir(directory):
-                filepath = os.path.join(directory, filename)
-                if os.path.isfile(filepath):
-                    file_age = current_time - os.path.getctime(filepath)
-                    # Remove files older than 1 hour
-                    if file_age > 3600:
-                        os.remove(filepath)
-                        print(f"Cleaned up old file: {filename}")
+        removed = page_cache.sweep()
+        if removed:
+            print(f"Cleaned up {removed} expired cache entries and files")
+        removed_jobs = job_store.sweep()
+        if removed_jobs:
+            print(f"Removed {removed_jobs} finished jobs past retention")
+        removed_assets = asset_cache.sweep() + browser_profiles.sweep()
+        if removed_assets:
+            print(f"Removed {removed_assets} expired cached assets and browser profiles")
+        removed_pages = page_index.sweep()
+        if removed_pages:
+            print(f"Removed {removed_pages} pages from the page index")
     except Exception as e:
         print(f"Cleanup error: {e}")
 
 if __name__ == "__main__":
+    host = os.getenv("HOST", "127.0.0.1")
+    port = int(os.getenv("PORT", "5000"))
     print("Starting Web Navigator AI Agent Backend...")
-    print("Server will be available at: http://127.0.0.1:5000")
-    print("Make sure to install dependencies: pip install flask flask-cors requests beautifulsoup4 playwright pillow")
+    print(f"Server will be available at: http://{host}:{port}")
+    print("Make sure to install dependencies: pip install -r requirements.txt")
     print("Also run: playwright install chromium")
+    print("Run from the backend directory with: python -m app.main")
     
-    # Optional: Clean up old files on startup
-    cleanup_old_files()
-    
-    app.run(
-        host="127.0.0.1", 
-        port=5000, 
-        debug=True,
-        threaded=True
-    )
\ No newline at end of file
+    # Each uvicorn worker is its own process with its own browser pool and in-memory caches; the page,
+    # search and plan caches, page index and job queue are on disk, so every worker sees the others' writes
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        workers=int(os.getenv("WEB_WORKERS", "4"))
+    )
@@ -0,0 +1,221 @@
+# backend/app/page_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "cache/pages")
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """Canonical form of a URL for cache keys: lowercase host, no fragment, sorted query, no trackers"""
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or "https").lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunparse((scheme, host, parsed.path or "/", "", urlencode(query), ""))
+
+
+def cache_key(url, settings):
+    """Content address of a rendered page: normalized URL plus the render settings"""
+    payload = json.dumps({"url": normalize_url(url), "settings": settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class PageCache:
+    """TTL + size-bounded LRU cache of rendered pages (text, screenshot, thumbnail).
+
+    Metadata lives in CACHE_DIR/<key>.json and images are named after the key
+    in the screenshot/thumbnail directories, so identical renders are reused
+    across requests, restarts and processes. An in-memory index mirrors the
+    disk state; keys it lacks are looked up on disk, where other processes
+    may have written them.
+    """
+
+    def __init__(self, screenshot_dir, thumbnail_dir, cache_dir=CACHE_DIR, ttl=None, max_mb=None):
+        self.screenshot_dir = screenshot_dir
+        self.thumbnail_dir = thumbnail_dir
+        self.cache_dir = cache_dir
+        self.ttl = ttl or float(os.getenv("PAGE_CACHE_TTL", "3600"))
+        self.max_bytes = (max_mb or float(os.getenv("PAGE_CACHE_MAX_MB", "500"))) * 1024 * 1024
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # --- Paths ---
+    def screenshot_path(self, key, ext="png"):
+        return os.path.join(self.screenshot_dir, f"page_{key}.{ext}")
+
+    def thumbnail_path(self, key, ext="png"):
+        return os.path.join(self.thumbnail_dir, f"page_{key}.{ext}")
+
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entry_files(self, entry):
+        files = [self._meta_path(entry["key"])]
+        files += [entry[f] for f in ("screenshot", "thumbnail") if entry.get(f)]
+        return files
+
+    @staticmethod
+    def _size_of(paths):
+        total = 0
+        for path in paths:
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                continue
+        return total
+
+    # --- Index maintenance ---
+    def _read_entry(self, path):
+        """Entry from a metadata file, with its current size; None if unreadable"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            # Hits bump the metadata file's mtime (see get), so it carries the last access across processes
+            entry["last_access"] = os.path.getmtime(path)
+        except (OSError, ValueError):
+            return None
+        entry["size"] = self._size_of(self._entry_files(entry))
+        return entry
+
+    def _add(self, entry):
+        """Put an entry at the most recently used end of the index; caller holds the lock"""
+        previous = self._index.pop(entry["key"], None)
+        if previous is not None:
+            self._bytes -= previous.get("size", 0)
+        self._index[entry["key"]] = entry
+        self._bytes += entry["size"]
+
+    def _load_index(self):
+        """Rebuild the in-memory index from metadata files, oldest access first"""
+        entries = [
+            self._read_entry(os.path.join(self.cache_dir, filename))
+            for filename in os.listdir(self.cache_dir) if filename.endswith(".json")
+        ]
+        for entry in sorted(filter(None, entries), key=lambda e: e["last_access"]):
+            self._add(entry)
+
+    def _load_entry(self, key):
+        """Adopt an entry another process wrote since this index was built; caller holds the lock"""
+        entry = self._read_entry(self._meta_path(key))
+        if entry is not None:
+            self._add(entry)
+        return entry
+
+    def _drop(self, key):
+        """Remove an entry and its files; caller holds the lock"""
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.get("size", 0)
+        for path in self._entry_files(entry):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _expired(self, entry, now):
+        return now - entry["created_at"] > self.ttl
+
+    def _evict(self):
+        """Drop least-recently-used entries until under the size bound; caller holds the lock"""
+        while self._bytes > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            self._drop(key)
+
+    # --- Public API ---
+    def get(self, url, settings):
+        """Return a cached page result for url+settings, or None if missing, expired or incomplete"""
+        key = cache_key(url, settings)
+        now = time.time()
+        with self._lock:
+            # Other web workers and render shards share the directory, so check the disk before missing
+            entry = self._index.get(key) or self._load_entry(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            missing = [p for p in (entry.get("screenshot"), entry.get("thumbnail")) if p and not os.path.exists(p)]
+            if self._expired(entry, now) or missing:
+                self._drop(key)
+                self.misses += 1
+                return None
+            entry["last_access"] = now
+            self._index.move_to_end(key)
+            self.hits += 1
+            try:
+                os.utime(self._meta_path(key), (now, now))
+            except OSError:
+                pass
+            return {
+                "content": entry["content"],
+                "text": entry.get("text"),
+                "screenshot": entry.get("screenshot"),
+                "thumbnail": entry.get("thumbnail"),
+                "status": entry["status"],
+                "cached": True
+            }
+
+    def put(self, url, settings, result):
+        """Store a successful page result; its screenshot/thumbnail must already be at the key's paths"""
+        if result.get("status") != "success":
+            return
+        key = cache_key(url, settings)
+        now = time.time()
+        entry = {
+            "key": key,
+            "url": normalize_url(url),
+            "content": result["content"],
+            "text": result.get("text"),
+            "screenshot": result.get("screenshot"),
+            "thumbnail": result.get("thumbnail"),
+            "status": result["status"],
+            "created_at": now,
+            "last_access": now
+        }
+        try:
+            with open(self._meta_path(key), "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.utime(self._meta_path(key), (now, now))
+        except OSError as e:
+            print(f"Page cache write error for {url}: {e}")
+            return
+        entry["size"] = self._size_of(self._entry_files(entry))
+        with self._lock:
+            self._add(entry)
+            self._evict()
+
+    def sweep(self):
+        """Drop expired entries; stray image files are left to the storage janitor"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for key in [k for k, e in self._index.items() if self._expired(e, now)]:
+                self._drop(key)
+                removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses
+            }
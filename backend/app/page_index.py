@@ -0,0 +1,330 @@
+# backend/app/page_index.py
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from app.page_cache import normalize_url
+
+PAGE_INDEX_PATH = os.getenv("PAGE_INDEX_PATH", "cache/pages.sqlite3")
+
+# Bumped when the schema changes; the index is derived data, so an old one is dropped and rebuilt
+SCHEMA_VERSION = 2
+
+# pages holds the rows; pages_fts is an external-content FTS5 index over the title and the page's
+# full extracted text (content is only the result-card snippet), kept in step by triggers.
+# queries maps each normalized query answered live to the pages it returned, in rank order.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT,
+    content TEXT NOT NULL,
+    text TEXT NOT NULL,
+    screenshot TEXT,
+    thumbnail TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_fetched ON pages (fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title, text, content='pages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO pages_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    urls TEXT NOT NULL,
+    answered_at REAL NOT NULL
+);
+"""
+
+DROP_SCHEMA = """
+DROP TABLE IF EXISTS pages_fts;
+DROP TABLE IF EXISTS pages;
+DROP TABLE IF EXISTS queries;
+"""
+
+UPSERT = (
+    "INSERT INTO pages (url, link, title, category, content, text, screenshot, thumbnail, fetched_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (url) DO UPDATE SET link = excluded.link, title = excluded.title, "
+    "category = excluded.category, content = excluded.content, text = excluded.text, "
+    "screenshot = excluded.screenshot, thumbnail = excluded.thumbnail, fetched_at = excluded.fetched_at"
+)
+
+UPSERT_QUERY = (
+    "INSERT INTO queries (query, urls, answered_at) VALUES (?, ?, ?) "
+    "ON CONFLICT (query) DO UPDATE SET urls = excluded.urls, answered_at = excluded.answered_at"
+)
+
+
+def query_words(text):
+    """Distinct lowercase words of a free-text query, in order"""
+    return list(dict.fromkeys(re.findall(r"\w+", text.lower())))
+
+
+def query_key(text):
+    """Exact-repeat key for a query: its words, ignoring case, punctuation and spacing"""
+    return " ".join(query_words(text))
+
+
+def match_query(text):
+    """FTS5 MATCH expression matching any word of a free-text query; None if it has no words.
+
+    BM25 still ranks pages matching more (and rarer) words first; search() drops weak matches.
+    """
+    return " OR ".join(f'"{word}"' for word in query_words(text)) or None
+
+
+class PageIndex:
+    """Local SQLite FTS5 index of every page extracted for a search, for answering repeat queries.
+
+    Successful results are queued by the request that produced them and written
+    in batches, one transaction each, by a background thread. A query answered
+    live is remembered with the pages it returned, so an exact repeat is served
+    from those pages while they are fresh. Other queries go through search(),
+    which ranks pages matching any query word by BM25 over the full extracted
+    text (title hits weigh TITLE_WEIGHT times a text hit), keeps those scoring at
+    least min_score and skips pages fetched longer ago than the freshness cutoff.
+    """
+
+    TITLE_WEIGHT = 10.0
+
+    def __init__(self, path=PAGE_INDEX_PATH, max_age=None, retention=None, max_pages=None,
+                 batch=None, flush_interval=None, min_score=None):
+        self.path = path
+        # Default freshness cutoff for answers; rows are kept longer (retention) for callers that accept older pages
+        self.max_age = max_age or float(os.getenv("PAGE_INDEX_MAX_AGE", "86400"))
+        self.retention = retention or float(os.getenv("PAGE_INDEX_RETENTION", "604800"))
+        self.max_pages = max_pages if max_pages is not None else int(os.getenv("PAGE_INDEX_MAX_PAGES", "100000"))
+        self.batch = batch or int(os.getenv("PAGE_INDEX_BATCH", "200"))
+        self.flush_interval = flush_interval or float(os.getenv("PAGE_INDEX_FLUSH_INTERVAL", "1"))
+        # Weakest BM25 score (higher is better) a search hit may have; words common to most pages score near 0
+        self.min_score = min_score if min_score is not None else float(os.getenv("PAGE_INDEX_MIN_SCORE", "1.0"))
+        self.enabled = self.max_pages > 0
+        self._local = threading.local()
+        self._pending = queue.Queue()
+        self._thread = None
+        self.indexed = 0
+        self.hits = 0
+        self.misses = 0
+        if not self.enabled:
+            return
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            db = self._connect()
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                db.executescript(DROP_SCHEMA)
+                db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            db.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5
+            print(f"Page index disabled: {e}")
+            self.enabled = False
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    # --- Writes ---
+    def add(self, query, results):
+        """Queue the API-shaped results returned for a query; failed and empty pages are skipped.
+
+        A result's "text" is the page's full extracted text; without it the card content is indexed.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = []
+        for result in results:
+            if result.get("status") != "success" or not (result.get("content") or "").strip():
+                continue
+            rows.append((
+                normalize_url(result["link"]), result["link"], result.get("title") or "",
+                result.get("category"), result["content"], result.get("text") or result["content"],
+                result.get("screenshot"), result.get("thumbnail"), now
+            ))
+        if rows:
+            self._pending.put((query_key(query), json.dumps([row[0] for row in rows]), now, rows))
+
+    def flush(self):
+        """Write every queued page, about a batch per transaction; returns the number written"""
+        written = 0
+        while True:
+            items = []
+            size = 0
+            while size < self.batch:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                size += len(item[3])
+            if not items:
+                return written
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                for key, urls, answered_at, rows in items:
+                    db.executemany(UPSERT, rows)
+                    if key:
+                        db.execute(UPSERT_QUERY, (key, urls, answered_at))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            written += size
+            self.indexed += size
+
+    # --- Queries ---
+    @staticmethod
+    def _result(row, score=None):
+        return {
+            "title": row["title"],
+            "link": row["link"],
+            "content": row["content"],
+            "screenshot": row["screenshot"],
+            "thumbnail": row["thumbnail"] if row["thumbnail"] and os.path.exists(row["thumbnail"]) else None,
+            "category": row["category"] or "general",
+            "fetched_at": row["fetched_at"],
+            "score": score
+        }
+
+    def recall(self, text, max_age=None, screenshots=False):
+        """Pages an earlier live run returned for this exact query, if it ran within max_age; else []"""
+        key = query_key(text)
+        if not self.enabled or not key:
+            return []
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        db = self._connect()
+        row = db.execute("SELECT urls FROM queries WHERE query = ? AND answered_at >= ?", (key, cutoff)).fetchone()
+        if row is None:
+            return []
+        urls = json.loads(row["urls"])
+        pages = {
+            page["url"]: page for page in db.execute(
+                f"SELECT * FROM pages WHERE url IN ({', '.join('?' * len(urls))}) AND fetched_at >= ?",
+                (*urls, cutoff)
+            )
+        }
+        results = []
+        for url in urls:
+            page = pages.get(url)
+            if page is None or (screenshots and not (page["screenshot"] and os.path.exists(page["screenshot"]))):
+                continue
+            results.append(self._result(page))
+        return results
+
+    def search(self, text, limit=5, max_age=None, screenshots=False):
+        """Best BM25 matches for a free-text query fetched within max_age seconds, as API-shaped results"""
+        query = match_query(text)
+        if not self.enabled or query is None:
+            return []
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        sql = (
+            "SELECT p.*, bm25(pages_fts, ?, 1.0) AS score FROM pages_fts "
+            "JOIN pages p ON p.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ? AND p.fetched_at >= ? AND score <= ?"
+        )
+        if screenshots:
+            sql += " AND p.screenshot IS NOT NULL"
+        # A few spare rows in case some screenshots were evicted since
+        rows = self._connect().execute(
+            sql + " ORDER BY score LIMIT ?", (self.TITLE_WEIGHT, query, cutoff, -self.min_score, limit * 2)
+        ).fetchall()
+        results = []
+        for row in rows:
+            if screenshots and not os.path.exists(row["screenshot"]):
+                continue
+            results.append(self._result(row, round(-row["score"], 4)))
+            if len(results) >= limit:
+                break
+        return results
+
+    def answer(self, text, count, max_age=None, screenshots=False):
+        """Results for the query from the index, or None when it can't stand in for a live search.
+
+        An exact repeat of a recent live query is answered with whichever of its pages are still
+        fresh; any other query needs `count` matches from search().
+        """
+        results = self.recall(text, max_age=max_age, screenshots=screenshots)
+        if not results:
+            results = self.search(text, count, max_age=max_age, screenshots=screenshots)
+            if len(results) < count:
+                results = None
+        if results is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return results
+
+    # --- Maintenance ---
+    def sweep(self):
+        """Delete pages and remembered queries past retention, then the oldest pages beyond max_pages"""
+        if not self.enabled:
+            return 0
+        db = self._connect()
+        cutoff = time.time() - self.retention
+        db.execute("DELETE FROM queries WHERE answered_at < ?", (cutoff,))
+        removed = db.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,)).rowcount
+        removed += db.execute(
+            "DELETE FROM pages WHERE id IN (SELECT id FROM pages ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_pages,)
+        ).rowcount
+        return removed
+
+    # --- Background writer ---
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="page-index", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Page index write error: {e}")
+
+    def stop(self, timeout=5):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
+        if self.enabled:
+            self.flush()
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+        pages = self._connect().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {
+            "enabled": True,
+            "pages": pages,
+            "pending": self._pending.qsize(),
+            "indexed": self.indexed,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,166 @@
+# backend/app/render_policy.py
+import os
+import time
+from urllib.parse import urlparse
+
+from app.extraction import CONTENT_SELECTORS
+
+# Ad, analytics and tracker hosts; subdomains match too
+BLOCKED_DOMAINS = [
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "facebook.net",
+    "connect.facebook.net", "scorecardresearch.com", "adnxs.com", "taboola.com", "outbrain.com",
+    "criteo.com", "criteo.net", "amazon-adsystem.com", "hotjar.com", "segment.io", "segment.com",
+    "quantserve.com", "moatads.com", "pubmatic.com", "rubiconproject.com", "openx.net", "adsrvr.org",
+    "chartbeat.com", "chartbeat.net", "nr-data.net", "optimizely.com", "mixpanel.com", "branch.io",
+    "quantcount.com", "yieldmo.com", "teads.tv", "casalemedia.com", "bidswitch.net", "smartadserver.com",
+    "zedo.com", "adform.net", "bluekai.com", "krxd.net", "exelator.com", "everesttech.net", "demdex.net",
+    "omtrdc.net", "clarity.ms", "bat.bing.com", "ads-twitter.com", "static.ads-twitter.com",
+    "analytics.tiktok.com", "sentry-cdn.com", "fullstory.com", "mouseflow.com", "crazyegg.com",
+]
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class RenderPolicy:
+    """Which requests a page may make and how long to wait before treating it as rendered"""
+
+    def __init__(self, block_types=None, allow_types=None, block_domains=None,
+                 wait=None, budget_ms=None, quiet_ms=None):
+        self.block_types = set(block_types if block_types is not None else _env_list("RENDER_BLOCK_TYPES", ["media", "font"]))
+        # When set, only these resource types are allowed through
+        self.allow_types = set(allow_types if allow_types is not None else _env_list("RENDER_ALLOW_TYPES", []))
+        self.block_domains = tuple(
+            block_domains if block_domains is not None
+            else BLOCKED_DOMAINS + _env_list("RENDER_BLOCK_DOMAINS", [])
+        )
+        self.wait = wait or os.getenv("RENDER_WAIT", "budget")
+        self.budget_ms = budget_ms or int(os.getenv("RENDER_BUDGET_MS", "4000"))
+        self.quiet_ms = quiet_ms or int(os.getenv("RENDER_QUIET_MS", "500"))
+
+    def blocked_host(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.block_domains)
+
+    def should_block(self, resource_type, url):
+        if resource_type == "document":
+            return False
+        if self.allow_types and resource_type not in self.allow_types:
+            return True
+        return resource_type in self.block_types or self.blocked_host(url)
+
+
+class PageMetrics:
+    """Per-page network and timing counters collected while a page loads"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.bytes_downloaded = 0
+        self.requests = 0
+        self.blocked = 0
+        self.load_ms = None
+        self.ready = None
+
+    def mark_navigation(self):
+        """Restart the load timer for a new navigation on the same page"""
+        self.started = time.monotonic()
+
+    def mark_ready(self, reason):
+        self.load_ms = round((time.monotonic() - self.started) * 1000)
+        self.ready = reason
+
+    def to_dict(self):
+        return {
+            "bytes_downloaded": self.bytes_downloaded,
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "load_ms": self.load_ms,
+            "ready": self.ready
+        }
+
+
+# Resolves once main content exists and the DOM has been quiet for quietMs, or when the budget runs out
+DOM_STABLE_SCRIPT = """
+({ quietMs, budgetMs, selectors }) => new Promise(resolve => {
+    const start = performance.now();
+    let last = start;
+    const observer = new MutationObserver(() => { last = performance.now(); });
+    observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    const hasContent = () => selectors.some(s => document.querySelector(s))
+        || (document.body && document.body.textContent.length > 200);
+    const tick = () => {
+        const now = performance.now();
+        if (now - start >= budgetMs) { observer.disconnect(); return resolve("budget"); }
+        if (hasContent() && now - last >= quietMs) { observer.disconnect(); return resolve("dom_stable"); }
+        setTimeout(tick, 100);
+    };
+    tick();
+})
+"""
+
+
+async def prepare_page(page, policy, assets=None):
+    """Install request filtering and byte accounting on a fresh page; returns its PageMetrics.
+
+    With an AssetCache, static subresources are served from (and stored in) the shared disk cache.
+    """
+    metrics = PageMetrics()
+
+    async def route_handler(route):
+        request = route.request
+        if policy.should_block(request.resource_type, request.url):
+            metrics.blocked += 1
+            await route.abort()
+        elif assets is not None and assets.cacheable(request):
+            await assets.handle(route)
+        else:
+            await route.continue_()
+
+    await page.route("**/*", route_handler)
+
+    # Chromium reports actual bytes on the wire per request through CDP
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+
+        def on_loading_finished(event):
+            metrics.requests += 1
+            metrics.bytes_downloaded += int(event.get("encodedDataLength", 0))
+
+        cdp.on("Network.loadingFinished", on_loading_finished)
+    except Exception as e:
+        print(f"Network metrics unavailable: {e}")
+
+    return metrics
+
+
+async def wait_until_ready(page, policy, metrics):
+    """Wait for the page per the policy: DOM-stable render budget, or the legacy networkidle wait"""
+    if policy.wait == "networkidle":
+        try:
+            await page.wait_for_load_state("networkidle", timeout=10000)
+            metrics.mark_ready("networkidle")
+        except Exception:
+            # If networkidle fails, just wait a bit
+            await page.wait_for_timeout(3000)
+            metrics.mark_ready("timeout")
+        return
+
+    try:
+        reason = await page.evaluate(DOM_STABLE_SCRIPT, {
+            "quietMs": policy.quiet_ms,
+            "budgetMs": policy.budget_ms,
+            "selectors": CONTENT_SELECTORS
+        })
+    except Exception as e:
+        print(f"Render budget wait failed: {e}")
+        reason = "error"
+    metrics.mark_ready(reason)
+
+
+render_policy = RenderPolicy()
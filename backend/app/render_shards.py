@@ -0,0 +1,265 @@
+# backend/app/render_shards.py
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import Future
+from functools import partial
+from urllib.parse import urlparse
+
+from app.fetch_stage import error_result
+
+CANCEL = "cancel"
+
+
+def _shard_main(conn, index):
+    """Render worker process: its own browser pool, fetch stage and page cache index.
+
+    Requests arrive as (request_id, [(idx, url)], screenshots, want); every finished page is
+    sent back as (request_id, idx, result) once its thumbnail is written, with the load's own
+    duration in result["load_seconds"]. (request_id, CANCEL) stops a request's loads.
+    Screenshots and thumbnails stay on the shared disk, so only their paths cross the
+    process boundary.
+    """
+    # Never let a shard start shards of its own when it imports the pipeline
+    os.environ["RENDER_PROCESSES"] = "0"
+    import asyncio
+    import time
+    from contextlib import aclosing
+    from functools import partial
+
+    from app.browser_pool import get_pool
+    from app.fetch_stage import fetch_stage
+    from app.imaging import thumbnail_workers
+    from app.main import fetch_page
+
+    pool = get_pool()
+    pool.start()
+    send_lock = threading.Lock()
+
+    def reply(message):
+        with send_lock:
+            try:
+                conn.send(message)
+            except (BrokenPipeError, OSError):
+                pass
+
+    async def timed_fetch(url, screenshots):
+        # Timed inside the fetch stage's slots, so queueing in this shard is not counted
+        started = time.monotonic()
+        result = await fetch_page(url, screenshots=screenshots)
+        return {**result, "load_seconds": time.monotonic() - started}
+
+    async def render(request_id, items, screenshots, want):
+        urls = [url for _, url in items]
+        fetch_fn = partial(timed_fetch, screenshots=screenshots)
+        async with aclosing(fetch_stage.iter_fetches(urls, fetch_fn, want=want)) as fetches:
+            async for position, result in fetches:
+                # The parent cannot wait on this process's thumbnail workers, so only finished images leave
+                if result.get("thumbnail"):
+                    await asyncio.to_thread(thumbnail_workers.wait_for, result["thumbnail"])
+                reply((request_id, items[position][0], result))
+
+    # request_id -> concurrent future of its render on the pool loop
+    running = {}
+
+    def finished(request_id, future):
+        running.pop(request_id, None)
+        error = None
+        if future.cancelled():
+            error = "cancelled"
+        elif future.exception() is not None:
+            error = str(future.exception())
+        reply((request_id, None, error))
+
+    print(f"Render shard {index} started (pid {os.getpid()})")
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        if message[1] == CANCEL:
+            # Nobody is waiting for the request's pages any more (hedges done, client gone)
+            future = running.get(message[0])
+            if future is not None:
+                future.cancel()
+            continue
+        request_id, items, screenshots, want = message
+        future = running[request_id] = pool.submit(render, request_id, items, screenshots, want)
+        future.add_done_callback(partial(finished, request_id))
+    pool.shutdown()
+
+
+class RenderShard:
+    """Parent-side handle of one render process and its in-flight requests"""
+
+    def __init__(self, index, context):
+        self.index = index
+        self.context = context
+        self.process = None
+        self.conn = None
+        self.pending = {}
+        self.pages = 0
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_shard_main, args=(child_conn, self.index), name=f"render-shard-{self.index}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        threading.Thread(target=self._read, name=f"render-shard-{self.index}-reader", daemon=True).start()
+
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def send(self, request_id, items, futures, screenshots, want=None):
+        with self._lock:
+            self.pending[request_id] = futures
+        with self._send_lock:
+            self.conn.send((request_id, items, screenshots, want))
+        for future in futures.values():
+            future.add_done_callback(partial(self._cancelled, request_id))
+
+    def _cancelled(self, request_id, future):
+        """Once every page of a request is cancelled or answered, stop the loads still running for it"""
+        if not future.cancelled():
+            return
+        with self._lock:
+            futures = self.pending.get(request_id)
+            if futures is None or not all(f.done() for f in futures.values()):
+                return
+            del self.pending[request_id]
+        try:
+            with self._send_lock:
+                self.conn.send((request_id, CANCEL))
+        except (BrokenPipeError, OSError):
+            pass
+
+    def _read(self):
+        while True:
+            try:
+                request_id, idx, payload = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                futures = self.pending.get(request_id)
+                if idx is None:
+                    self.pending.pop(request_id, None)
+            if futures is None:
+                continue
+            if idx is not None:
+                self.pages += 1
+                # The caller may have stopped waiting (hedged loads, disconnects) and cancelled it
+                if not futures[idx].done():
+                    futures[idx].set_result(payload)
+                continue
+            # End of request: pages a finished request never answered are hedges it cut off after
+            # `want` loads (None, as from fetch_stage); after a failure they become error results
+            for future in futures.values():
+                if not future.done():
+                    future.set_result(error_result(payload) if payload else None)
+        # The process died: fail everything still waiting on it
+        with self._lock:
+            orphaned, self.pending = self.pending, {}
+        for futures in orphaned.values():
+            for future in futures.values():
+                if not future.done():
+                    future.set_result(error_result(f"render shard {self.index} exited"))
+
+    def stop(self, timeout=15):
+        if self.process is None:
+            return
+        try:
+            with self._send_lock:
+                self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class RenderShards:
+    """Browser rendering sharded over worker processes, each with its own browser pool.
+
+    URLs are routed by host, so a host's pages always land on the same process:
+    its keep-alive connections, static HTTP client and page cache index stay warm there,
+    and per-host politeness limits hold globally. Results come back as concurrent futures.
+    RENDER_PROCESSES=0 (the default) keeps rendering in-process.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes if processes is not None else int(os.getenv("RENDER_PROCESSES", "0"))
+        # spawn: Playwright and its driver threads must not be inherited through fork
+        self._context = multiprocessing.get_context("spawn")
+        self._shards = []
+        self._ids = itertools.count()
+        self._start_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.processes > 0
+
+    def start(self):
+        with self._start_lock:
+            if self._shards or not self.enabled:
+                return
+            self._shards = [RenderShard(i, self._context) for i in range(self.processes)]
+            for shard in self._shards:
+                shard.start()
+
+    def shard_for(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        return zlib.crc32(host.encode("utf-8")) % self.processes
+
+    def _ensure_alive(self, shard):
+        with self._start_lock:
+            if not shard.alive():
+                print(f"Render shard {shard.index} is down, restarting")
+                shard.start()
+
+    def submit(self, urls, screenshots=True, want=None):
+        """Dispatch urls to their shards; returns one Future per url, in input order.
+
+        Each shard stops after `want` successful loads of its own share. Cancelling
+        every unfinished future of a shard's share cancels its loads in the shard.
+        """
+        self.start()
+        futures = [Future() for _ in urls]
+        batches = {}
+        for idx, url in enumerate(urls):
+            batches.setdefault(self.shard_for(url), []).append((idx, url))
+        for index, items in batches.items():
+            shard = self._shards[index]
+            self._ensure_alive(shard)
+            request_id = next(self._ids)
+            shard.send(request_id, items, {idx: futures[idx] for idx, _ in items}, screenshots, want)
+        return futures
+
+    def shutdown(self):
+        with self._start_lock:
+            shards, self._shards = self._shards, []
+        for shard in shards:
+            shard.stop()
+
+    def stats(self):
+        return {
+            "processes": self.processes,
+            "shards": [
+                {
+                    "index": shard.index,
+                    "pid": shard.process.pid if shard.process else None,
+                    "alive": shard.alive(),
+                    "in_flight": len(shard.pending),
+                    "pages": shard.pages
+                }
+                for shard in self._shards
+            ]
+        }
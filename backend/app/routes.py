@@ -1,16 +1,57 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from app.agents.orchestrator import Orchestrator
+from app.agents.plan_compiler import PlanError
+from app.agents.session import QueueFull
 import asyncio
 
 router = APIRouter()
-orchestrator = Orchestrator()  # initializes LLM + WebAgent
+orchestrator = Orchestrator()  # initializes LLM + WebAgent; runs are isolated per AgentSession
+
+DISCONNECT_POLL_SECONDS = 0.5
 
 class CommandRequest(BaseModel):
     command: str
 
+async def run_until_disconnect(request: Request, coro):
+    """Await coro, cancelling it if the client goes away first; returns (finished, result)"""
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return True, task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                return False, None
+    finally:
+        task.cancel()
+
 @router.post("/api/agents/execute")
-async def execute_agent(req: CommandRequest):
+async def execute_agent(req: CommandRequest, request: Request):
     """Execute any natural language instruction via AI agent."""
-    result = await orchestrator.execute_command(req.command)
+    try:
+        finished, result = await run_until_disconnect(request, orchestrator.execute_command(req.command))
+    except QueueFull as e:
+        return JSONResponse(
+            {"status": "busy", "error": str(e), "running": e.running, "queued": e.queued},
+            status_code=429,
+            headers={"Retry-After": "5"}
+        )
+    except PlanError as e:
+        return JSONResponse({"status": "invalid_plan", "errors": e.errors}, status_code=422)
+    except asyncio.TimeoutError:
+        return JSONResponse({"status": "timeout", "error": "Agent run timed out"}, status_code=504)
+    except Exception as e:
+        print(f"Agent run error for {req.command!r}: {e}")
+        return JSONResponse({"status": "error", "error": f"Agent error: {e}"}, status_code=500)
+    if not finished:
+        print(f"Client disconnected, cancelled agent run: {req.command}")
+        return JSONResponse({"status": "cancelled"}, status_code=499)
     return {"status": "ok", "result": result}
+
+@router.get("/api/agents/status")
+async def agent_status():
+    """Running and queued agent runs in this worker."""
+    return orchestrator.limiter.stats()
@@ -0,0 +1,98 @@
+# backend/app/search_cache.py
+import hashlib
+import json
+import os
+import time
+
+from app.ttl_cache import SingleFlight, TTLCache
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a search query"""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Search results cache: in-memory LRU with TTL, optional on-disk layer and single-flight coalescing"""
+
+    def __init__(self, ttl=None, max_entries=None, disk_dir=None):
+        self.ttl = ttl or float(os.getenv("SEARCH_CACHE_TTL", "600"))
+        self.memory = TTLCache(
+            max_entries=max_entries or int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512")),
+            ttl=self.ttl
+        )
+        self.disk_dir = disk_dir if disk_dir is not None else os.getenv("SEARCH_CACHE_DIR", "cache/search")
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, query, limit):
+        return f"{normalize_query(query)}\x00{limit}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, results):
+        if not self.disk_dir:
+            return
+        try:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"Search cache write error: {e}")
+
+    def get_or_fetch(self, query, limit, fetch_fn):
+        """Return cached results for query/limit, otherwise call fetch_fn(query, limit) once for all concurrent callers"""
+        key = self._key(query, limit)
+        results = self.memory.get(key)
+        if results is not None:
+            self.hits += 1
+            return results
+
+        results = self._read_disk(key)
+        if results is not None:
+            self.disk_hits += 1
+            self.memory.set(key, results)
+            return results
+
+        def fetch():
+            # Another flight may have filled the cache while we were waiting for the lock
+            cached = self.memory.get(key)
+            if cached is not None:
+                return cached
+            self.misses += 1
+            fresh = fetch_fn(query, limit)
+            # Empty results usually mean an upstream error, so they are not cached
+            if fresh:
+                self.memory.set(key, fresh)
+                self._write_disk(key, fresh)
+            return fresh
+
+        return self.flights.do(key, fetch)
+
+    def stats(self):
+        return {
+            "entries": len(self.memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.flights.coalesced
+        }
@@ -0,0 +1,93 @@
+# backend/app/search_parsers.py
+import os
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+# Tried in order; the first selector that matches anything wins
+RESULT_SELECTORS = [".result__a", ".result .result__title a", "a[href*='uddg']"]
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml is not None:
+    RESULT_XPATHS = [
+        etree.XPath(f"//a[{_has_class('result__a')}]"),
+        etree.XPath(f"//*[{_has_class('result')}]//*[{_has_class('result__title')}]//a"),
+        etree.XPath("//a[contains(@href, 'uddg')]"),
+    ]
+
+
+def parse_bs4(html, limit):
+    """Pure-Python fallback: full html.parser tree, CSS selectors tried in turn"""
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for selector in RESULT_SELECTORS:
+        links = soup.select(selector, limit=limit)
+        if links:
+            break
+    return [(" ".join(a.get_text().split()), a.get("href", "")) for a in links[:limit]]
+
+
+def parse_lxml(html, limit):
+    """libxml2 parse with precompiled XPath over the result anchors only"""
+    tree = lxml.html.fromstring(html)
+    links = []
+    for xpath in RESULT_XPATHS:
+        links = xpath(tree)
+        if links:
+            break
+    return [(" ".join(a.text_content().split()), a.get("href", "")) for a in links[:limit]]
+
+
+def parse_selectolax(html, limit):
+    """Lexbor-backed parse; only the matched result nodes are visited from Python"""
+    tree = HTMLParser(html)
+    links = []
+    for selector in RESULT_SELECTORS:
+        links = tree.css(selector)
+        if links:
+            break
+    return [(" ".join(a.text(deep=True).split()), a.attributes.get("href") or "") for a in links[:limit]]
+
+
+PARSERS = {"bs4": parse_bs4}
+if lxml is not None:
+    PARSERS["lxml"] = parse_lxml
+if HTMLParser is not None:
+    PARSERS["selectolax"] = parse_selectolax
+
+
+@lru_cache(maxsize=None)
+def _resolve_parser(name):
+    if name == "auto":
+        for candidate in ("selectolax", "lxml", "bs4"):
+            if candidate in PARSERS:
+                return PARSERS[candidate]
+    if name not in PARSERS:
+        print(f"Search parser '{name}' is not available, falling back to bs4")
+        return parse_bs4
+    return PARSERS[name]
+
+
+def get_parser(name=None):
+    """Parser backend by name; "auto" picks the fastest one installed"""
+    return _resolve_parser(name or os.getenv("SEARCH_PARSER", "auto"))
+
+
+def parse_result_links(html, limit, parser=None):
+    """Return up to `limit` (title, href) pairs for the result anchors in a DuckDuckGo HTML page"""
+    return get_parser(parser)(html, limit)
@@ -0,0 +1,124 @@
+# backend/app/static_fetch.py
+import os
+
+from bs4 import BeautifulSoup
+
+from app.extraction import CONTENT_SELECTORS, clean_content_text, full_text
+from app.http_client import get_http_client
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# Elements whose text forms one line, roughly what innerText would break on
+BLOCK_SELECTOR = "p, h1, h2, h3, h4, h5, h6, li, pre, blockquote, td, dd, figcaption"
+STRIP_TAGS = ["script", "style", "noscript", "template", "svg"]
+JS_MARKERS = ("enable javascript", "javascript is disabled", "requires javascript", "turn on javascript")
+
+STATIC_MIN_CHARS = int(os.getenv("STATIC_MIN_CHARS", "200"))
+STATIC_MAX_BYTES = int(os.getenv("STATIC_MAX_BYTES", str(3 * 1024 * 1024)))
+
+
+def _lines(texts):
+    lines = []
+    for text in texts:
+        line = " ".join(text.split())
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _extract_selectolax(html):
+    tree = HTMLParser(html)
+    tree.strip_tags(STRIP_TAGS)
+    root = None
+    for selector in CONTENT_SELECTORS:
+        root = tree.css_first(selector)
+        if root is not None:
+            break
+    root = root or tree.body
+    if root is None:
+        return ""
+    blocks = root.css(BLOCK_SELECTOR)
+    if blocks:
+        return _lines(node.text(deep=True) for node in blocks)
+    return root.text(deep=True, separator="\n")
+
+
+def _extract_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(STRIP_TAGS):
+        tag.decompose()
+    root = None
+    for selector in CONTENT_SELECTORS:
+        root = soup.select_one(selector)
+        if root is not None:
+            break
+    root = root or soup.body or soup
+    blocks = root.select(BLOCK_SELECTOR)
+    if blocks:
+        return _lines(node.get_text() for node in blocks)
+    return root.get_text("\n")
+
+
+def extract_main_text(html):
+    """Readability-style main text using the same selector priority as the browser tier"""
+    if HTMLParser is not None:
+        return _extract_selectolax(html)
+    return _extract_bs4(html)
+
+
+def needs_browser(html, content_text):
+    """True when the static HTML is probably an app shell that only renders with JavaScript"""
+    if len(content_text) < STATIC_MIN_CHARS:
+        return True
+    head = html[:20000].lower()
+    return len(content_text) < 2 * STATIC_MIN_CHARS and any(marker in head for marker in JS_MARKERS)
+
+
+def _read_html(response):
+    """Body of an HTML response as text, or None if it is not HTML or larger than STATIC_MAX_BYTES.
+
+    Oversized pages are rejected from Content-Length when the server sends one, and otherwise
+    as soon as the streamed body passes the cap, without downloading the rest.
+    """
+    if response.status_code >= 400 or "html" not in response.headers.get("content-type", ""):
+        return None
+    try:
+        if int(response.headers.get("content-length", 0)) > STATIC_MAX_BYTES:
+            return None
+    except ValueError:
+        pass
+    chunks, size = [], 0
+    for chunk in response.iter_bytes():
+        size += len(chunk)
+        if size > STATIC_MAX_BYTES:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+
+def static_fetch(url, user_agent):
+    """Plain GET + main-content extraction; returns a page result or None to fall back to the browser"""
+    try:
+        with get_http_client().stream("GET", url, headers={"User-Agent": user_agent}) as response:
+            html = _read_html(response)
+    except Exception as e:
+        print(f"Static fetch error for {url}: {e}")
+        return None
+    if html is None:
+        return None
+
+    main_text = extract_main_text(html)
+    content_text = clean_content_text(main_text)
+    if needs_browser(html, content_text):
+        return None
+
+    return {
+        "content": content_text,
+        "text": full_text(main_text),
+        "screenshot": None,
+        "thumbnail": None,
+        "status": "success"
+    }
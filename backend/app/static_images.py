@@ -0,0 +1,168 @@
+# backend/app/static_images.py
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi.responses import FileResponse, PlainTextResponse, Response
+
+# Plain file names only: no separators, no leading dot, no ".."
+SAFE_FILENAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,254}$")
+IMAGE_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp"}
+
+IMMUTABLE_MAX_AGE = int(os.getenv("IMAGE_MAX_AGE", str(365 * 24 * 3600)))
+
+
+def safe_path(directory, filename):
+    """Path of filename inside directory, or None if the name is not a plain image file name"""
+    if not SAFE_FILENAME_RE.match(filename) or ".." in filename:
+        return None
+    if os.path.splitext(filename)[1].lower() not in IMAGE_TYPES:
+        return None
+    path = os.path.join(directory, filename)
+    # Symlinks must not lead out of the directory either
+    if os.path.dirname(os.path.realpath(path)) != os.path.realpath(directory):
+        return None
+    return path
+
+
+def file_version(stat_result):
+    """Strong validator for a file: changes whenever it is rewritten"""
+    return f"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"
+
+
+def versioned_url(kind, path):
+    """/<kind>/<name>?v=<version> for an existing file; unversioned if it is not written yet"""
+    if not path:
+        return None
+    url = f"/{kind}/{os.path.basename(path)}"
+    try:
+        return f"{url}?v={file_version(os.stat(path))}"
+    except OSError:
+        return url
+
+
+def _not_modified(headers, etag, mtime):
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ImageServer:
+    """Conditional, cache-friendly serving of the images in one directory.
+
+    Responses carry a strong ETag and Last-Modified, so repeat loads revalidate
+    to 304s. A request whose ?v= matches the file's current version is marked
+    immutable. Small files are kept in an in-memory LRU; larger ones go
+    through FileResponse, which handles Range requests and hands the file to
+    the server (http.response.pathsend) when it supports zero-copy sends.
+    """
+
+    def __init__(self, directory, label, hot_max_mb=0, hot_item_kb=None, on_serve=None):
+        self.directory = directory
+        self.label = label
+        # Called with the file path whenever it is served or revalidated
+        self.on_serve = on_serve
+        self.hot_max_bytes = hot_max_mb * 1024 * 1024
+        self.hot_item_bytes = (hot_item_kb or int(os.getenv("IMAGE_HOT_MAX_KB", "256"))) * 1024
+        self._hot = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    # --- Hot set ---
+    def _hot_get(self, path, version):
+        with self._lock:
+            entry = self._hot.get(path)
+            if entry is None or entry[0] != version:
+                return None
+            self._hot.move_to_end(path)
+            return entry[1]
+
+    def _hot_put(self, path, version, body):
+        with self._lock:
+            previous = self._hot.pop(path, None)
+            if previous is not None:
+                self._hot_bytes -= len(previous[1])
+            self._hot[path] = (version, body)
+            self._hot_bytes += len(body)
+            while self._hot_bytes > self.hot_max_bytes and self._hot:
+                _, (_, evicted) = self._hot.popitem(last=False)
+                self._hot_bytes -= len(evicted)
+
+    def forget(self, path):
+        """Drop a file from the hot set, e.g. after it was deleted from disk"""
+        with self._lock:
+            entry = self._hot.pop(path, None)
+            if entry is not None:
+                self._hot_bytes -= len(entry[1])
+
+    # --- Serving ---
+    def serve(self, request, filename, wait=None):
+        path = safe_path(self.directory, filename)
+        if path is None:
+            return PlainTextResponse(f"{self.label} not found", status_code=404)
+        if wait is not None:
+            wait(path)
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return PlainTextResponse(f"{self.label} not found", status_code=404)
+        if not stat.S_ISREG(stat_result.st_mode):
+            return PlainTextResponse(f"{self.label} not found", status_code=404)
+
+        if self.on_serve is not None:
+            self.on_serve(path)
+        version = file_version(stat_result)
+        etag = f'"{version}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            # Versioned URLs never change content; bare names are re-rendered in place, so revalidate
+            "Cache-Control": (
+                f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+                if request.query_params.get("v") == version else "public, no-cache"
+            )
+        }
+        if _not_modified(request.headers, etag, stat_result.st_mtime):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        media_type = IMAGE_TYPES[os.path.splitext(path)[1].lower()]
+        hot = self.hot_max_bytes and stat_result.st_size <= self.hot_item_bytes and "range" not in request.headers
+        if hot:
+            body = self._hot_get(path, version)
+            if body is not None:
+                self.hits += 1
+                return Response(body, media_type=media_type, headers=headers)
+            self.misses += 1
+            try:
+                with open(path, "rb") as f:
+                    body = f.read()
+            except OSError:
+                return PlainTextResponse(f"{self.label} not found", status_code=404)
+            self._hot_put(path, version, body)
+            return Response(body, media_type=media_type, headers=headers)
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hot_entries": len(self._hot),
+                "hot_mb": round(self._hot_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified
+            }
@@ -0,0 +1,297 @@
+# backend/app/storage.py
+import os
+import threading
+import time
+
+
+LEASE_NAME = ".janitor.lease"
+
+
+class StorageJanitor:
+    """Background quota enforcement for the screenshot and thumbnail directories.
+
+    Artifacts are tracked in an in-memory index of size, creation and last
+    access: renders record their files as they are written, and anything
+    written elsewhere (other web workers, agent runs, render shards, earlier
+    runs) is discovered by a scan that reads a small batch of directory entries
+    per tick. Last access is shared through the files themselves: serving a
+    file stamps its atime (at most once per touch_interval), and the scan and
+    eviction read it back, so "least recently served" holds across processes.
+    Only the process holding a lease file in the first directory deletes
+    anything; each tick it removes at most a batch of expired files and
+    least-recently-served files over the size or file-count quota, so no
+    request ever waits on a directory listing.
+    """
+
+    def __init__(self, directories, max_mb=None, max_files=None, max_age=None,
+                 interval=None, scan_batch=None, evict_batch=None, on_evict=None,
+                 maintenance=None, maintenance_interval=None, touch_interval=None):
+        self.directories = list(directories)
+        self.max_bytes = (max_mb or float(os.getenv("STORAGE_MAX_MB", "2048"))) * 1024 * 1024
+        self.max_files = max_files or int(os.getenv("STORAGE_MAX_FILES", "20000"))
+        self.max_age = max_age or float(os.getenv("STORAGE_MAX_AGE", os.getenv("PAGE_CACHE_TTL", "3600")))
+        self.interval = interval or float(os.getenv("STORAGE_JANITOR_INTERVAL", "5"))
+        self.scan_batch = scan_batch or int(os.getenv("STORAGE_SCAN_BATCH", "500"))
+        self.evict_batch = evict_batch or int(os.getenv("STORAGE_EVICT_BATCH", "200"))
+        self.on_evict = on_evict or []
+        # Served files get their atime stamped at most this often
+        self.touch_interval = touch_interval or float(os.getenv("STORAGE_TOUCH_INTERVAL", "60"))
+        self.lease_path = os.path.join(self.directories[0], LEASE_NAME)
+        self.lease_timeout = max(30.0, 6 * self.interval)
+        self.leader = False
+        # Periodic housekeeping that is not about files (cache metadata, finished jobs)
+        self.maintenance = maintenance
+        self.maintenance_interval = maintenance_interval or float(os.getenv("STORAGE_SWEEP_INTERVAL", "300"))
+        self._index = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._scans = {}
+        self.passes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.evicted = 0
+        self.expired = 0
+
+    # --- Index ---
+    def _add(self, path, size, created, accessed, seen):
+        """Insert or refresh an entry; caller holds the lock"""
+        previous = self._index.pop(path, None)
+        if previous is not None:
+            self._bytes -= previous["size"]
+            accessed = max(accessed, previous["accessed"])
+        self._index[path] = {"size": size, "created": created, "accessed": accessed, "seen": seen}
+        self._bytes += size
+
+    def _forget(self, path):
+        """Drop an entry from the index only; caller holds the lock"""
+        entry = self._index.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+
+    def record(self, path):
+        """Register a freshly written artifact as just used"""
+        if not path:
+            return
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return
+        now = time.time()
+        with self._lock:
+            self._add(path, stat_result.st_size, stat_result.st_mtime, now, now)
+
+    def touch(self, path):
+        """Mark an artifact as just served, here and (throttled) in its atime for the other processes"""
+        if not path:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(path)
+            if entry is not None:
+                stale = now - entry["accessed"] >= self.touch_interval
+                entry["accessed"] = now
+                if not stale:
+                    return
+        try:
+            stat_result = os.stat(path)
+            # Not indexed here yet: the atime on disk is the last stamp of any process
+            if entry is None and now - stat_result.st_atime < self.touch_interval:
+                return
+            # Keep mtime: it is the file's creation time here and part of its served version
+            os.utime(path, ns=(time.time_ns(), stat_result.st_mtime_ns))
+        except OSError:
+            pass
+
+    # --- Incremental scan ---
+    def _scan_step(self, directory, now):
+        """Read the next batch of entries of one directory; restart the pass when it is exhausted"""
+        scan = self._scans.get(directory)
+        if scan is None:
+            try:
+                scan = self._scans[directory] = {"entries": os.scandir(directory), "started": now}
+            except OSError:
+                return []
+        expired, found = [], []
+        for _ in range(self.scan_batch):
+            try:
+                entry = next(scan["entries"])
+            except StopIteration:
+                scan["entries"].close()
+                del self._scans[directory]
+                self._drop_vanished(directory, scan["started"])
+                break
+            except OSError:
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat_result = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.name == LEASE_NAME:
+                continue
+            if now - stat_result.st_mtime > self.max_age:
+                expired.append(entry.path)
+            else:
+                found.append((entry.path, stat_result))
+        with self._lock:
+            # atime carries accesses by other processes
+            for path, stat_result in found:
+                self._add(path, stat_result.st_size, stat_result.st_mtime, stat_result.st_atime, now)
+        return expired
+
+    def _drop_vanished(self, directory, started):
+        """After a full pass, forget entries of this directory the pass did not see (deleted elsewhere)"""
+        prefix = os.path.join(directory, "")
+        with self._lock:
+            for path in [p for p, e in self._index.items() if p.startswith(prefix) and e["seen"] < started]:
+                self._forget(path)
+        self.passes += 1
+
+    # --- Eviction ---
+    def _victims(self, now):
+        """Expired entries, then the least recently served ones over quota; at most evict_batch of them"""
+        with self._lock:
+            victims = [(path, "expired") for path, entry in self._index.items()
+                       if now - entry["created"] > self.max_age][:self.evict_batch]
+            size = self._bytes - sum(self._index[path]["size"] for path, _ in victims)
+            count = len(self._index) - len(victims)
+            if size <= self.max_bytes and count <= self.max_files:
+                return victims
+            expired = {path for path, _ in victims}
+            for path, entry in sorted(self._index.items(), key=lambda item: item[1]["accessed"]):
+                if len(victims) >= self.evict_batch or (size <= self.max_bytes and count <= self.max_files):
+                    break
+                if path in expired:
+                    continue
+                victims.append((path, "evicted"))
+                size -= entry["size"]
+                count -= 1
+        return victims
+
+    def _served_since(self, path):
+        """Refresh an eviction candidate from its atime; True if another process served it after our last look"""
+        try:
+            atime = os.stat(path).st_atime
+        except OSError:
+            return False
+        with self._lock:
+            entry = self._index.get(path)
+            if entry is None or atime <= entry["accessed"]:
+                return False
+            entry["accessed"] = atime
+            return True
+
+    # --- Lease: one deleting process per directory set ---
+    def _hold_lease(self, now):
+        """Take or renew the lease file; a lease not renewed for lease_timeout seconds is taken over"""
+        token = str(os.getpid())
+        try:
+            with open(self.lease_path, encoding="utf-8") as f:
+                holder = f.read().strip()
+            age = now - os.stat(self.lease_path).st_mtime
+        except OSError:
+            holder, age = None, None
+        if holder == token:
+            try:
+                os.utime(self.lease_path)
+                return True
+            except OSError:
+                return False
+        if holder is not None and age is not None and age < self.lease_timeout:
+            return False
+        try:
+            if holder is not None:
+                os.remove(self.lease_path)
+            fd = os.open(self.lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(token)
+        return True
+
+    def _release_lease(self):
+        try:
+            with open(self.lease_path, encoding="utf-8") as f:
+                if f.read().strip() == str(os.getpid()):
+                    os.remove(self.lease_path)
+        except OSError:
+            pass
+        self.leader = False
+
+    def _delete(self, path, reason):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Storage janitor could not remove {path}: {e}")
+            return
+        with self._lock:
+            self._forget(path)
+        if reason == "evicted":
+            self.evicted += 1
+        else:
+            self.expired += 1
+        for callback in self.on_evict:
+            callback(path)
+
+    def step(self):
+        """One bounded unit of work: scan a batch per directory, then, if leader, delete a batch of victims"""
+        now = time.time()
+        expired = []
+        for directory in self.directories:
+            expired += self._scan_step(directory, now)
+        self.leader = self._hold_lease(now)
+        if not self.leader:
+            return
+        for path in expired:
+            self._delete(path, "expired")
+        for path, reason in self._victims(now):
+            if reason == "evicted" and self._served_since(path):
+                continue
+            self._delete(path, reason)
+
+    # --- Background thread ---
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-janitor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # The server runs maintenance once at startup itself
+        last_maintenance = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.step()
+                if self.maintenance and time.monotonic() - last_maintenance >= self.maintenance_interval:
+                    last_maintenance = time.monotonic()
+                    self.maintenance()
+            except Exception as e:
+                print(f"Storage janitor error: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for scan in self._scans.values():
+            scan["entries"].close()
+        self._scans = {}
+        self._release_lease()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._index),
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "max_files": self.max_files,
+                "evicted": self.evicted,
+                "expired": self.expired,
+                "passes": self.passes,
+                "leader": self.leader
+            }
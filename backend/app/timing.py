@@ -0,0 +1,110 @@
+# backend/app/timing.py
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers cache hits (ms) up to slow renders and LLM plans (tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    """Minimal thread-safe Prometheus histogram with one label dimension per series"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, then sum and count
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {values[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {values[-1]}")
+        return lines
+
+
+def render_samples(name, help_text, metric_type, samples):
+    """Exposition lines for counters/gauges; samples is a list of (labels dict, value)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+    return lines
+
+
+stage_seconds = Histogram("webnav_stage_seconds", "Time spent in each pipeline stage")
+request_seconds = Histogram("webnav_request_seconds", "HTTP request latency by route")
+
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of a block into the stage histogram"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.monotonic() - start, stage=stage)
+
+
+class StageTimings:
+    """Wall-clock milliseconds per stage for one request; repeated stages accumulate.
+
+    Every stage is also observed into the process-wide stage histogram for /metrics.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages = {}
+
+    def elapsed_ms(self):
+        return round((time.monotonic() - self.started) * 1000)
+
+    def mark(self, stage):
+        """Record the time since the pipeline started, e.g. when the first plan step arrived"""
+        if stage not in self.stages:
+            self.stages[stage] = self.elapsed_ms()
+            stage_seconds.observe(self.stages[stage] / 1000, stage=stage)
+
+    def add(self, stage, ms):
+        self.stages[stage] = self.stages.get(stage, 0) + ms
+
+    def record(self, stage, seconds):
+        """Add a measured duration to this request and to the stage histogram"""
+        stage_seconds.observe(seconds, stage=stage)
+        self.add(stage, round(seconds * 1000))
+
+    @contextmanager
+    def stage(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start)
+
+    def to_dict(self):
+        return {**{f"{name}_ms": ms for name, ms in self.stages.items()}, "total_ms": self.elapsed_ms()}
@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_categorizer.py
+"""Micro-benchmark of result categorization as the taxonomy grows.
+
+Compares the old per-category substring scans, a flat word-boundary
+alternation regex, and the compiled Categorizer (per result and batched)
+on titles/URLs from the saved DuckDuckGo fixtures plus synthetic results.
+
+Run from the backend directory:
+    python -m benchmarks.bench_categorizer [--sizes 10,100,1000,5000] [--results 500] [--repeat 5]
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import string
+import time
+
+from app.categorizer import DEFAULT_TAXONOMY, Categorizer
+from app.search_parsers import parse_result_links
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def synthetic_taxonomy(size, rng):
+    """DEFAULT_TAXONOMY padded with random title terms (a fifth of them two-word phrases) up to `size`"""
+    taxonomy = {name: {field: dict(rules.get(field, {})) for field in ("title", "url", "domain")}
+                for name, rules in DEFAULT_TAXONOMY.items()}
+    categories = list(taxonomy) + [f"topic{i}" for i in range(max(0, size // 250))]
+    for name in categories:
+        taxonomy.setdefault(name, {"title": {}, "url": {}, "domain": {}})
+    word = lambda: "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+    total = sum(len(rules["title"]) for rules in taxonomy.values())
+    while total < size:
+        term = f"{word()} {word()}" if rng.random() < 0.2 else word()
+        taxonomy[rng.choice(categories)]["title"][term] = rng.randint(1, 3)
+        total += 1
+    return taxonomy
+
+
+def load_results(count, taxonomy, rng):
+    """Fixture results, then synthetic titles mixing taxonomy terms with filler words"""
+    results = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "ddg_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            for title, href in parse_result_links(f.read(), 50):
+                results.append({"title": title, "link": href})
+    terms = [term for rules in taxonomy.values() for term in rules["title"]]
+    filler = ["the", "best", "guide", "review", "under", "price", "how", "to", "2024", "new"]
+    while len(results) < count:
+        words = rng.choices(filler, k=6) + rng.choices(terms, k=rng.randint(0, 2))
+        rng.shuffle(words)
+        results.append({"title": " ".join(words).title(), "link": f"https://example{rng.randint(0, 99)}.com/{rng.choice(filler)}"})
+    return results[:count]
+
+
+def naive_categorizer(taxonomy):
+    """The original approach: per-category substring scans in priority order"""
+    rules = [(name, list(r["title"]), list(r["url"]) + list(r["domain"])) for name, r in taxonomy.items()]
+
+    def categorize(title, url):
+        title, url = title.lower(), url.lower()
+        for name, title_terms, url_terms in rules:
+            if any(term in title for term in title_terms) or any(term in url for term in url_terms):
+                return name
+        return "general"
+    return categorize
+
+
+def flat_regex_categorizer(taxonomy):
+    """One unfactored alternation of every title term; first match decides"""
+    owner = {term.lower(): name for name, rules in taxonomy.items() for term in rules["title"]}
+    pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, sorted(owner, key=len, reverse=True))) + r")\b")
+
+    def categorize(title, url):
+        match = pattern.search(title.lower())
+        return owner[match.group()] if match else "general"
+    return categorize
+
+
+def time_per_result(fn, results, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(results)
+        best = min(best, time.perf_counter() - start)
+    return best / len(results) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,5000", help="comma-separated taxonomy sizes (title terms)")
+    parser.add_argument("--results", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'terms':>7} {'compile ms':>11} {'naive us':>9} {'flat re us':>11} {'compiled us':>12} {'batch us':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rng = random.Random(size)
+        taxonomy = synthetic_taxonomy(size, rng)
+        results = load_results(args.results, taxonomy, rng)
+
+        start = time.perf_counter()
+        compiled = Categorizer(taxonomy)
+        compile_ms = (time.perf_counter() - start) * 1000
+        naive = naive_categorizer(taxonomy)
+        flat = flat_regex_categorizer(taxonomy)
+
+        timings = [
+            time_per_result(lambda rs: [naive(r["title"], r["link"]) for r in rs], results, args.repeat),
+            time_per_result(lambda rs: [flat(r["title"], r["link"]) for r in rs], results, args.repeat),
+            time_per_result(lambda rs: [compiled.categorize(r["title"], r["link"]) for r in rs], results, args.repeat),
+            time_per_result(compiled.categorize_many, results, args.repeat),
+        ]
+        print(f"{size:>7} {compile_ms:>11.1f} {timings[0]:>9.1f} {timings[1]:>11.1f} {timings[2]:>12.1f} {timings[3]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
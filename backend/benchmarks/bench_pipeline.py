@@ -0,0 +1,230 @@
+# backend/benchmarks/bench_pipeline.py
+"""End-to-end load benchmark of /execute and /api/agents/execute against local stand-ins.
+
+Starts the stand-in DuckDuckGo/page/Ollama server and a uvicorn backend pointed at it,
+drives the endpoints at a fixed concurrency and prints one JSON document with latency
+percentiles, throughput, peak RSS and browser counts. Run from the backend directory:
+    python -m benchmarks.bench_pipeline [--mode execute|agent|both] [--concurrency 4] [--requests 40]
+                                        [--screenshots] [--workers 1] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import psutil
+
+from benchmarks import standin_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, wall_seconds):
+    latencies = sorted(ms for ms, ok in samples if ok)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else None
+        }
+    }
+
+
+class ResourceSampler:
+    """Polls the backend's process tree for total RSS and the number of browser processes"""
+
+    def __init__(self, pid, interval=0.2):
+        self.root = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_browser_processes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processes = [self.root] + self.root.children(recursive=True)
+            except psutil.Error:
+                return
+            rss = 0
+            browsers = 0
+            for proc in processes:
+                try:
+                    rss += proc.memory_info().rss
+                    if proc.name().lower().startswith(BROWSER_PROCESS_NAMES):
+                        browsers += 1
+                except psutil.Error:
+                    continue
+            self.peak_rss_mb = max(self.peak_rss_mb, rss / (1024 * 1024))
+            self.peak_browser_processes = max(self.peak_browser_processes, browsers)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def start_backend(port, workers, base_url, cache_dir, verbose=False):
+    env = {
+        **os.environ,
+        "SEARCH_URL": f"{base_url}/html/",
+        "OLLAMA_URL": f"{base_url}/api/generate",
+        # Everything the run writes stays in the temporary directory, away from the real caches and index
+        "PAGE_CACHE_DIR": os.path.join(cache_dir, "pages"),
+        "PAGE_INDEX_PATH": os.path.join(cache_dir, "pages.sqlite3"),
+        "JOB_DB_PATH": os.path.join(cache_dir, "jobs.sqlite3"),
+        "ASSET_CACHE_DIR": os.path.join(cache_dir, "assets"),
+        "PROFILE_DIR": os.path.join(cache_dir, "profiles"),
+        "SCREENSHOT_DIR": os.path.join(cache_dir, "screenshots"),
+        "THUMBNAIL_DIR": os.path.join(cache_dir, "thumbnails"),
+        "SEARCH_CACHE_DIR": "",
+        "PLAN_CACHE_DIR": "",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+        # Keep stdout clean for the JSON report
+        stdout=sys.stderr if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL
+    )
+
+
+def wait_until_healthy(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Backend exited with code {process.returncode}")
+        try:
+            response = httpx.get(f"{url}/health", timeout=2)
+            if response.status_code == 200:
+                return response.json()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit("Backend did not become healthy in time")
+
+
+async def drive(client, path, payloads, concurrency):
+    """POST every payload with at most `concurrency` in flight; returns [(latency_ms, ok)] and wall time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(payload):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                ok = response.status_code == 200 and "error" not in response.json()
+            except httpx.HTTPError:
+                ok = False
+            samples.append((round((time.perf_counter() - start) * 1000, 1), ok))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    return samples, time.perf_counter() - started
+
+
+async def run_load(url, args):
+    results = {}
+    timeout = httpx.Timeout(300.0, connect=10.0)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        if args.mode in ("execute", "both"):
+            # Distinct queries so search and page caches start cold; --repeat measures the warm path
+            queries = [f"benchmark query {i % args.repeat if args.repeat else i}" for i in range(args.requests)]
+            payloads = [{"command": q, "screenshots": args.screenshots} for q in queries]
+            await drive(client, "/execute", payloads[:args.warmup], args.concurrency)
+            samples, wall = await drive(client, "/execute", payloads, args.concurrency)
+            results["execute"] = summarize(samples, wall)
+        if args.mode in ("agent", "both"):
+            payloads = [{"command": f"list laptops {i % args.repeat if args.repeat else i}"} for i in range(args.requests)]
+            samples, wall = await drive(client, "/api/agents/execute", payloads, args.concurrency)
+            results["agent"] = summarize(samples, wall)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("execute", "agent", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=0, help="cycle over this many distinct queries (0 = all unique)")
+    parser.add_argument("--screenshots", action="store_true", help="request screenshots (forces the browser tier)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--page-delay-ms", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=int, default=20)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the backend's own output on stderr")
+    args = parser.parse_args()
+
+    server, base_url = standin_server.start(0, args.page_delay_ms, args.token_delay_ms)
+    url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory(prefix="webnav-bench-") as cache_dir:
+        backend = start_backend(args.port, args.workers, base_url, cache_dir, args.verbose)
+        try:
+            wait_until_healthy(url, backend)
+            sampler = ResourceSampler(backend.pid)
+            sampler.start()
+            results = asyncio.run(run_load(url, args))
+            sampler.stop()
+            health = httpx.get(f"{url}/health", timeout=5).json()
+        finally:
+            backend.terminate()
+            try:
+                backend.wait(15)
+            except subprocess.TimeoutExpired:
+                backend.kill()
+            server.shutdown()
+
+    pool = health.get("browser_pool", {})
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")},
+        "platform": {"python": platform.python_version(), "cpus": os.cpu_count()},
+        "results": results,
+        "peak_rss_mb": round(sampler.peak_rss_mb, 1),
+        "peak_browser_processes": sampler.peak_browser_processes,
+        "browsers": {
+            # As seen by the worker that answered /health
+            "connected": sum(1 for slot in pool.get("slots", []) if slot.get("connected")),
+            "launches": pool.get("launches"),
+            "recycles": pool.get("recycles")
+        },
+        "fetch_tiers": health.get("fetch_tiers"),
+        "upstream_requests": server.RequestHandlerClass.state.requests
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# backend/benchmarks/bench_search_parsers.py
+"""Micro-benchmark of the DuckDuckGo result parser backends against saved HTML fixtures.
+
+Run from the backend directory:
+    python -m benchmarks.bench_search_parsers [--iterations 200] [--limit 6]
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from app.search_parsers import PARSERS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "ddg_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def time_parser(parse, html, limit, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        parse(html, limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=6)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        raise SystemExit(f"No fixtures found in {FIXTURE_DIR}")
+
+    print(f"Backends available: {', '.join(PARSERS)}")
+    for name, html in fixtures.items():
+        print(f"\n{name} ({len(html) / 1024:.1f} KB)")
+        baseline = PARSERS["bs4"](html, args.limit)
+        base_median = None
+        for backend, parse in PARSERS.items():
+            if parse(html, args.limit) != baseline:
+                print(f"  {backend:<11} MISMATCH against bs4 output")
+                continue
+            median, best = time_parser(parse, html, args.limit, args.iterations)
+            base_median = base_median or median
+            print(f"  {backend:<11} median {median:7.3f} ms   best {best:7.3f} ms   speedup x{base_median / median:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
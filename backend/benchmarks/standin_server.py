@@ -0,0 +1,158 @@
+# backend/benchmarks/standin_server.py
+"""Local stand-ins for everything the backend talks to: DuckDuckGo, result pages and Ollama.
+
+Run on its own to poke at it by hand, or let bench_pipeline start it:
+    python -m benchmarks.standin_server [--port 8765] [--page-delay-ms 50] [--token-delay-ms 20]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PAGE_DIR = os.path.join(FIXTURE_DIR, "pages")
+UDDG_RE = re.compile(r"uddg=([^&\"]+)")
+# Sponsored results link to an ad redirect instead of a uddg URL
+AD_LINK_RE = re.compile(r'href="(?:https?:)?//duckduckgo\.com/y\.js\?[^"]*"')
+
+# What the fake model "generates" for every instruction; {base} is the stand-in server URL
+AGENT_PLAN = """Here is the plan:
+1. open: {base}/pages/listing.html
+2. wait_for: .product-list
+3. extract_text: .card .name->5
+4. extract_text: .card->5->title=.name, price=.price, link=a@href
+"""
+
+
+class StandinState:
+    """Fixtures loaded once; recorded result links are rewritten to point at the local page corpus"""
+
+    def __init__(self, base_url, page_delay_ms=0, token_delay_ms=0):
+        self.base_url = base_url
+        self.page_delay = page_delay_ms / 1000
+        self.token_delay = token_delay_ms / 1000
+        self.pages = {}
+        for path in sorted(glob.glob(os.path.join(PAGE_DIR, "*.html"))):
+            with open(path, "rb") as f:
+                self.pages[os.path.basename(path)] = f.read()
+        self.search_pages = []
+        for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "ddg_*.html"))):
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+            self.search_pages.append(AD_LINK_RE.sub(
+                lambda m: 'href="//duckduckgo.com/l/?uddg=' + quote(m.group(0), safe="") + '"', html
+            ))
+        self.requests = 0
+
+    def search_page(self, query):
+        """A recorded results page whose links point at corpus pages unique to this query"""
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        names = sorted(self.pages)
+        targets = {}
+
+        def local(match):
+            # Each distinct recorded URL maps to one corpus page; the query makes it a distinct cache key
+            index = targets.setdefault(match.group(1), len(targets))
+            url = f"{self.base_url}/pages/{names[index % len(names)]}?q={digest[:12]}&r={index}"
+            return "uddg=" + quote(url, safe="")
+
+        return UDDG_RE.sub(local, self.search_pages[int(digest, 16) % len(self.search_pages)])
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            state.requests += 1
+            parsed = urlparse(self.path)
+            if parsed.path.startswith("/html"):
+                query = parse_qs(parsed.query).get("q", [""])[0]
+                return self._send(200, state.search_page(query).encode("utf-8"), "text/html; charset=utf-8")
+            if parsed.path.startswith("/pages/"):
+                page = state.pages.get(parsed.path[len("/pages/"):])
+                if page is None:
+                    return self._send(404, b"not found", "text/plain")
+                time.sleep(state.page_delay)
+                return self._send(200, page, "text/html; charset=utf-8")
+            return self._send(404, b"not found", "text/plain")
+
+        def do_POST(self):
+            state.requests += 1
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if urlparse(self.path).path != "/api/generate":
+                return self._send(404, b"not found", "text/plain")
+            plan = AGENT_PLAN.format(base=state.base_url)
+            if not body.get("stream"):
+                time.sleep(state.token_delay * len(plan) / 4)
+                return self._send(200, json.dumps({"response": plan, "done": True}).encode(), "application/json")
+
+            # Ollama-style NDJSON stream, roughly four characters per token
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for i in range(0, len(plan), 4):
+                    time.sleep(state.token_delay)
+                    self._chunk(json.dumps({"response": plan[i:i + 4], "done": False}) + "\n")
+                self._chunk(json.dumps({"response": "", "done": True}) + "\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The backend cancelled the run (client disconnect, timeout or a rejected plan)
+                self.close_connection = True
+
+        def _chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    Handler.state = state
+    return Handler
+
+
+def start(port=0, page_delay_ms=0, token_delay_ms=0):
+    """Start the stand-in server on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), None)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.RequestHandlerClass = make_handler(StandinState(base_url, page_delay_ms, token_delay_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page-delay-ms", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    server, base_url = start(args.port, args.page_delay_ms, args.token_delay_ms)
+    print(f"Stand-in server on {base_url}")
+    print(f"  SEARCH_URL={base_url}/html/")
+    print(f"  OLLAMA_URL={base_url}/api/generate")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# backend/tests/conftest.py
+import pytest
+
+
+class Clock:
+    """Stand-in for the time module in code under test; only moves when told to"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def time_ns(self):
+        return int(self.now * 1e9)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
@@ -0,0 +1,67 @@
+# backend/tests/test_browser_storage.py
+import os
+import time
+
+from app.browser_storage import AssetCache, ProfileStore
+
+HEADERS = {"content-type": "text/javascript", "cache-control": "max-age=3600"}
+
+
+def assets(tmp_path, max_mb=1):
+    return AssetCache(cache_dir=str(tmp_path / "assets"), max_mb=max_mb, max_item_kb=1024)
+
+
+def test_assets_stored_by_another_process_are_served(tmp_path):
+    # Two web workers (or render shards) sharing ASSET_CACHE_DIR
+    first, second = assets(tmp_path), assets(tmp_path)
+    assert first.put("https://cdn.example/app.js", 200, HEADERS, b"console.log(1)")
+    status, headers, body = second.get("https://cdn.example/app.js")
+    assert (status, body) == (200, b"console.log(1)")
+    assert headers["content-type"] == "text/javascript"
+    assert second.stats()["entries"] == 1
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    cache = assets(tmp_path)
+    assert not cache.put("https://a.example/x.js", 200, {"cache-control": "no-store"}, b"x")
+    assert not cache.put("https://a.example/y.js", 404, HEADERS, b"x")
+    assert cache.get("https://a.example/x.js") is None
+
+
+def test_sweep_enforces_the_quota_over_every_process_writes(tmp_path):
+    first, second = assets(tmp_path), assets(tmp_path)
+    # Each process alone stays under 1 MB; together they don't
+    first.put("https://cdn.example/old.js", 200, HEADERS, b"a" * 400 * 1024)
+    meta = tmp_path / "assets" / (AssetCache.key("https://cdn.example/old.js") + ".json")
+    os.utime(meta, (1, 1))
+    second.put("https://cdn.example/b.js", 200, HEADERS, b"b" * 400 * 1024)
+    second.put("https://cdn.example/c.js", 200, HEADERS, b"c" * 400 * 1024)
+    assert len(os.listdir(tmp_path / "assets")) == 6
+
+    assert second.sweep() == 1
+    assert sorted(os.listdir(tmp_path / "assets")) == sorted(
+        AssetCache.key(f"https://cdn.example/{name}.js") + ext for name in "bc" for ext in (".json", ".body")
+    )
+    assert first.get("https://cdn.example/old.js") is None
+    assert first.get("https://cdn.example/b.js") is not None
+
+
+def test_profiles_saved_by_another_process_are_restored(tmp_path):
+    first = ProfileStore(profile_dir=str(tmp_path), max_profiles=2)
+    second = ProfileStore(profile_dir=str(tmp_path), max_profiles=2)
+    state = {"cookies": [{"name": "consent", "value": "yes", "domain": ".example.com"}], "origins": []}
+    assert first.store("example.com", state)
+    assert second.load("example.com") == state
+    assert second.load("other.com") is None
+
+
+def test_profile_sweep_keeps_the_count_bound_across_processes(tmp_path):
+    first = ProfileStore(profile_dir=str(tmp_path), max_profiles=2)
+    second = ProfileStore(profile_dir=str(tmp_path), max_profiles=2)
+    first.store("a.com", {"cookies": [], "origins": []})
+    # Saved before the others, but not expired
+    os.utime(tmp_path / "a.com.json", (time.time() - 100,) * 2)
+    second.store("b.com", {"cookies": [], "origins": []})
+    second.store("c.com", {"cookies": [], "origins": []})
+    assert first.sweep() == 1
+    assert sorted(os.listdir(tmp_path)) == ["b.com.json", "c.com.json"]
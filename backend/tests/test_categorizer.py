@@ -0,0 +1,85 @@
+# backend/tests/test_categorizer.py
+import json
+
+from app.categorizer import DEFAULT_TAXONOMY, Categorizer, trie_pattern
+
+TAXONOMY = {
+    "gaming": {"title": {"game": 2, "games": 2}, "url": {"games": 1}, "domain": {"ign.com": 3}},
+    "tech": {"title": {"laptop": 2, "machine learning": 2}, "url": {"docs": 1}, "domain": {"github.com": 3}},
+    "news": {"title": {"breaking news": 2}, "url": {"news": 2}, "domain": {}},
+}
+
+
+def test_trie_pattern_matches_whole_terms_only():
+    import re
+    pattern = re.compile(r"\b" + trie_pattern({"game", "games", "gamer", "machine learning"}) + r"\b")
+    assert [m.group() for m in pattern.finditer("games for a gamer, not gameplay")] == ["games", "gamer"]
+    assert pattern.search("machine   learning").group() == "machine   learning"
+
+
+def test_weights_add_up_across_fields():
+    categorizer = Categorizer(TAXONOMY)
+    scores = categorizer.scores("Best game laptop", "https://www.ign.com/games/docs")
+    assert scores == {"gaming": 2 + 1 + 3, "tech": 2 + 1, "news": 0}
+    assert categorizer.categorize("Best game laptop", "https://www.ign.com/games/docs") == "gaming"
+
+
+def test_a_term_scores_once_per_field():
+    categorizer = Categorizer(TAXONOMY)
+    assert categorizer.scores("game game game", "https://x.com/")["gaming"] == 2
+
+
+def test_parent_domains_match():
+    categorizer = Categorizer(TAXONOMY)
+    assert categorizer.categorize("Release notes", "https://gist.github.com/abc") == "tech"
+    assert categorizer.categorize("Release notes", "https://notgithub.com/abc") == "general"
+
+
+def test_ties_go_to_the_earlier_category_and_low_scores_are_general():
+    categorizer = Categorizer(TAXONOMY, min_score=2)
+    assert categorizer.categorize("game laptop", "https://x.com/") == "gaming"
+    assert categorizer.categorize("Docs", "https://x.com/docs") == "general"
+
+
+def test_batch_matching_keeps_results_apart():
+    categorizer = Categorizer(TAXONOMY)
+    items = [
+        {"title": "Today's breaking", "link": "https://x.com/a"},
+        {"title": "news of the day", "link": "https://x.com/b"},
+        {"title": "Daily roundup", "link": "https://x.com/news_today"},
+    ]
+    # "breaking" + "news" across two titles must not form the phrase
+    assert categorizer.categorize_many(items) == ["general", "general", "news"]
+    assert categorizer.categorize_many(items) == [categorizer.categorize(i["title"], i["link"]) for i in items]
+
+
+def test_default_taxonomy_and_from_file(tmp_path):
+    assert Categorizer().categorize("Python tutorial", "https://realpython.com/") == "tech"
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps({"cooking": {"title": {"recipe": 1}}}))
+    categorizer = Categorizer.from_file(str(path))
+    assert categorizer.categories == ["cooking"]
+    assert categorizer.categorize("Easy recipe", "https://x.com/") == "cooking"
+    assert set(DEFAULT_TAXONOMY) >= {"gaming", "tech", "business", "news"}
+
+
+def test_host_words_match_like_the_original_url_keywords():
+    categorizer = Categorizer()
+    for url in (
+        "https://news.example.com/story", "https://foonews.com/a", "https://www.latimes.com/x",
+        "https://edition.cnn.com/2024/politics", "https://feeds.bbci.co.uk/item", "https://uk.reuters.com/article"
+    ):
+        assert categorizer.categorize("Story of the day", url) == "news", url
+    assert categorizer.scores("Story", "https://foonews.com/a")["news"] == 2
+    # Title keywords still win over a news host, as before
+    assert categorizer.categorize("New game announced", "https://news.example.com/") == "gaming"
+    assert categorizer.categorize("Story of the day", "https://example.com/") == "general"
+
+
+def test_host_terms_match_inside_labels_only_for_the_host_field():
+    categorizer = Categorizer({"news": {"host": {"news": 2}, "url": {"news": 1}}})
+    assert categorizer.scores("x", "https://foonews.com/")["news"] == 2
+    assert categorizer.scores("x", "https://x.com/foonews")["news"] == 0
+    assert categorizer.categorize_many([
+        {"title": "a", "link": "https://ne.com/"}, {"title": "b", "link": "https://ws.com/"}
+    ]) == ["general", "general"]
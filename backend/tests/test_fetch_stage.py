@@ -0,0 +1,39 @@
+# backend/tests/test_fetch_stage.py
+import asyncio
+
+from app.fetch_stage import FetchStage
+from app.host_health import HostHealth
+
+
+def test_a_busy_host_does_not_hold_global_slots():
+    stage = FetchStage(max_concurrency=2, per_host=1, deadline=5, hedge=0, health=HostHealth())
+    slow = asyncio.Event()
+    started = []
+
+    async def fetch(url):
+        started.append(url)
+        if "slow.example" in url:
+            await slow.wait()
+        else:
+            slow.set()
+        return {"status": "success", "tier": "static"}
+
+    urls = [f"https://slow.example/{i}" for i in range(3)] + ["https://fast.example/"]
+    # Only one slow load runs at a time; the fast host gets the second global slot right away
+    results = asyncio.run(stage.fetch_all(urls, fetch, deadline=1))
+    assert [r["status"] for r in results] == ["success"] * 4
+    assert started[1] == "https://fast.example/"
+
+
+def test_want_cancels_the_surplus_hedges():
+    stage = FetchStage(max_concurrency=4, per_host=4, deadline=5, hedge=2, health=HostHealth())
+
+    async def fetch(url):
+        if url.endswith("/slow"):
+            await asyncio.sleep(10)
+        return {"status": "success", "tier": "static"}
+
+    urls = ["https://a.example/", "https://b.example/slow", "https://c.example/"]
+    results = asyncio.run(stage.fetch_all(urls, fetch, want=2))
+    assert [r and r["status"] for r in results] == ["success", None, "success"]
+    assert stage.hedges_cancelled == 1
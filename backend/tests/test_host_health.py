@@ -0,0 +1,83 @@
+# backend/tests/test_host_health.py
+import pytest
+
+from app import host_health
+from app.fetch_stage import FetchStage
+from app.host_health import HostHealth
+
+
+@pytest.fixture
+def health(monkeypatch, clock):
+    monkeypatch.setattr(host_health, "time", clock)
+    return HostHealth(alpha=0.5, failures=2, cooldown=60, slow_seconds=5)
+
+
+def test_breaker_opens_after_consecutive_failures(health):
+    health.record("a.com", 1, False)
+    assert health.allow("a.com")
+    health.record("a.com", 1, False)
+    assert not health.allow("a.com")
+    assert health.stats()["open"] == ["a.com"]
+    assert health.opened == 1
+
+
+def test_success_resets_the_failure_streak(health):
+    health.record("a.com", 1, False)
+    health.record("a.com", 1, True)
+    health.record("a.com", 1, False)
+    assert health.allow("a.com")
+
+
+def test_half_open_lets_one_probe_through(health, clock):
+    health.record("a.com", 1, False)
+    health.record("a.com", 1, False)
+    clock.advance(61)
+    assert health.available("a.com")
+    assert health.available("a.com")
+    assert health.allow("a.com")
+    assert not health.allow("a.com")
+    assert not health.available("a.com")
+
+
+def test_probe_outcome_closes_or_reopens(health, clock):
+    for host in ("a.com", "b.com"):
+        health.record(host, 1, False)
+        health.record(host, 1, False)
+    clock.advance(61)
+    assert health.allow("a.com") and health.allow("b.com")
+    health.record("a.com", 1, True)
+    health.record("b.com", 1, False)
+    assert health.allow("a.com") and health.allow("a.com")
+    assert not health.allow("b.com")
+    assert health.opened == 3
+
+
+def test_latency_only_samples_do_not_trip_the_breaker(health):
+    for _ in range(5):
+        health.record("a.com", 20, None)
+    assert health.allow("a.com")
+    assert health.demoted("a.com")
+
+
+def test_error_rate_demotes(health):
+    for ok in (False, True, False):
+        health.record("a.com", 1, ok)
+    assert health.allow("a.com")
+    assert health.demoted("a.com")
+    assert not health.demoted("unknown.com")
+
+
+def test_select_prefers_healthy_hosts_and_spares_unused_probes(health, clock):
+    stage = FetchStage(hedge=0, health=health)
+    for host in ("down.com", "probe.com"):
+        health.record(host, 1, False)
+        health.record(host, 1, False)
+    clock.advance(61)
+    health.record("down.com", 1, False)
+    health.record("slow.com", 30, None)
+    urls = ["https://down.com/", "https://slow.com/", "https://ok.com/", "https://probe.com/"]
+    # ok.com first, then slow.com (demoted) fills the second slot; probe.com is never dispatched
+    assert stage.select(urls, 2) == [1, 2]
+    assert health.allow("probe.com")
+    # Too few others: an open host is used rather than returning short
+    assert stage.select(["https://down.com/"], 1) == [0]
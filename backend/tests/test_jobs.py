@@ -0,0 +1,123 @@
+# backend/tests/test_jobs.py
+import pytest
+
+from app import jobs
+from app.jobs import JobStore, JobWorkers
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(jobs, "time", clock)
+    return JobStore(str(tmp_path / "jobs.sqlite3"), dedup_ttl=300, retention=3600, stale_after=60)
+
+
+def test_claims_follow_priority_then_age(store, clock):
+    low, _ = store.submit("search", {"query": "a"})
+    clock.advance(1)
+    high, _ = store.submit("search", {"query": "b"}, priority=5)
+    clock.advance(1)
+    later, _ = store.submit("search", {"query": "c"})
+    assert store.get(later)["position"] == 3
+    assert [store.claim("w")["id"] for _ in range(3)] == [high, low, later]
+    assert store.claim("w") is None
+
+
+def test_duplicates_share_a_job_and_bump_its_priority(store):
+    first, deduplicated = store.submit("search", {"query": "a", "count": 5})
+    assert deduplicated is False
+    store.submit("search", {"query": "b"}, priority=1)
+    again, deduplicated = store.submit("search", {"count": 5, "query": "a"}, priority=3)
+    assert (again, deduplicated) == (first, True)
+    assert store.get(first)["priority"] == 3
+    assert store.claim("w")["id"] == first
+
+
+def test_finished_jobs_are_reused_only_within_dedup_ttl(store, clock):
+    job_id, _ = store.submit("search", {"query": "a"})
+    store.claim("w")
+    store.finish(job_id, result={"results": []})
+    clock.advance(299)
+    assert store.submit("search", {"query": "a"}) == (job_id, True)
+    clock.advance(2)
+    assert store.submit("search", {"query": "a"})[1] is False
+
+
+def test_failed_jobs_are_not_reused(store):
+    job_id, _ = store.submit("search", {"query": "a"})
+    store.claim("w")
+    store.finish(job_id, error="boom")
+    assert store.get(job_id)["status"] == "error"
+    assert store.submit("search", {"query": "a"})[0] != job_id
+
+
+def test_partial_results_heartbeat_and_stale_jobs_requeue(store, clock):
+    busy, _ = store.submit("search", {"query": "a"})
+    dead, _ = store.submit("search", {"query": "b"})
+    store.claim("w1")
+    store.claim("w2")
+    clock.advance(50)
+    store.update(busy, {"results": [1]})
+    clock.advance(20)
+    assert store.requeue_stale() == 1
+    assert store.get(dead)["status"] == "queued"
+    job = store.get(busy)
+    assert (job["status"], job["result"]) == ("running", {"results": [1]})
+
+
+def test_sweep_removes_finished_jobs_past_retention(store, clock):
+    old, _ = store.submit("search", {"query": "a"})
+    store.claim("w")
+    store.finish(old, result={})
+    queued, _ = store.submit("search", {"query": "b"})
+    clock.advance(3601)
+    assert store.sweep() == 1
+    assert store.get(old) is None
+    assert store.get(queued)["status"] == "queued"
+
+
+def test_workers_run_handlers_and_record_failures(store):
+    def search(payload, report):
+        report({"progress": 1})
+        if payload["query"] == "bad":
+            raise ValueError("no results")
+        return {"query": payload["query"]}
+
+    workers = JobWorkers(store, {"search": search}, workers=0)
+    good, _ = store.submit("search", {"query": "good"})
+    bad, _ = store.submit("search", {"query": "bad"})
+    unknown, _ = store.submit("render", {})
+    for _ in range(3):
+        workers._execute(store.claim("w"))
+
+    assert store.get(good)["result"] == {"query": "good"}
+    assert (store.get(bad)["status"], store.get(bad)["error"]) == ("error", "no results")
+    assert store.get(bad)["result"] == {"progress": 1}
+    assert store.get(unknown)["error"] == "Unknown job kind: render"
+    assert (workers.completed, workers.failed) == (1, 1)
+
+
+def test_stale_running_jobs_are_not_joined_and_workers_requeue_them(store, clock):
+    job_id, _ = store.submit("search", {"query": "a"})
+    store.claim("w1")
+    clock.advance(30)
+    assert store.submit("search", {"query": "a"}) == (job_id, True)
+    clock.advance(31)
+    fresh, deduplicated = store.submit("search", {"query": "a"})
+    assert (fresh == job_id, deduplicated) == (False, False)
+
+    workers = JobWorkers(store, {}, workers=0)
+    assert workers.requeue_interval == 15
+    assert workers.requeue_stale() == 1
+    assert store.get(job_id)["status"] == "queued"
+    first = store.claim("w2")["id"]
+    clock.advance(10)
+    second = store.claim("w2")["id"]
+    clock.advance(51)
+    assert workers.requeue_stale() == 1
+    assert store.get(first)["status"] == "queued"
+    clock.advance(10)
+    # Throttled until the interval passes, then the claim loop picks the other dead job up too
+    assert workers.requeue_stale() == 0
+    clock.advance(5)
+    assert workers.requeue_stale() == 1
+    assert store.get(second)["status"] == "queued"
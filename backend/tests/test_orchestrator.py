@@ -0,0 +1,99 @@
+# backend/tests/test_orchestrator.py
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import orchestrator as orchestrator_module
+from app.agents.orchestrator import Orchestrator
+from app.agents.plan_compiler import PlanError
+from app.agents.session import AgentSession
+
+
+class FakePool:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    @asynccontextmanager
+    async def context(self):
+        self.opened += 1
+        try:
+            yield object()
+        finally:
+            self.closed += 1
+
+
+class FakeLLM:
+    """Streams plan lines, holding the stream after each open: until a page has started loading"""
+
+    def __init__(self, steps, navigating):
+        self.steps = steps
+        self.navigating = navigating
+
+    def cached_plan(self, command):
+        return None
+
+    async def aiter_plan(self, command):
+        for step in self.steps:
+            yield step
+            if step.startswith("open:"):
+                await asyncio.wait_for(self.navigating.wait(), 1)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(orchestrator_module, "get_pool", lambda: pool)
+    orchestrator = Orchestrator()
+    navigating = asyncio.Event()
+    navigations = []
+    finished = []
+
+    async def open_session(session, context):
+        session.page = context
+        session.metrics = SimpleNamespace(load_ms=10, ready="load", to_dict=dict)
+
+    async def navigate(session, url, timeout=120):
+        navigations.append(url)
+        navigating.set()
+        await asyncio.sleep(0.01)
+        finished.append(url)
+
+    monkeypatch.setattr(orchestrator.web, "open_session", open_session)
+    monkeypatch.setattr(orchestrator.web, "navigate", navigate)
+
+    def run(steps):
+        orchestrator.llm = FakeLLM(steps, navigating)
+        session = AgentSession("find laptops")
+        return asyncio.run(orchestrator._pipeline(session, 5)), session
+
+    return run, pool, navigations, finished
+
+
+def test_first_page_loads_while_the_plan_streams(agent):
+    run, pool, navigations, finished = agent
+    result, session = run(["open: https://shop.example/", "open: https://shop.example/deals"])
+    # The stream only continues once the first open: is loading, so this would time out without the prefetch
+    assert navigations == ["https://shop.example/", "https://shop.example/deals"]
+    assert finished == navigations
+    assert result["plan"] == "open: https://shop.example/\nopen: https://shop.example/deals"
+    assert (pool.opened, pool.closed) == (1, 1)
+    assert session.prefetched == {}
+
+
+def test_bad_step_discards_the_speculative_context(agent):
+    run, pool, navigations, finished = agent
+    with pytest.raises(PlanError, match="unknown action 'scroll'"):
+        run(["open: https://shop.example/", "2. scroll: down", "click: #buy"])
+    assert navigations == ["https://shop.example/"]
+    assert finished == []
+    assert (pool.opened, pool.closed) == (1, 1)
+
+
+def test_bad_plan_before_any_page_takes_no_context(agent):
+    run, pool, navigations, _ = agent
+    with pytest.raises(PlanError, match="needs a page"):
+        run(["click: #buy", "open: https://shop.example/"])
+    assert (pool.opened, navigations) == (0, [])
@@ -0,0 +1,118 @@
+# backend/tests/test_page_cache.py
+import pytest
+
+from app import page_cache
+from app.page_cache import PageCache, cache_key, normalize_url
+
+SETTINGS = {"format": "jpeg", "quality": 80}
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(page_cache, "time", clock)
+    paths = {name: tmp_path / name for name in ("screenshots", "thumbnails", "pages")}
+    for path in paths.values():
+        path.mkdir()
+    return paths
+
+
+def make_cache(dirs, ttl=3600, max_mb=500):
+    return PageCache(str(dirs["screenshots"]), str(dirs["thumbnails"]), str(dirs["pages"]), ttl=ttl, max_mb=max_mb)
+
+
+def store(cache, url, size=0):
+    """Put a page whose screenshot is `size` bytes at the key's path, as the fetcher does"""
+    key = cache_key(url, SETTINGS)
+    shot = cache.screenshot_path(key, "jpg")
+    with open(shot, "wb") as f:
+        f.write(b"x" * size)
+    cache.put(url, SETTINGS, {"content": f"text of {url}", "screenshot": shot, "status": "success"})
+    return shot
+
+
+def test_normalized_urls_share_an_entry():
+    assert normalize_url("HTTPS://Example.com:443/a?b=2&a=1&utm_source=x#top") == "https://example.com/a?a=1&b=2"
+    assert cache_key("https://example.com", SETTINGS) == cache_key("https://EXAMPLE.com/?fbclid=1", SETTINGS)
+    assert cache_key("https://example.com", SETTINGS) != cache_key("https://example.com", {**SETTINGS, "quality": 50})
+
+
+def test_hit_after_put(dirs):
+    cache = make_cache(dirs)
+    store(cache, "https://a.com/")
+    hit = cache.get("https://a.com/#section", SETTINGS)
+    assert hit["content"] == "text of https://a.com/" and hit["cached"] is True
+    assert cache.get("https://b.com/", SETTINGS) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_failed_results_are_not_stored(dirs):
+    cache = make_cache(dirs)
+    cache.put("https://a.com/", SETTINGS, {"content": "", "status": "timeout"})
+    assert cache.get("https://a.com/", SETTINGS) is None
+
+
+def test_entries_expire_after_ttl(dirs, clock):
+    cache = make_cache(dirs, ttl=60)
+    shot = store(cache, "https://a.com/")
+    clock.advance(59)
+    assert cache.get("https://a.com/", SETTINGS) is not None
+    clock.advance(2)
+    assert cache.get("https://a.com/", SETTINGS) is None
+    # The expired entry's files go with it
+    assert not (dirs["screenshots"] / shot).exists()
+
+
+def test_sweep_drops_only_expired_entries(dirs, clock):
+    cache = make_cache(dirs, ttl=60)
+    store(cache, "https://old.com/")
+    clock.advance(30)
+    store(cache, "https://new.com/")
+    clock.advance(40)
+    assert cache.sweep() == 1
+    assert cache.get("https://new.com/", SETTINGS) is not None
+
+
+def test_missing_screenshot_invalidates_entry(dirs, tmp_path):
+    cache = make_cache(dirs)
+    shot = store(cache, "https://a.com/")
+    (tmp_path / "screenshots" / shot).unlink()
+    assert cache.get("https://a.com/", SETTINGS) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_size_bound_evicts_least_recently_used(dirs, clock):
+    # Room for two 400 KB screenshots plus their metadata, not three
+    cache = make_cache(dirs, max_mb=1)
+    store(cache, "https://a.com/", 400 * 1024)
+    clock.advance(1)
+    store(cache, "https://b.com/", 400 * 1024)
+    clock.advance(1)
+    assert cache.get("https://a.com/", SETTINGS) is not None
+    store(cache, "https://c.com/", 400 * 1024)
+    assert cache.get("https://b.com/", SETTINGS) is None
+    assert cache.get("https://a.com/", SETTINGS) is not None
+    assert cache.get("https://c.com/", SETTINGS) is not None
+
+
+def test_index_survives_restart_in_access_order(dirs, clock):
+    cache = make_cache(dirs, max_mb=1)
+    store(cache, "https://a.com/", 400 * 1024)
+    clock.advance(1)
+    store(cache, "https://b.com/", 400 * 1024)
+    clock.advance(1)
+    cache.get("https://a.com/", SETTINGS)
+
+    reopened = make_cache(dirs, max_mb=1)
+    assert reopened.stats()["entries"] == 2
+    store(reopened, "https://c.com/", 400 * 1024)
+    assert reopened.get("https://b.com/", SETTINGS) is None
+    assert reopened.get("https://a.com/", SETTINGS) is not None
+
+
+def test_entries_written_by_another_process_are_found_on_disk(dirs):
+    # Two web workers sharing the cache directories
+    first, second = make_cache(dirs), make_cache(dirs)
+    store(first, "https://a.com/")
+    hit = second.get("https://a.com/", SETTINGS)
+    assert hit["content"] == "text of https://a.com/"
+    assert second.stats()["entries"] == 1
@@ -0,0 +1,186 @@
+# backend/tests/test_page_index.py
+import httpx
+import pytest
+
+from app import page_index, static_fetch
+from app.page_index import PageIndex, match_query, query_key
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(page_index, "time", clock)
+    return PageIndex(str(tmp_path / "pages.sqlite3"), max_age=3600, retention=86400, max_pages=100)
+
+
+def page(link, title, content, status="success", **extra):
+    return {"link": link, "title": title, "content": content, "status": status, "category": "tech", **extra}
+
+
+# Unrelated pages, so BM25 has a corpus to weigh query words against
+FILLER = [page(f"https://other{i}.com/", "Recipes", "soup and bread") for i in range(20)]
+
+
+def test_queries_match_any_word():
+    assert match_query("Best  laptops, best!") == '"best" OR "laptops"'
+    assert match_query("?!") is None
+    assert query_key("  Python, asyncio TUTORIAL ") == "python asyncio tutorial"
+
+
+def test_only_successful_pages_with_text_are_indexed(index):
+    index.add("laptops", [
+        page("https://a.com/", "Laptops", "budget laptops"),
+        page("https://b.com/", "Laptops", "timed out", status="timeout"),
+        page("https://c.com/", "Laptops", "   "),
+    ] + FILLER)
+    assert index.flush() == 1 + len(FILLER)
+    assert [r["link"] for r in index.search("laptops")] == ["https://a.com/"]
+
+
+def test_full_text_is_searched_not_just_the_snippet(index):
+    index.add("guides", [
+        page("https://a.com/", "Buying guide", "A short intro...", text="A short intro. Later: ultrabooks compared."),
+    ] + FILLER)
+    index.flush()
+    assert [r["link"] for r in index.search("ultrabooks")] == ["https://a.com/"]
+    # Results keep the card snippet
+    assert index.search("ultrabooks")[0]["content"] == "A short intro..."
+
+
+def test_bm25_ranks_title_and_more_words_first(index):
+    index.add("shopping", [
+        page("https://body.com/", "Shopping guide", "which laptops to buy " * 3),
+        page("https://title.com/", "Best laptops", "a short list"),
+        page("https://both.com/", "Gaming laptops", "cheap gaming laptops"),
+    ] + FILLER)
+    index.flush()
+    results = index.search("cheap laptops")
+    assert [r["link"] for r in results] == ["https://both.com/", "https://title.com/", "https://body.com/"]
+    assert results[0]["score"] > results[1]["score"] > results[2]["score"] > 0
+
+
+def test_weak_matches_are_dropped(index):
+    # "and" is on most pages, so it scores next to nothing
+    index.add("recipes", FILLER + [page("https://a.com/", "Laptops", "laptops and tablets")])
+    index.flush()
+    assert index.search("and") == []
+    assert [r["link"] for r in index.search("tablets and")] == ["https://a.com/"]
+
+
+def test_refetched_pages_replace_their_row(index):
+    index.add("laptops", [page("https://a.com/?utm_source=x", "Old title", "laptops")] + FILLER)
+    index.flush()
+    index.add("laptops", [page("https://a.com/", "New title", "laptops")])
+    index.flush()
+    assert [r["title"] for r in index.search("laptops")] == ["New title"]
+    assert index.search("old") == []
+
+
+def test_freshness_cutoff(index, clock):
+    index.add("laptops", [page("https://a.com/", "Laptops", "laptops")] + FILLER)
+    index.flush()
+    clock.advance(1800)
+    index.add("laptops", [page("https://b.com/", "Laptops", "laptops")])
+    index.flush()
+    clock.advance(2000)
+    assert [r["link"] for r in index.search("laptops")] == ["https://b.com/"]
+    assert len(index.search("laptops", max_age=4000)) == 2
+    assert index.search("laptops", max_age=10) == []
+
+
+def test_exact_repeats_are_answered_with_the_pages_they_returned(index, clock):
+    index.add("Best laptops 2024", [
+        page("https://b.com/", "Reviews", "top picks"),
+        page("https://a.com/", "Deals", "discounts"),
+    ] + FILLER[:1])
+    index.flush()
+    # Fewer than `count` pages, none matching every word, still in the live run's order
+    assert [r["link"] for r in index.answer("best  LAPTOPS 2024?", 5)] == [
+        "https://b.com/", "https://a.com/", "https://other0.com/"
+    ]
+    clock.advance(3601)
+    assert index.answer("best laptops 2024", 5) is None
+    assert (index.hits, index.misses) == (1, 1)
+
+
+def test_other_queries_need_enough_matches(index):
+    index.add("laptops", [page(f"https://{i}.com/", "Laptops", "laptops") for i in range(3)] + FILLER)
+    index.flush()
+    assert index.answer("cheap laptops", 5) is None
+    assert len(index.answer("cheap laptops", 3)) == 3
+
+
+def test_screenshot_requests_skip_pages_without_images(index, tmp_path):
+    shot = tmp_path / "page_a.jpg"
+    shot.write_bytes(b"jpeg")
+    index.add("laptops", [
+        page("https://a.com/", "Laptops", "laptops", screenshot=str(shot)),
+        page("https://b.com/", "Laptops", "laptops", screenshot=str(tmp_path / "evicted.jpg")),
+        page("https://c.com/", "Laptops", "laptops"),
+    ] + FILLER)
+    index.flush()
+    assert [r["link"] for r in index.search("laptops", screenshots=True)] == ["https://a.com/"]
+    assert [r["link"] for r in index.recall("laptops", screenshots=True)] == ["https://a.com/"]
+
+
+def test_sweep_applies_retention_and_page_limit(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(page_index, "time", clock)
+    index = PageIndex(str(tmp_path / "pages.sqlite3"), retention=100, max_pages=2)
+    index.add("laptops", [page("https://old.com/", "Laptops", "laptops")])
+    index.flush()
+    clock.advance(200)
+    for name in ("a", "b", "c"):
+        clock.advance(1)
+        index.add(name, [page(f"https://{name}.com/", "Laptops", "laptops")])
+        index.flush()
+    assert index.sweep() == 2
+    assert sorted(r["link"] for r in index.recall("laptops", max_age=1000) + index.recall("b") + index.recall("c")) == [
+        "https://b.com/", "https://c.com/"
+    ]
+
+
+ARTICLE = """<html><head><title>{title}</title><script>var x = 1;</script></head><body>
+<nav>Home Docs Blog</nav>
+<main>
+<h1>{title}</h1>
+<p>{intro}</p>
+{paragraphs}
+</main>
+<footer>Copyright</footer>
+</body></html>"""
+
+
+def test_answers_a_repeat_from_really_extracted_pages(index, monkeypatch):
+    """The search route's flow: static pages extracted and indexed under the query, then the same query again"""
+    sites = {
+        f"https://site{i}.example/asyncio": ARTICLE.format(
+            title=title,
+            intro="An introduction that runs long enough to be kept as the result card snippet.",
+            paragraphs="\n".join(f"<p>Section {n}: {body}</p>" for n in range(12)),
+        )
+        for i, (title, body) in enumerate([
+            ("Python asyncio tutorial", "the event loop schedules coroutines and tasks for you"),
+            ("Getting started with async IO", "await suspends a coroutine until the awaited future is done"),
+            ("Concurrency in Python", "threads, processes and asyncio compared for network clients"),
+            ("Async patterns", "gather, wait_for and TaskGroup cover most fan-out code"),
+            ("Event loops explained", "selectors wake the loop when sockets become readable"),
+        ])
+    }
+    client = httpx.Client(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, headers={"content-type": "text/html"}, text=sites[str(request.url)])
+    ))
+    monkeypatch.setattr(static_fetch, "get_http_client", lambda: client)
+
+    query = "python asyncio tutorial"
+    results = []
+    for url in sites:
+        fetched = static_fetch.static_fetch(url, "test-agent")
+        assert fetched is not None and len(fetched["text"]) > len(fetched["content"])
+        results.append({"title": url.split("/")[2], "link": url, "category": "tech", **fetched})
+    index.add(query, results)
+    index.flush()
+
+    # Text past the card snippet is searchable
+    assert [r["link"] for r in index.search("TaskGroup")] == ["https://site3.example/asyncio"]
+    answered = index.answer(query, 5)
+    assert [r["link"] for r in answered] == list(sites)
+    assert answered[0]["content"] == results[0]["content"]
@@ -0,0 +1,79 @@
+# backend/tests/test_plan_compiler.py
+import pytest
+
+from app.agents.llm_agent import StepParser
+from app.agents.plan_compiler import PlanError, compile_plan, compile_step, merge_extractions, parse_step
+
+
+def test_parse_step_normalizes_numbered_and_bulleted_lines():
+    assert parse_step("1. OPEN: https://example.com") == "open: https://example.com"
+    assert parse_step("- `click: #go`") == "click: #go"
+    assert parse_step("Here is your plan:") is None
+
+
+def test_parse_step_keeps_unknown_numbered_verbs_for_the_compiler():
+    assert parse_step("2. scroll: down") == "2. scroll: down"
+    with pytest.raises(PlanError, match="unknown action 'scroll'"):
+        compile_step(parse_step("2. scroll: down"))
+
+
+def test_step_parser_passes_unknown_verbs_through_while_streaming():
+    parser = StepParser()
+    steps = parser.feed("1. open: https://example.com\n2. scr")
+    steps += parser.feed("oll: down\n3. click: #x")
+    steps += parser.finish()
+    assert steps == ["open: https://example.com", "2. scroll: down", "click: #x"]
+
+
+def test_compile_step_arguments():
+    assert compile_step("type: input[name='q'] -> laptops").args == ("input[name='q']", "laptops")
+    assert compile_step("wait_for: .list->500ms").args == (".list", 500)
+    assert compile_step("extract_text: .item->3->name=.n, link=a@href").args == (
+        (".item", 3, (("name", ".n"), ("link", "a@href"))),
+    )
+    assert compile_step("screenshot: ../out").args == ("out.png",)
+
+
+@pytest.mark.parametrize("line", [
+    "open: ftp://example.com",
+    "click: div[",
+    "extract_text: .item->0",
+    "press: two words!",
+    "screenshot: .hidden",
+])
+def test_compile_step_rejects_bad_arguments(line):
+    with pytest.raises(PlanError):
+        compile_step(line)
+
+
+def test_compile_plan_merges_consecutive_extractions_only():
+    actions = compile_plan(
+        "1. open: https://example.com\n"
+        "2. extract_text: .a->2\n"
+        "3. extract_text: .b->1\n"
+        "4. click: #next\n"
+        "5. extract_text: .c->1\n"
+    )
+    assert [action.verb for action in actions] == ["open", "extract_text", "click", "extract_text"]
+    assert actions[1].args == ((".a", 2, None), (".b", 1, None))
+    assert actions[1].line == "extract_text: .a->2; extract_text: .b->1"
+
+
+def test_merge_extractions_leaves_other_actions_alone():
+    actions = [compile_step("open: https://example.com"), compile_step("click: #x")]
+    assert merge_extractions(actions) == actions
+
+
+def test_compile_plan_reports_every_bad_line():
+    with pytest.raises(PlanError) as error:
+        compile_plan("1. click: #x\n2. open: https://example.com\n3. scroll: down\n4. press: \n")
+    assert error.value.errors == [
+        "line 1: click needs a page; open a URL first",
+        "line 3: unknown action 'scroll' in '3. scroll: down'",
+        "line 4: press: not a key name: ''",
+    ]
+
+
+def test_compile_plan_needs_an_action():
+    with pytest.raises(PlanError, match="no actions"):
+        compile_plan("Sorry, I can't help with that.")
@@ -0,0 +1,40 @@
+# backend/tests/test_routes.py
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import routes
+from app.agents.plan_compiler import PlanError
+from app.agents.session import QueueFull
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def run(error):
+        async def execute_command(command):
+            if error is not None:
+                raise error
+            return {"command": command}
+        monkeypatch.setattr(routes.orchestrator, "execute_command", execute_command)
+        app = FastAPI()
+        app.include_router(routes.router)
+        return TestClient(app).post("/api/agents/execute", json={"command": "open example.com"})
+    return run
+
+
+def test_successful_runs_return_the_result(client):
+    response = client(None)
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "result": {"command": "open example.com"}}
+
+
+def test_errors_map_to_status_codes_with_a_json_body(client):
+    assert client(QueueFull(4, 16)).status_code == 429
+    assert client(PlanError(["bad step"])).json() == {"status": "invalid_plan", "errors": ["bad step"]}
+    response = client(asyncio.TimeoutError())
+    assert (response.status_code, response.json()["status"]) == (504, "timeout")
+    response = client(RuntimeError("browser crashed"))
+    assert response.status_code == 500
+    assert response.json() == {"status": "error", "error": "Agent error: browser crashed"}
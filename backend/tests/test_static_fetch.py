@@ -0,0 +1,60 @@
+# backend/tests/test_static_fetch.py
+import httpx
+import pytest
+
+from app import static_fetch
+
+PAGE = (
+    "<html><body><article>"
+    + "".join(f"<p>Paragraph {n} of readable article text.</p>" for n in range(20))
+    + "</article></body></html>"
+)
+# Over the 2000 byte cap set below
+LARGE_PAGE = PAGE.replace("</article>", "<p>More text.</p>" * 100 + "</article>")
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Route static_fetch to a handler(request) -> httpx.Response"""
+    def install(handler):
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(static_fetch, "get_http_client", lambda: client)
+
+    monkeypatch.setattr(static_fetch, "STATIC_MAX_BYTES", 2000)
+    return install
+
+
+def chunks(streamed, body, size=100):
+    """Body in chunks of size bytes, recording the offset of each chunk that is read"""
+    for i in range(0, len(body), size):
+        streamed.append(i)
+        yield body[i:i + size]
+
+
+def test_pages_under_the_cap_are_extracted(serve):
+    serve(lambda request: httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE))
+    assert static_fetch.static_fetch("https://a.example/", "ua")["status"] == "success"
+
+
+def test_content_length_over_the_cap_is_rejected_before_reading(serve):
+    streamed = []
+    serve(lambda request: httpx.Response(
+        200, headers={"content-type": "text/html", "content-length": str(len(LARGE_PAGE))},
+        content=chunks(streamed, LARGE_PAGE.encode())
+    ))
+    assert static_fetch.static_fetch("https://a.example/", "ua") is None
+    assert streamed == []
+
+
+def test_streamed_bodies_stop_at_the_cap(serve):
+    streamed = []
+    serve(lambda request: httpx.Response(200, headers={"content-type": "text/html"}, content=chunks(streamed, LARGE_PAGE.encode())))
+    assert static_fetch.static_fetch("https://a.example/", "ua") is None
+    assert len(streamed) == 21 < len(LARGE_PAGE) // 100
+
+
+def test_non_html_and_errors_fall_back_to_the_browser(serve):
+    serve(lambda request: httpx.Response(200, headers={"content-type": "application/json"}, text="{}"))
+    assert static_fetch.static_fetch("https://a.example/", "ua") is None
+    serve(lambda request: httpx.Response(503, headers={"content-type": "text/html"}, text=PAGE))
+    assert static_fetch.static_fetch("https://a.example/", "ua") is None
@@ -0,0 +1,45 @@
+# backend/tests/test_storage.py
+import os
+
+from app import storage
+from app.storage import StorageJanitor
+
+
+def test_touch_stamps_unindexed_files_at_most_once_per_interval(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(storage, "time", clock)
+    stamps = []
+    real_utime = os.utime
+    monkeypatch.setattr(os, "utime", lambda path, **kwargs: (stamps.append(path), real_utime(path, **kwargs)))
+    janitor = StorageJanitor([str(tmp_path)], touch_interval=60)
+    path = str(tmp_path / "shot.jpg")
+    with open(path, "wb") as f:
+        f.write(b"x")
+    # Served by another worker's render, last stamped long ago
+    real_utime(path, (clock.time() - 3600, os.stat(path).st_mtime))
+
+    janitor.touch(path)
+    assert len(stamps) == 1
+    real_utime(path, (clock.time(), os.stat(path).st_mtime))
+    janitor.touch(path)
+    clock.advance(59)
+    janitor.touch(path)
+    assert len(stamps) == 1
+    clock.advance(2)
+    janitor.touch(path)
+    assert len(stamps) == 2
+
+
+def test_touch_throttles_indexed_files_by_their_entry(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(storage, "time", clock)
+    stamps = []
+    monkeypatch.setattr(os, "utime", lambda path, **kwargs: stamps.append(path))
+    janitor = StorageJanitor([str(tmp_path)], touch_interval=60)
+    path = str(tmp_path / "thumb.webp")
+    with open(path, "wb") as f:
+        f.write(b"x")
+    janitor.record(path)
+    janitor.touch(path)
+    assert stamps == []
+    clock.advance(61)
+    janitor.touch(path)
+    assert stamps == [path]
@@ -0,0 +1,101 @@
+# backend/tests/test_ttl_cache.py
+import threading
+import time
+
+import pytest
+
+from app import ttl_cache
+from app.ttl_cache import SingleFlight, TTLCache
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    monkeypatch.setattr(ttl_cache, "time", clock)
+    return TTLCache(max_entries=2, ttl=60)
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("q", ["result"])
+    clock.advance(60)
+    assert cache.get("q") == ["result"]
+    clock.advance(1)
+    assert cache.get("q") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_default(cache, clock):
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2)
+    clock.advance(10)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_single_flight_runs_one_call_per_key():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def search():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["result"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("q", search)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("q", search))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    # Followers register as coalesced before blocking on the leader's result
+    while flight.coalesced < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 4
+    # The key is released, so the next call runs again
+    assert flight.do("q", lambda: "fresh") == "fresh"
+
+
+def test_single_flight_shares_the_error():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("search failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("q", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flight.coalesced < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ["search failed"] * 2
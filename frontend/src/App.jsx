@@ -14,6 +14,7 @@ function App() {
   const [showSettings, setShowSettings] = useState(false);
   const [selectedFilter, setSelectedFilter] = useState("all");
   const [viewMode, setViewMode] = useState("grid");
+  const [showPreviews, setShowPreviews] = useState(true);
   const [connectionStatus, setConnectionStatus] = useState("checking");
   const textareaRef = useRef(null);
   const resultsRef = useRef(null);
@@ -26,17 +27,20 @@ function App() {
     const savedHistory = JSON.parse(localStorage.getItem('searchHistory') || '[]');
     const savedStats = JSON.parse(localStorage.getItem('searchStats') || '{"total": 0, "today": 0}');
     const savedViewMode = localStorage.getItem('viewMode') || 'grid';
+    const savedShowPreviews = localStorage.getItem('showPreviews') !== 'false';
     
     setDarkMode(savedDarkMode);
     setSearchHistory(savedHistory);
     setSearchStats(savedStats);
     setViewMode(savedViewMode);
+    setShowPreviews(savedShowPreviews);
   }, []);
 
   useEffect(() => { localStorage.setItem('darkMode', darkMode); }, [darkMode]);
   useEffect(() => { localStorage.setItem('searchHistory', JSON.stringify(searchHistory)); }, [searchHistory]);
   useEffect(() => { localStorage.setItem('searchStats', JSON.stringify(searchStats)); }, [searchStats]);
   useEffect(() => { localStorage.setItem('viewMode', viewMode); }, [viewMode]);
+  useEffect(() => { localStorage.setItem('showPreviews', showPreviews); }, [showPreviews]);
 
   useEffect(() => {
     if (textareaRef.current) {
@@ -74,33 +78,58 @@ function App() {
     try {
       const startTime = Date.now();
       
-      const response = await fetch("http://127.0.0.1:5000/execute", {
+      // Streamed NDJSON: search hits arrive first, then one event per finished page
+      const response = await fetch("http://127.0.0.1:5000/execute/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ command: commandToExecute }),
+        // Without previews the backend can skip the browser for static pages
+        body: JSON.stringify({ command: commandToExecute, screenshots: showPreviews }),
       });
 
       if (!response.ok) {
         throw new Error(`Server responded with ${response.status}: ${response.statusText}`);
       }
 
-      const data = await response.json();
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let resultsCount = 0;
+
+      const handleEvent = (evt) => {
+        if (evt.type === "search") {
+          resultsCount = evt.results.length;
+          setResults(evt.results);
+          // Hits are on screen, so the full-page loader is no longer needed
+          setLoading(false);
+        } else if (evt.type === "result") {
+          setResults(prev => prev.map((item, i) => (i === evt.index ? evt.result : item)));
+        } else if (evt.type === "done" && evt.selected) {
+          // More pages are fetched than shown; keep the ones the backend picked
+          resultsCount = evt.selected.length;
+          setResults(prev => evt.selected.map(i => prev[i]));
+        } else if (evt.type === "error") {
+          setError(evt.error);
+        }
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) handleEvent(JSON.parse(buffer));
+
       const endTime = Date.now();
       const searchTime = ((endTime - startTime) / 1000).toFixed(1);
 
-      if (data.error) {
-        setError(data.error);
-      } else {
-        setResults(data.results || []);
-        
-        const newSearch = { query: commandToExecute, timestamp: new Date().toISOString(), resultsCount: data.results?.length || 0, searchTime: searchTime };
+      if (resultsCount > 0) {
+        const newSearch = { query: commandToExecute, timestamp: new Date().toISOString(), resultsCount: resultsCount, searchTime: searchTime };
         
         setSearchHistory(prev => [newSearch, ...prev.slice(0, 9)]);
         setSearchStats(prev => ({ total: prev.total + 1, today: prev.today + 1 }));
-
-        if (!data.results || data.results.length === 0) {
-          setError("No results found. Please try a different search query.");
-        }
       }
     } catch (err) {
       console.error("Search error:", err);
@@ -108,7 +137,7 @@ function App() {
     } finally {
       setLoading(false);
     }
-  }, [command]);
+  }, [command, showPreviews]);
 
   useEffect(() => {
     if (text) {
@@ -136,7 +165,9 @@ function App() {
     setShowHistory(false);
     if (textareaRef.current) { textareaRef.current.focus(); }
   };
-  const getUrl = (path, type) => {
+  const getUrl = (path, type, versionedUrl) => {
+    // Versioned URLs (?v=) are served as immutable, so the browser never re-downloads them
+    if (versionedUrl) return `http://127.0.0.1:5000${versionedUrl}`;
     if (!path) return null;
     const filename = path.split("/").pop() || path.split("\\").pop();
     return `http://127.0.0.1:5000/${type}/${filename}`;
@@ -213,6 +244,23 @@ function App() {
                 </button>
               </div>
             </div>
+            <div className="setting-item">
+              <label>Visual Previews:</label>
+              <div className="view-toggle">
+                <button 
+                  className={showPreviews ? 'active' : ''}
+                  onClick={() => setShowPreviews(true)}
+                >
+                  On
+                </button>
+                <button 
+                  className={!showPreviews ? 'active' : ''}
+                  onClick={() => setShowPreviews(false)}
+                >
+                  Off
+                </button>
+              </div>
+            </div>
             <div className="setting-item">
               <label>Backend Status:</label>
               <div className={`connection-indicator ${connectionStatus}`}>
@@ -389,12 +437,14 @@ function App() {
                   <div className="result-category">{item.category}</div>
                   {item.status === 'success' && <div className="status-badge success">✓</div>}
                   {item.status === 'error' && <div className="status-badge error">✗</div>}
+                  {item.status === 'timeout' && <div className="status-badge error">⏱</div>}
+                  {item.status === 'loading' && <div className="status-badge loading">…</div>}
                 </div>
                 
                 {item.thumbnail && (
                   <div className="screenshot-container">
                     <img
-                      src={getUrl(item.thumbnail, 'thumbnail')}
+                      src={getUrl(item.thumbnail, 'thumbnail', item.thumbnail_url)}
                       alt="Website preview"
                       className="screenshot"
                       loading="lazy"
@@ -404,7 +454,7 @@ function App() {
                     />
                     <div className="screenshot-overlay">
                       <a
-                        href={getUrl(item.screenshot, 'screenshot')}
+                        href={getUrl(item.screenshot, 'screenshot', item.screenshot_url)}
                         target="_blank"
                         rel="noopener noreferrer"
                         className="preview-btn"
@@ -424,7 +474,7 @@ function App() {
                   >
                     {item.title}
                   </a>
-                  <p className="result-snippet">{item.content}</p>
+                  <p className="result-snippet">{item.status === 'loading' ? 'Loading page preview...' : item.content}</p>
                   
                   <div className="result-actions">
                     <a
@@ -552,7 +602,7 @@ function App() {
           <div className="warning-content">
             <h3>⚠️ Backend Connection Failed</h3>
             <p>Make sure the Python backend server is running:</p>
-            <code>python main.py</code>
+            <code>python -m app.main</code>
             <p>Server should be available at: <strong>http://127.0.0.1:5000</strong></p>
             <button className="retry-btn" onClick={checkBackendConnection}>
               🔄 Retry Connection
@@ -1,10 +1,9 @@
-const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000'; // Fallback added
+const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:5000'; // Same server as /execute
 
 // RENAME THIS FUNCTION
 export async function executeAgentCommand(command) {
   try {
-    // The endpoint is /api/execute-agent, not /api/agents/execute
-    const response = await fetch(`${API_URL}/api/execute-agent`, {
+    const response = await fetch(`${API_URL}/api/agents/execute`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ command }),